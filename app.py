@@ -1,10 +1,10 @@
 import streamlit as st
 import os
+import logging
 import re
 import chardet
 import numpy as np
 import plotly.graph_objects as go
-from groq import Groq
 from dotenv import load_dotenv
 from fpdf import FPDF
 import requests
@@ -13,23 +13,71 @@ from sklearn.metrics.pairwise import cosine_similarity
 from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from bot_core.api_symbols import check_api
+from bot_core.batch_rewriter import rewrite_batching
+from bot_core.builder_lifecycle import analyze_builders
+from bot_core.code_analysis import CHECK_LABELS, cached_analysis, code_fingerprint, quality_checks, summarize_code
+from bot_core.code_analysis import quality_score as quality_score_of
+from bot_core.code_extract import FenceWatcher
+from bot_core.code_repair import CodeRepairer, regeneration_cost
+from bot_core.dry_run import DryRunPool, SandboxUnavailable, format_result
+from bot_core.generation import generate_code
+from bot_core.jobs import JobManager, LinkedEvent
+from bot_core.line_diff import diff_lines, side_by_side
+from bot_core.llm_backends import backend_from_env
+from bot_core.llm_client import LLMClient
+from bot_core.model_router import ModelRouter
+from bot_core.param_template import compile_template, format_report
+from bot_core.perf_lint import format_findings, lint_performance
+from bot_core.prompt_templates import CompiledPrompt
+from bot_core.semantic_cache import SemanticCache
+from bot_core.structured_output import parse_structured_response, structured_instructions
+from bot_core.telemetry import Telemetry
 
 
 # --- 1. Initialization ---
 st.set_page_config(page_title="NX CodeBot Pro", page_icon="🔩", layout="wide")
 load_dotenv()
+logging.basicConfig(format="%(asctime)s %(name)s %(levelname)s %(message)s")
+logging.getLogger("nx_codebot").setLevel(os.getenv("NXBOT_LOG_LEVEL", "INFO"))
 
 
 groq_api_key = os.getenv("GROQ_API_KEY") or st.secrets.get("GROQ_API_KEY")
 huggingface_api_key = os.getenv("HUGGINGFACE_API_KEY") or st.secrets.get("HUGGINGFACE_API_KEY")
 
 
-if not groq_api_key:
+llm_backend_name = os.getenv("NXBOT_LLM_BACKEND", "groq").lower()
+
+
+if llm_backend_name == "groq" and not os.getenv("NXBOT_LLM_REPLAY") and not groq_api_key:
     st.error("❌ GROQ_API_KEY not found. Please set it in your environment or Streamlit secrets.")
     st.stop()
 
 
-groq_client = Groq(api_key=groq_api_key)
+@st.cache_resource
+def get_llm_client(api_key):
+    """One pooled, rate-limited client shared by every session on this server."""
+    return LLMClient(
+        backend_from_env(
+            api_key,
+            max_connections=int(os.getenv("NXBOT_MAX_CONNECTIONS", "8")),
+            timeout=float(os.getenv("NXBOT_LLM_TIMEOUT", "60"))
+        ),
+        requests_per_minute=int(os.getenv("NXBOT_REQUESTS_PER_MINUTE", "30")),
+        tokens_per_minute=int(os.getenv("NXBOT_TOKENS_PER_MINUTE", "12000")),
+        max_concurrency=int(os.getenv("NXBOT_MAX_CONCURRENCY", "4")),
+        timeout=float(os.getenv("NXBOT_LLM_TIMEOUT", "60")),
+        router=ModelRouter(enabled=os.getenv("NXBOT_MODEL_ROUTING", "1") != "0"),
+        telemetry=Telemetry(),
+        early_stop_calibration=int(os.getenv("NXBOT_EARLY_STOP_CALIBRATE", "20"))
+    )
+
+
+llm_client = get_llm_client(groq_api_key)
+# Stop generation streams once the code block closes instead of paying for trailing prose
+EARLY_STOP = os.getenv("NXBOT_EARLY_STOP", "1") != "0"
 
 
 EXAMPLES_DIR = "nx_examples"
@@ -181,6 +229,26 @@ def find_nearest_example(user_prompt, vectorizer, matrix, names, codes):
     return names[idx], codes[idx], base_similarity
 
 
+def find_top_examples(user_prompt, vectorizer, matrix, names, codes, n, first=None):
+    """Top-n examples by TF-IDF similarity, optionally led by an already chosen (name, code, score)."""
+    candidates = [first] if first else []
+    if not vectorizer or matrix is None:
+        return candidates[:n]
+    
+    expanded_prompt = user_prompt
+    if len(user_prompt.split()) < 5:
+        expanded_prompt = f"{user_prompt} create generate NXOpen python code CAD feature primitive"
+    
+    sims = cosine_similarity(matrix, vectorizer.transform([expanded_prompt])).flatten()
+    for idx in sims.argsort()[::-1]:
+        if len(candidates) >= n:
+            break
+        if first and names[idx] == first[0]:
+            continue
+        candidates.append((names[idx], codes[idx], float(sims[idx])))
+    return candidates
+
+
 def extract_code_patterns(example_code):
     """Extract key patterns from example code for better AI learning."""
     patterns = {
@@ -217,15 +285,24 @@ def extract_code_patterns(example_code):
     return patterns
 
 
-def create_augmented_prompt(user_prompt, example_code, example_name):
-    """Create enhanced prompt with code patterns and strict requirements."""
+CODE_ONLY_INSTRUCTIONS = "Generate ONLY the complete Python code, no explanations outside the code."
+STRUCTURED_OUTPUT_INSTRUCTIONS = structured_instructions(with_similarity=True)
+
+
+# cache_resource: the index is read-only and shared, so reruns skip cache_data's unpickling copy
+@st.cache_resource(show_spinner="Indexing example patterns...")
+def index_example_patterns(names, codes):
+    """extract_code_patterns for every example, once at index time, keyed by example name."""
+    return {name: extract_code_patterns(code) for name, code in zip(names, codes)}
+
+
+def create_example_prompt_prefix(example_code, example_name, output_instructions=CODE_ONLY_INSTRUCTIONS,
+                                 patterns=None):
+    """Static, per-example part of the generation prompt; the user request is appended last."""
     
-    patterns = extract_code_patterns(example_code)
+    patterns = patterns or extract_code_patterns(example_code)
     
-    return f"""
-{MASTER_SYSTEM_PROMPT_BASE}
-
-# REFERENCE EXAMPLE: {example_name}
+    return f"""# REFERENCE EXAMPLE: {example_name}
 Study this working example carefully and replicate its patterns EXACTLY:
 
 {example_code}
@@ -235,11 +312,8 @@ Study this working example carefully and replicate its patterns EXACTLY:
 2. Session initialization: {patterns['session_init'] or 'theSession = NXOpen.Session.GetSession()'}
 3. Parameter placeholders: {', '.join(patterns['parameter_usage']) if patterns['parameter_usage'] else '{param1}, {param2}, etc.'}
 
-# USER REQUEST:
-{user_prompt}
-
 # YOUR TASK:
-Generate COMPLETE, PRODUCTION-READY NXOpen Python code that:
+Generate COMPLETE, PRODUCTION-READY NXOpen Python code for the user request below that:
 1. Uses the EXACT same coding style as the example above
 2. Follows the EXACT same structure (imports, main(), builder pattern)
 3. Includes ALL necessary error handling
@@ -253,7 +327,40 @@ IMPORTANT:
 - Add comments explaining each major step
 - Return the created feature from main()
 
-Generate ONLY the complete Python code, no explanations outside the code."""
+{output_instructions}
+
+# USER REQUEST:
+"""
+
+
+@st.cache_resource(show_spinner="Compiling example prompts...")
+def compile_example_prompts(names, codes, _patterns):
+    """Build every example's prompt once at index time, for code-only and structured output."""
+    return {
+        name: {
+            "code": CompiledPrompt(
+                MASTER_SYSTEM_PROMPT_BASE, create_example_prompt_prefix(code, name, patterns=_patterns.get(name))
+            ),
+            "structured": CompiledPrompt(
+                MASTER_SYSTEM_PROMPT_BASE,
+                create_example_prompt_prefix(code, name, STRUCTURED_OUTPUT_INSTRUCTIONS, _patterns.get(name))
+            )
+        }
+        for name, code in zip(names, codes)
+    }
+
+
+def create_augmented_prompt(user_prompt, example_code, example_name, mode="code"):
+    """Messages for an example-based generation: the compiled prefix plus the user request."""
+    
+    compiled = example_prompts.get(example_name, {}).get(mode)
+    if compiled is None:
+        instructions = STRUCTURED_OUTPUT_INSTRUCTIONS if mode == "structured" else CODE_ONLY_INSTRUCTIONS
+        compiled = CompiledPrompt(
+            MASTER_SYSTEM_PROMPT_BASE,
+            create_example_prompt_prefix(example_code, example_name, instructions, example_patterns.get(example_name))
+        )
+    return compiled.messages(user_prompt)
 
 
 # --- 4. Utilities ---
@@ -269,7 +376,7 @@ def read_script_auto_encode(path):
         return None
 
 
-def get_code_description(client, code_snippet):
+def get_code_description(client, code_snippet, cancel_event=None):
     """Generate detailed explanation of NXOpen code."""
     
     if code_snippet is None:
@@ -308,14 +415,16 @@ Provide a comprehensive, production-focused explanation."""
     ]
     
     try:
-        completion = client.chat.completions.create(
+        completion = client.complete(
             model="llama-3.3-70b-versatile",
             messages=messages,
             temperature=0.2,
-            max_tokens=2000
+            max_tokens=2000,
+            task="explain",
+            cancel_event=cancel_event
         )
         
-        explanation = completion.choices[0].message.content
+        explanation = completion.content
         
         if not explanation or len(explanation.strip()) < 20:
             return "⚠️ AI returned an empty or very short explanation. Please try regenerating."
@@ -326,7 +435,7 @@ Provide a comprehensive, production-focused explanation."""
         return f"⚠️ API Error while generating explanation: {str(e)}"
 
 
-def generate_similarity_explanation(client, user_prompt, example_name, example_code, similarity_score):
+def generate_similarity_explanation(client, user_prompt, example_name, example_code, similarity_score, cancel_event=None):
     """Generate detailed similarity analysis."""
     
     sys_prompt = """You are an expert at analyzing CAD code patterns and explaining similarities.
@@ -353,14 +462,17 @@ Be technical and specific about NXOpen API usage."""
     ]
     
     try:
-        completion = client.chat.completions.create(
+        completion = client.complete(
             model="llama-3.3-70b-versatile",
             messages=messages,
             temperature=0.3,
-            max_tokens=1500
+            max_tokens=1500,
+            task="similarity",
+            example=example_name,
+            cancel_event=cancel_event
         )
         
-        return completion.choices[0].message.content or "No similarity explanation generated."
+        return completion.content or "No similarity explanation generated."
         
     except Exception as e:
         return f"⚠️ Error generating similarity explanation: {str(e)}"
@@ -369,39 +481,22 @@ Be technical and specific about NXOpen API usage."""
 def validate_generated_code(code):
     """Validate that generated code meets minimum requirements."""
     
-    validation_results = {
-        "has_imports": False,
-        "has_main_function": False,
-        "has_session": False,
-        "has_builder": False,
-        "has_commit": False,
-        "has_destroy": False,
-        "quality_score": 0
-    }
-    
     if not code:
+        validation_results = {check: False for check in CHECK_LABELS}
+        validation_results["quality_score"] = 0
         return validation_results, "No code generated"
     
-    code_lower = code.lower()
-    
-    # Check for required components
-    validation_results["has_imports"] = "import nxopen" in code_lower
-    validation_results["has_main_function"] = "def main(" in code_lower
-    validation_results["has_session"] = "getsession()" in code_lower
-    validation_results["has_builder"] = "builder" in code_lower
-    validation_results["has_commit"] = ".commit()" in code_lower
-    validation_results["has_destroy"] = ".destroy()" in code_lower
-    
-    # Calculate quality score
-    quality_score = sum([
-        validation_results["has_imports"] * 20,
-        validation_results["has_main_function"] * 20,
-        validation_results["has_session"] * 15,
-        validation_results["has_builder"] * 15,
-        validation_results["has_commit"] * 15,
-        validation_results["has_destroy"] * 15
-    ])
-    
+    # Keyed by the AST fingerprint: code that differs only in names, literals or layout
+    # (e.g. a semantic cache hit with new numbers) reuses the earlier validation
+    validation_results, message = cached_analysis("validation", code, _validate_code, key=code_fingerprint(code))
+    return dict(validation_results), message
+
+
+def _validate_code(code):
+    validation_results = {check: False for check in CHECK_LABELS}
+    # Checks come from one AST pass over the code (cached by code hash)
+    validation_results.update(quality_checks(summarize_code(code)))
+    quality_score = quality_score_of(validation_results)
     validation_results["quality_score"] = quality_score
     
     if quality_score >= 90:
@@ -414,113 +509,123 @@ def validate_generated_code(code):
     return validation_results, message
 
 
-def extract_code_from_response(response_text):
-    """Extract Python code from AI response with multiple fallback methods."""
-    
-    if not response_text:
-        return None
+def generate_code_with_example(client, user_prompt, example_code, example_name, cancel_event=None):
+    """Generate production-ready code using example as template."""
     
-    # Method 1: Try to find code block with ```
-    pattern1 = re.search(r"``````", response_text, re.DOTALL | re.IGNORECASE)
-    if pattern1:
-        code = pattern1.group(1).strip()
-        if len(code) > 50:
-            return code
-    
-    # Method 2: Try to find any code block with ```
-    pattern2 = re.search(r"``````", response_text, re.DOTALL)
-    if pattern2:
-        code = pattern2.group(1).strip()
-        if len(code) > 50:
-            return code
-    
-    # Method 3: Look for code between specific markers
-    pattern3 = re.search(r"(?:GENERATED CODE|CODE:|Generated NXOpen Code)(.*?)(?:EXPLANATION|$)", 
-                        response_text, re.DOTALL | re.IGNORECASE)
-    if pattern3:
-        code_section = pattern3.group(1)
-        code_block = re.search(r"``````", code_section, re.DOTALL)
-        if code_block:
-            code = code_block.group(1).strip()
-            if len(code) > 50:
-                return code
-    
-    # Method 4: If response looks like code, extract it
-    if any(keyword in response_text for keyword in ["import NXOpen", "def main", "theSession =", "theSession="]):
-        lines = response_text.split('\n')
-        code_lines = []
-        in_code = False
-        for line in lines:
-            if 'import' in line.lower() or in_code:
-                in_code = True
-                code_lines.append(line)
-        
-        potential_code = '\n'.join(code_lines).strip()
-        if len(potential_code) > 50:
-            return potential_code
+    messages = create_augmented_prompt(user_prompt, example_code, example_name)
     
-    return None
+    try:
+        # Very low temperature for consistency
+        return generate_code(client, messages, "groq/compound", 4000, temperature=0.05, example=example_name,
+                             cancel_event=cancel_event, stop_when=FenceWatcher if EARLY_STOP else None)
+    except Exception as e:
+        return None, f"API Error: {str(e)}"
 
 
-def generate_code_with_example(client, user_prompt, example_code, example_name):
-    """Generate production-ready code using example as template."""
-    
-    augmented_prompt = create_augmented_prompt(user_prompt, example_code, example_name)
-    
+def generate_structured_code(client, user_prompt, example_code=None, example_name=None, cancel_event=None):
+    """Single JSON-mode call returning code, explanation, parameters and shape.
+
+    Returns (structured data, raw response); data is None when the call fails or the
+    response does not match the schema, so callers can fall back to the multi-call path.
+    """
+    if example_code:
+        messages = create_augmented_prompt(user_prompt, example_code, example_name, mode="structured")
+    else:
+        messages = [
+            {"role": "system", "content": MASTER_SYSTEM_PROMPT_BASE},
+            {"role": "user", "content": f"""{structured_instructions(with_similarity=False)}
+
+User Request: {user_prompt}"""}
+        ]
+
     try:
-        completion = client.chat.completions.create(
-            model="groq/compound",
-            messages=[
-                {"role": "user", "content": augmented_prompt}
-            ],
-            temperature=0.05,  # Very low for consistency
-            max_tokens=4000
+        completion = client.complete(
+            model="llama-3.3-70b-versatile",
+            messages=messages,
+            temperature=0.05,
+            max_tokens=6000,
+            response_format={"type": "json_object"},
+            task="structured",
+            example=example_name,
+            cancel_event=cancel_event
         )
-        response_text = completion.choices[0].message.content or ""
-        
-        code = extract_code_from_response(response_text)
-        
-        return code, response_text
-        
+        response_text = completion.content or ""
     except Exception as e:
         return None, f"API Error: {str(e)}"
 
+    data, errors = parse_structured_response(response_text)
+    if errors:
+        return None, response_text + "\n\n# Structured response rejected: " + "; ".join(errors)
+    return data, response_text
 
-def generate_code_from_prompt(client, user_prompt):
-    """Generate code without example context."""
+
+BEST_OF_N_SIMILARITY = 0.7
+BEST_OF_N_QUALITY_THRESHOLD = 90
+
+
+def generate_best_of_n(client, user_prompt, candidates, max_concurrency=3,
+                       quality_threshold=BEST_OF_N_QUALITY_THRESHOLD, cancel_event=None):
+    """Generate from several examples concurrently and keep the highest-scoring code.
+
+    candidates is a list of (example_name, example_code, similarity). As soon as one
+    result reaches quality_threshold, queued generations are dropped and the rest are
+    told to stop. Returns a dict for the winner plus the per-candidate scores.
+    """
+    stop_event = LinkedEvent(cancel_event)
+    pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="best-of-n")
+    futures = {
+        pool.submit(generate_code_with_example, client, user_prompt, code, name, stop_event): (name, code, sim)
+        for name, code, sim in candidates
+    }
+    results = []
+    try:
+        for future in as_completed(futures):
+            name, code, sim = futures[future]
+            generated_code, raw_ai_response = future.result()
+            score = validate_generated_code(generated_code)[0]["quality_score"] if generated_code else -1
+            results.append({
+                "example_name": name,
+                "example_code": code,
+                "similarity": sim,
+                "code": generated_code,
+                "raw_ai_response": raw_ai_response,
+                "quality_score": score
+            })
+            if score >= quality_threshold:
+                break
+    finally:
+        stop_event.set()
+        pool.shutdown(wait=False, cancel_futures=True)
     
-    prompt = f"""{MASTER_SYSTEM_PROMPT_BASE}
+    best = max(results, key=lambda r: (r["quality_score"], r["similarity"]))
+    best["scores"] = {r["example_name"]: r["quality_score"] for r in results}
+    best["cancelled"] = len(candidates) - len(results)
+    best["distinct"] = len({code_fingerprint(r["code"]) if r["code"] else None for r in results})
+    return best
 
-User Request: {user_prompt}
 
-Generate complete, production-ready NXOpen Python code.
+SCRATCH_PROMPT = CompiledPrompt(MASTER_SYSTEM_PROMPT_BASE, """Generate complete, production-ready NXOpen Python code.
 Follow all requirements in the system prompt above.
-Provide ONLY the Python code in a code block."""
+Provide ONLY the Python code in a code block.
+
+User Request: """)
+
+
+def generate_code_from_prompt(client, user_prompt, cancel_event=None):
+    """Generate code without example context."""
     
     try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.05,
-            max_tokens=3000
-        )
-        response_text = completion.choices[0].message.content or ""
-        
-        code = extract_code_from_response(response_text)
-
-        return code, response_text
+        return generate_code(client, SCRATCH_PROMPT.messages(user_prompt), "llama-3.3-70b-versatile", 3000,
+                             temperature=0.05, cancel_event=cancel_event)
     except Exception as e:
         return None, f"API Error: {str(e)}"
 
 
 def replace_params_in_code(code, params):
+    """Fill {param1}-style and named, typed placeholders; returns (code, report of unfilled slots)."""
     if not code:
-        return code
-    for i, p in enumerate(params, start=1):
-        code = code.replace(f"{{param{i}}}", str(p))
-    return re.sub(r"\{param\d+\}", "0", code)
+        return code, None
+    return compile_template(code).render(params)
 
 
 def try_guess_shape_and_params(code, prompt):
@@ -686,13 +791,34 @@ class PDF(FPDF):
         self.ln()
 
 
+def reference_diff(data):
+    """(reference example code, line diff of the generated code against it), or (None, None)."""
+    name = data.get("closest_example_name")
+    if not name or name not in example_names or not data.get("code"):
+        return None, None
+    reference = example_codes[example_names.index(name)]
+    return reference, diff_lines(reference, data["code"])
+
+
+def format_reuse(diff):
+    return (f"{diff['reuse_ratio']:.0%} of the generated lines are unchanged from the reference example "
+            f"({diff['added']} added, {diff['removed']} removed)")
+
+
 def generate_pdf_report(data):
     pdf = PDF()
     pdf.add_page()
     pdf.chapter_title(f"1. NXOpen Python Code: {data.get('example_name','Script')}")
     pdf.chapter_body(data.get('code',''), is_code=True)
     pdf.chapter_title("2. Code Quality Assessment")
-    pdf.chapter_body(data.get("quality_message", "No quality assessment available."))
+    assessment = data.get("quality_message", "No quality assessment available.")
+    perf_lines = format_findings(lint_performance(data.get("code", "")))
+    if perf_lines:
+        assessment += "\n\nPerformance findings:\n" + "\n".join(f"- {line}" for line in perf_lines)
+    _, diff = reference_diff(data)
+    if diff:
+        assessment += f"\n\nExample reuse: {format_reuse(diff)}."
+    pdf.chapter_body(assessment)
     pdf.chapter_title("3. Similarity Analysis")
     pdf.chapter_body(data.get("similarity_explanation") or "No similarity analysis available.")
     pdf.chapter_title("4. Code Explanation")
@@ -706,6 +832,320 @@ if example_codes:
     vectorizer, vec_matrix = build_vectorizer_and_matrix(example_codes)
 else:
     vectorizer, vec_matrix = None, None
+example_patterns = index_example_patterns(example_names, example_codes)
+example_prompts = compile_example_prompts(example_names, example_codes, example_patterns)
+
+
+@st.cache_resource
+def get_semantic_cache(_vectorizer, corpus_key):
+    """Shared prompt cache, rebuilt whenever the example corpus changes."""
+    return SemanticCache(_vectorizer) if _vectorizer else None
+
+
+semantic_cache = get_semantic_cache(vectorizer, tuple(example_names))
+
+
+# --- Background generation jobs ---
+@st.cache_resource
+def get_job_manager():
+    """Generations run here so reruns and widget changes never drop or duplicate them."""
+    return JobManager(max_workers=int(os.getenv("NXBOT_JOB_WORKERS", "4")))
+
+
+job_manager = get_job_manager()
+
+
+@st.cache_resource
+def get_code_repairer():
+    """Patches low-scoring generations instead of regenerating them (NXBOT_REPAIR_ROUNDS=0 disables)."""
+    return CodeRepairer(llm_client, validate_generated_code, max_rounds=int(os.getenv("NXBOT_REPAIR_ROUNDS", "2")))
+
+
+code_repairer = get_code_repairer()
+
+
+@st.cache_resource
+def get_dry_run_pool():
+    """Isolated workers that run generated scripts against the NXOpen mock.
+
+    Opt-in (NXBOT_DRY_RUN_WORKERS > 0): it executes LLM-written code on this server, so it stays
+    off unless the workers can isolate themselves (Linux namespaces, chroot, seccomp).
+    """
+    workers = int(os.getenv("NXBOT_DRY_RUN_WORKERS", "0"))
+    if workers <= 0:
+        return None
+    try:
+        return DryRunPool(
+            workers=workers,
+            timeout=float(os.getenv("NXBOT_DRY_RUN_TIMEOUT", "5")),
+            memory_mb=int(os.getenv("NXBOT_DRY_RUN_MEMORY_MB", "512"))
+        )
+    except SandboxUnavailable as e:
+        logging.getLogger("nx_codebot.dry_run").warning("Dry run disabled, workers cannot be isolated: %s", e)
+        return None
+
+
+dry_run_pool = get_dry_run_pool()
+
+
+def run_example_generation(job, example_selected, params, raw_code, prefetch=None):
+    """Background job: fill an example's parameters and explain it.
+
+    prefetch is the explain_example job started when the example was selected; its
+    explanation is used when it finishes, otherwise the explanation is generated here.
+    """
+    final_code, fill_report = replace_params_in_code(raw_code, params)
+    if fill_report and format_report(fill_report):
+        job.note("warning", f"🧩 Parameters: {format_report(fill_report)}")
+
+    job.update("🔄 Generating explanation...", 0.1)
+    explanation = None
+    if prefetch:
+        while not prefetch.wait(0.2):
+            if job.cancel_event.is_set():
+                prefetch.cancel()
+            job.check_cancelled()
+        if prefetch.status == "done" and prefetch.result["code"] == final_code:
+            explanation = prefetch.result["explanation"]
+        job_manager.discard(prefetch.id)
+    if explanation is None:
+        explanation = get_code_description(llm_client, final_code, cancel_event=job.cancel_event)
+
+    shape_guess = example_selected.replace(".py", "")
+    fig = render_3d_preview(shape_guess, params)
+    
+    job.update("🎨 Generating concept art...", 0.9)
+    img_url = generate_ai_image(huggingface_api_key, shape_guess, params)
+
+    job.note("success", "✅ Generated from example.")
+    return {
+        "code": final_code,
+        "params": params,
+        "example_name": example_selected,
+        "explanation": explanation,
+        "similarity_explanation": None,
+        "figure": fig,
+        "image_url": img_url,
+        "report": None,
+        "raw_ai_response": "",
+        "closest_example_name": None,
+        "closest_example_similarity": None,
+        "quality_message": "✅ Example code (pre-validated)"
+    }
+
+
+def run_ai_generation(job, ai_prompt, structured_mode, best_of_n):
+    """Background job: retrieval, generation, validation and explanation for an AI request."""
+    pipeline_start = time.time()
+    cancel_event = job.cancel_event
+
+    job.update("🔍 Finding similar examples...", 0.05)
+    if not vectorizer or not example_codes:
+        nearest_name = None
+        nearest_code = None
+        similarity = None
+        job.note("info", "No examples available for similarity matching.")
+    else:
+        nearest_name, nearest_code, similarity = find_nearest_example(
+            ai_prompt, vectorizer, vec_matrix, example_names, example_codes
+        )
+        if nearest_name:
+            job.note("success", f"✅ Found: {nearest_name} ({similarity*100:.1f}% match)")
+
+    structured = None
+    if structured_mode:
+        job.update("⚡ Generating code, explanation and parameters in one call...", 0.15)
+        structured, raw_ai_response = generate_structured_code(
+            llm_client, ai_prompt, nearest_code, nearest_name, cancel_event=cancel_event
+        )
+        if not structured:
+            job.note("info", "ℹ️ Structured response unusable - falling back to step-by-step generation")
+
+    if structured:
+        generated_code = structured["code"]
+    elif nearest_name and nearest_code and best_of_n > 1 and similarity < BEST_OF_N_SIMILARITY:
+        job.update(f"🎲 Generating from the top {best_of_n} examples in parallel...", 0.2)
+        candidates = find_top_examples(
+            ai_prompt, vectorizer, vec_matrix, example_names, example_codes, best_of_n,
+            first=(nearest_name, nearest_code, similarity)
+        )
+        best = generate_best_of_n(llm_client, ai_prompt, candidates, cancel_event=cancel_event)
+        generated_code, raw_ai_response = best["code"], best["raw_ai_response"]
+        nearest_name, nearest_code, similarity = best["example_name"], best["example_code"], best["similarity"]
+        job.note(
+            "info",
+            "🎲 Candidate scores: " + ", ".join(f"{name}: {score}" for name, score in best["scores"].items())
+            + (f" ({best['cancelled']} cancelled)" if best["cancelled"] else "")
+            + (f"; only {best['distinct']} structurally distinct" if best["distinct"] < len(best["scores"]) else "")
+        )
+    elif nearest_name and nearest_code:
+        job.update("✨ Generating production-ready code...", 0.2)
+        generated_code, raw_ai_response = generate_code_with_example(
+            llm_client, ai_prompt, nearest_code, nearest_name, cancel_event=cancel_event
+        )
+    else:
+        job.update("✨ Generating code from scratch...", 0.2)
+        generated_code, raw_ai_response = generate_code_from_prompt(llm_client, ai_prompt, cancel_event=cancel_event)
+
+    job.check_cancelled()
+    if not generated_code or len(generated_code.strip()) < 50:
+        return {"error": "❌ AI generation failed or returned invalid code.", "raw_ai_response": raw_ai_response}
+
+    # Validate generated code
+    validation_results, quality_message = validate_generated_code(generated_code)
+    quality_score = validation_results["quality_score"]
+
+    if quality_score < code_repairer.target_score and code_repairer.max_rounds > 0:
+        job.update("🩹 Patching the failing checks...", 0.5)
+        if nearest_code:
+            generation_messages = create_augmented_prompt(ai_prompt, nearest_code, nearest_name)
+        else:
+            generation_messages = SCRATCH_PROMPT.messages(ai_prompt)
+        try:
+            repair = code_repairer.repair(
+                generated_code, regeneration_cost(generation_messages, raw_ai_response), cancel_event=cancel_event
+            )
+        except Exception as e:
+            # The generated code is still usable; keep it and its validation
+            repair = None
+            job.note("warning", f"🩹 Repair skipped, keeping the generated code: {str(e)}")
+        if repair and repair["patches_applied"]:
+            generated_code = repair["code"]
+            validation_results, quality_message = validate_generated_code(generated_code)
+            quality_score = validation_results["quality_score"]
+            job.note(
+                "info",
+                f"🩹 Repaired in {repair['rounds']} round(s): {repair['score_before']} → {repair['score_after']}/100 "
+                f"using ~{repair['tokens_used']} tokens (full regeneration ~{repair['full_cost_tokens']})"
+            )
+    
+    if quality_score >= 70:
+        job.note("success", f"✅ Code Quality: {quality_score}/100")
+    else:
+        job.note("warning", f"⚠️ Code Quality: {quality_score}/100 - May need adjustments")
+    
+    job.note("info", quality_message)
+
+    lifecycle = analyze_builders(generated_code)
+    for issue in lifecycle["issues"]:
+        if issue["severity"] == "error":
+            job.note("warning", f"🧹 Line {issue['line']}: {issue['message']}")
+
+    for symbol in check_api(generated_code)["unknown"]:
+        hint = f" - did you mean `{symbol['suggestion']}`?" if symbol["suggestion"] else ""
+        job.note("warning", f"🔎 Line {symbol['line']}: unknown NXOpen symbol `{symbol['symbol']}`{hint}")
+
+    for finding in lint_performance(generated_code)["findings"]:
+        if finding["cost"] != "low":
+            job.note("warning", f"🐢 Line {finding['line']} ({finding['cost']} cost): {finding['message']}")
+
+    dry_run = dry_run_pool.run(generated_code) if dry_run_pool else None
+    if dry_run:
+        job.note("info" if dry_run["ok"] else "warning", f"🧪 Dry run: {format_result(dry_run)}")
+
+    if nearest_code:
+        job.note("info", f"♻️ {format_reuse(diff_lines(nearest_code, generated_code))}")
+
+    similarity_explanation = structured["similarity_analysis"] if structured else None
+    if nearest_name and nearest_code and not similarity_explanation:
+        job.update("🔍 Analyzing similarity...", 0.6)
+        similarity_explanation = generate_similarity_explanation(
+            llm_client, ai_prompt, nearest_name, nearest_code, similarity, cancel_event=cancel_event
+        )
+
+    if structured:
+        explanation = structured["explanation"]
+    else:
+        job.update("🔄 Generating detailed explanation...", 0.75)
+        explanation = get_code_description(llm_client, generated_code, cancel_event=cancel_event)
+
+    job.update("🔍 Detecting shape and parameters...", 0.9)
+    shape_name, params = try_guess_shape_and_params(generated_code, ai_prompt)
+    if structured:
+        shape_name = structured["shape"] or shape_name
+        params = [p["value"] for p in structured["parameters"]] or params
+    
+    if shape_name:
+        job.note("info", f"🔍 Detected shape: {shape_name}")
+        job.note("info", f"📏 Parameters: {', '.join(params)}")
+    else:
+        job.note("warning", "⚠️ Could not detect shape automatically")
+        shape_name = ai_prompt.split()[0] if ai_prompt else "part"
+    
+    fig = render_3d_preview(shape_name, params)
+    
+    job.update("🎨 Generating concept art...", 0.95)
+    img_url = generate_ai_image(huggingface_api_key, shape_name, params)
+
+    generated_data = {
+        "code": generated_code,
+        "params": params,
+        "example_name": f"AI Generated Script (Based on {nearest_name})" if nearest_name else "AI Generated Script",
+        "similarity_explanation": similarity_explanation,
+        "explanation": explanation,
+        "figure": fig,
+        "image_url": img_url,
+        "report": None,
+        "raw_ai_response": raw_ai_response,
+        "closest_example_name": nearest_name,
+        "closest_example_similarity": similarity,
+        "quality_message": quality_message,
+        "quality_score": quality_score,
+        "dry_run": dry_run
+    }
+    job.check_cancelled()
+    if semantic_cache:
+        semantic_cache.store(ai_prompt, {
+            key: generated_data[key]
+            for key in ("code", "example_name", "similarity_explanation", "explanation",
+                        "raw_ai_response", "closest_example_name", "closest_example_similarity")
+        }, time.time() - pipeline_start)
+    job.note("success", f"✅ AI generation completed! Quality Score: {quality_score}/100")
+    return generated_data
+
+
+PREFETCH_LIMIT = 2
+# A prefetched explanation nobody clicked for is dropped after this many seconds
+PREFETCH_TTL = 300
+
+
+def explain_example(job, example_selected, params, raw_code):
+    """Background job: only the explanation of an example, the LLM call the click waits on."""
+    final_code, _ = replace_params_in_code(raw_code, params)
+    job.update("🔄 Generating explanation...", 0.1)
+    return {"code": final_code, "explanation": get_code_description(llm_client, final_code,
+                                                                     cancel_event=job.cancel_event)}
+
+
+def prefetch_example(job_key, example_selected, params):
+    """Start explaining the selected example in the background before it is requested.
+
+    At most PREFETCH_LIMIT prefetches stay in flight per session; older ones (abandoned
+    selections) are cancelled.
+    """
+    raw_code = read_script_auto_encode(os.path.join(EXAMPLES_DIR, example_selected))
+    if not raw_code or not raw_code.strip():
+        return None
+    job = job_manager.submit(job_key, "prefetch", explain_example, example_selected, params, raw_code,
+                             ttl=PREFETCH_TTL)
+    in_flight = [
+        job_id for job_id in st.session_state.get("prefetch_job_ids", [])
+        if job_id != job.id and job_manager.get(job_id) and job_manager.get(job_id).active
+    ]
+    in_flight.append(job.id)
+    for job_id in in_flight[:-PREFETCH_LIMIT]:
+        job_manager.cancel(job_id)
+    st.session_state.prefetch_job_ids = in_flight[-PREFETCH_LIMIT:]
+    return job
+
+
+def cancel_prefetches(keep_id=None):
+    """Cancel and forget every prefetch of this session except the one being used."""
+    for job_id in st.session_state.get("prefetch_job_ids", []):
+        if job_id != keep_id:
+            job_manager.cancel(job_id)
+            job_manager.discard(job_id)
+    st.session_state.prefetch_job_ids = []
 
 
 # --- Streamlit UI ---
@@ -713,45 +1153,43 @@ st.title("🔩 NX CodeBot Pro")
 st.markdown("Generate **production-ready** NXOpen Python code from examples or create new scripts with AI.")
 
 
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+active_job = job_manager.get(st.session_state.get("active_job_id"))
+job_running = bool(active_job and active_job.active)
+
+
 with st.sidebar:
     st.header("⚙️ Controls")
 
     st.markdown("### Generate from Examples")
     example_selected = st.selectbox("Select a CAD Operation:", example_names if example_names else [])
     param_input = st.text_input("Enter Parameters (comma-separated)", "50,80,30")
-
-    if st.button("🚀 Generate from Example") and example_selected:
+    example_params = [p.strip() for p in param_input.split(",") if p.strip()]
+    example_job_key = (st.session_state.session_id, "example", example_selected, tuple(example_params))
+    prefetch_key = (st.session_state.session_id, "explain", example_selected, tuple(example_params))
+
+    # Changing the selection (or the params) starts explaining the example before the click;
+    # the default shown on page load is not a choice, so it is only remembered
+    if "prefetch_key" not in st.session_state:
+        st.session_state.prefetch_key = prefetch_key
+    elif example_selected and not job_running and st.session_state.prefetch_key != prefetch_key:
+        st.session_state.prefetch_key = prefetch_key
+        prefetch_example(prefetch_key, example_selected, example_params)
+
+    if st.button("🚀 Generate from Example", disabled=job_running) and example_selected:
         fpath = os.path.join(EXAMPLES_DIR, example_selected)
         raw_code = read_script_auto_encode(fpath)
         
         if raw_code and len(raw_code.strip()) > 0:
-            params = [p.strip() for p in param_input.split(",") if p.strip()]
-            final_code = replace_params_in_code(raw_code, params)
-
-            with st.spinner("🔄 Generating explanation..."):
-                explanation = get_code_description(groq_client, final_code)
-
-            shape_guess = example_selected.replace(".py", "")
-            fig = render_3d_preview(shape_guess, params)
-            
-            with st.spinner("🎨 Generating concept art..."):
-                img_url = generate_ai_image(huggingface_api_key, shape_guess, params)
-
-            st.session_state.generated_data = {
-                "code": final_code,
-                "params": params,
-                "example_name": example_selected,
-                "explanation": explanation,
-                "similarity_explanation": None,
-                "figure": fig,
-                "image_url": img_url,
-                "report": None,
-                "raw_ai_response": "",
-                "closest_example_name": None,
-                "closest_example_similarity": None,
-                "quality_message": "✅ Example code (pre-validated)"
-            }
-            st.success("✅ Generated from example.")
+            # Takes over the explanation prefetched for this selection, if there is one
+            prefetch = job_manager.find(prefetch_key)
+            active_job = job_manager.submit(
+                example_job_key, "example", run_example_generation, example_selected, example_params, raw_code,
+                prefetch=prefetch
+            )
+            cancel_prefetches(keep_id=prefetch.id if prefetch else None)
+            st.session_state.active_job_id = active_job.id
         else:
             st.error("❌ Failed to load code from example file.")
 
@@ -759,88 +1197,120 @@ with st.sidebar:
 
     st.markdown("### 🤖 AI Code Generator")
     ai_prompt = st.text_area("Enter your request here:", "Create NXOpen python code for a cylinder with radius {param1} and height {param2}", height=140)
+    structured_mode = st.checkbox(
+        "⚡ Single-call structured mode",
+        value=False,
+        help="Ask for code, explanation, parameters and shape in one JSON response; falls back to separate calls if the response is invalid. Generates with llama-3.3-70b-versatile in JSON mode instead of groq/compound."
+    )
+    best_of_n = st.slider(
+        "🎲 Best-of-N candidates",
+        min_value=1,
+        max_value=5,
+        value=1,
+        help=f"When the best example matches below {BEST_OF_N_SIMILARITY:.0%}, generate from the top-N examples in parallel and keep the highest-scoring code (step-by-step path only)."
+    )
 
-    if st.button("✨ Generate from AI") and ai_prompt.strip():
-        with st.spinner("🔍 Finding similar examples..."):
-            if not vectorizer or not example_codes:
-                nearest_name = None
-                nearest_code = None
-                similarity = None
-                st.sidebar.info("No examples available for similarity matching.")
-            else:
-                nearest_name, nearest_code, similarity = find_nearest_example(
-                    ai_prompt, vectorizer, vec_matrix, example_names, example_codes
-                )
-                if nearest_name:
-                    st.sidebar.success(f"✅ Found: {nearest_name} ({similarity*100:.1f}% match)")
-
-        if nearest_name and nearest_code:
-            with st.spinner("✨ Generating production-ready code..."):
-                generated_code, raw_ai_response = generate_code_with_example(
-                    groq_client, ai_prompt, nearest_code, nearest_name
-                )
-        else:
-            with st.spinner("✨ Generating code from scratch..."):
-                generated_code, raw_ai_response = generate_code_from_prompt(groq_client, ai_prompt)
-
-        if not generated_code or len(generated_code.strip()) < 50:
-            st.error(f"❌ AI generation failed or returned invalid code.")
-            with st.expander("🔍 Debug: View Raw Response"):
-                st.code(raw_ai_response, language="text")
-            st.stop()
+    ai_clicked = st.button("✨ Generate from AI", disabled=job_running) and ai_prompt.strip()
+    cache_hit = semantic_cache.lookup(ai_prompt) if ai_clicked and semantic_cache else None
 
-        # Validate generated code
-        validation_results, quality_message = validate_generated_code(generated_code)
+    if cache_hit:
+        cached = cache_hit["result"]
+        validation_results, quality_message = validate_generated_code(cached["code"])
         quality_score = validation_results["quality_score"]
-        
-        if quality_score >= 70:
-            st.sidebar.success(f"✅ Code Quality: {quality_score}/100")
-        else:
-            st.sidebar.warning(f"⚠️ Code Quality: {quality_score}/100 - May need adjustments")
-        
-        st.sidebar.info(quality_message)
-
-        similarity_explanation = None
-        if nearest_name and nearest_code:
-            with st.spinner("🔍 Analyzing similarity..."):
-                similarity_explanation = generate_similarity_explanation(
-                    groq_client, ai_prompt, nearest_name, nearest_code, similarity
-                )
-
-        with st.spinner("🔄 Generating detailed explanation..."):
-            explanation = get_code_description(groq_client, generated_code)
-
-        with st.spinner("🔍 Detecting shape and parameters..."):
-            shape_name, params = try_guess_shape_and_params(generated_code, ai_prompt)
-            
-            if shape_name:
-                st.sidebar.info(f"🔍 Detected shape: {shape_name}")
-                st.sidebar.info(f"📏 Parameters: {', '.join(params)}")
-            else:
-                st.sidebar.warning("⚠️ Could not detect shape automatically")
-                shape_name = ai_prompt.split()[0] if ai_prompt else "part"
-        
+        shape_name, params = try_guess_shape_and_params(cached["code"], ai_prompt)
+        if not shape_name:
+            shape_name = ai_prompt.split()[0] if ai_prompt else "part"
         fig = render_3d_preview(shape_name, params)
-        
-        with st.spinner("🎨 Generating concept art..."):
-            img_url = generate_ai_image(huggingface_api_key, shape_name, params)
+        img_url = generate_ai_image(huggingface_api_key, shape_name, params)
 
         st.session_state.generated_data = {
-            "code": generated_code,
+            **cached,
             "params": params,
-            "example_name": f"AI Generated Script (Based on {nearest_name})" if nearest_name else "AI Generated Script",
-            "similarity_explanation": similarity_explanation,
-            "explanation": explanation,
             "figure": fig,
             "image_url": img_url,
             "report": None,
-            "raw_ai_response": raw_ai_response,
-            "closest_example_name": nearest_name,
-            "closest_example_similarity": similarity,
             "quality_message": quality_message,
             "quality_score": quality_score
         }
-        st.success(f"✅ AI generation completed! Quality Score: {quality_score}/100")
+        st.sidebar.info(f"♻️ Reused generation for: \"{cache_hit['source_prompt']}\" ({cache_hit['similarity']*100:.1f}% similar)")
+        st.success(f"✅ Served from semantic cache in place of a new AI call (saved ~{cache_hit['saved_seconds']:.1f}s). Quality Score: {quality_score}/100")
+
+    elif ai_clicked:
+        active_job = job_manager.submit(
+            (st.session_state.session_id, "ai", ai_prompt, structured_mode, best_of_n),
+            "ai", run_ai_generation, ai_prompt, structured_mode, best_of_n
+        )
+        st.session_state.active_job_id = active_job.id
+
+    # Attach to the session's job: show progress while it runs, apply its result once
+    poll_job = False
+    if active_job and active_job.active:
+        snapshot = active_job.snapshot()
+        st.progress(snapshot["fraction"], text=f"{snapshot['step']} ({snapshot['elapsed']:.0f}s)")
+        if st.button("🛑 Cancel generation"):
+            active_job.cancel()
+            st.session_state.active_job_id = None
+            st.warning("🛑 Generation cancelled.")
+        else:
+            poll_job = True
+    elif active_job:
+        st.session_state.active_job_id = None
+        job_manager.discard(active_job.id)
+        for level, message in active_job.notes:
+            getattr(st, level)(message)
+        if active_job.status == "failed":
+            st.error(f"❌ Generation failed: {active_job.error}")
+        elif active_job.status == "done" and active_job.result.get("error"):
+            st.error(active_job.result["error"])
+            with st.expander("🔍 Debug: View Raw Response"):
+                st.code(active_job.result["raw_ai_response"], language="text")
+        elif active_job.status == "done":
+            st.session_state.generated_data = active_job.result
+
+    if semantic_cache and semantic_cache.stats["lookups"]:
+        st.caption(
+            f"♻️ Semantic cache: {semantic_cache.hit_rate*100:.0f}% hit rate over "
+            f"{semantic_cache.stats['lookups']} requests, ~{semantic_cache.stats['saved_seconds']:.0f}s saved"
+        )
+
+    if llm_client.telemetry.records:
+        with st.expander("📈 LLM Diagnostics"):
+            aggregates = llm_client.telemetry.aggregates()
+            st.dataframe([
+                {
+                    "task": task,
+                    "calls": agg["calls"],
+                    "errors": agg["errors"],
+                    "p50 latency (s)": round(agg["latency_p50"] or 0, 2),
+                    "p95 latency (s)": round(agg["latency_p95"] or 0, 2),
+                    "p50 TTFT (s)": round(agg["ttft_p50"] or 0, 2),
+                    "tokens/request": round((agg["prompt_tokens_per_request"] or 0) + (agg["completion_tokens_per_request"] or 0)),
+                    "tokens/s": round(agg["tokens_per_second"] or 0),
+                    "cost ($)": round(agg["cost_total"], 4),
+                    "early stops": agg["early_stops"],
+                    "saved tokens": agg["saved_tokens_total"],
+                    "saved (s)": round(agg["saved_seconds_total"], 1)
+                }
+                for task, agg in aggregates.items()
+            ], use_container_width=True)
+            st.caption(
+                f"Client: {llm_client.stats['calls']} calls, {llm_client.stats['retries']} retries, "
+                f"{llm_client.stats['rate_limited']} rate-limited, {llm_client.stats['hedged']} hedged, "
+                f"{llm_client.stats['early_stops']} early stops (~{llm_client.stats['saved_tokens']} tokens, "
+                f"~{llm_client.stats['saved_seconds']:.1f}s saved)"
+            )
+            st.caption(
+                f"Repairs: {code_repairer.stats['repaired']}/{code_repairer.stats['attempts']} succeeded in "
+                f"{code_repairer.stats['rounds']} rounds, ~{code_repairer.stats['tokens_used']} tokens used, "
+                f"~{code_repairer.stats['tokens_saved']} saved vs. regenerating"
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button("JSON", llm_client.telemetry.to_json(include_records=True),
+                                   "nx_codebot_telemetry.json", "application/json")
+            with col2:
+                st.download_button("Prometheus", llm_client.telemetry.to_prometheus(),
+                                   "nx_codebot_metrics.prom", "text/plain")
 
     if st.session_state.generated_data.get("code"):
         st.markdown("---")
@@ -888,17 +1358,71 @@ if st.session_state.generated_data.get("code"):
         # Show code quality checklist
         if data.get("quality_score"):
             with st.expander("🔍 Code Quality Checklist"):
+                summary = summarize_code(data["code"])
+                checks = quality_checks(summary)
+                if not summary["parsed"]:
+                    st.warning(f"⚠️ Code does not parse ({summary['syntax_error']}); checks are approximate")
                 col1, col2 = st.columns(2)
-                with col1:
-                    st.write("✅ Has imports" if "import" in data["code"].lower() else "❌ Missing imports")
-                    st.write("✅ Has main function" if "def main" in data["code"].lower() else "❌ Missing main function")
-                    st.write("✅ Has session management" if "getsession" in data["code"].lower() else "❌ Missing session")
-                with col2:
-                    st.write("✅ Uses builders" if "builder" in data["code"].lower() else "❌ No builders found")
-                    st.write("✅ Has commit" if ".commit()" in data["code"].lower() else "❌ Missing commit")
-                    st.write("✅ Has destroy" if ".destroy()" in data["code"].lower() else "❌ Missing destroy")
+                for i, (check, (passed_label, failed_label)) in enumerate(CHECK_LABELS.items()):
+                    with (col1 if i < 4 else col2):
+                        st.write(f"✅ {passed_label}" if checks[check] else f"❌ {failed_label}")
+                lifecycle = analyze_builders(data["code"])
+                if lifecycle["builders"]:
+                    st.markdown("**Builder lifecycle**")
+                    for issue in lifecycle["issues"]:
+                        icon = {"error": "❌", "warning": "⚠️"}.get(issue["severity"], "ℹ️")
+                        st.write(f"{icon} Line {issue['line']}: {issue['message']}")
+                    if not lifecycle["issues"]:
+                        st.write(f"✅ All {len(lifecycle['builders'])} builder(s) committed and destroyed on every path")
+                api = check_api(data["code"])
+                if api["parsed"]:
+                    st.markdown("**NXOpen API symbols**")
+                    for symbol in api["unknown"]:
+                        hint = f" - did you mean `{symbol['suggestion']}`?" if symbol["suggestion"] else ""
+                        st.write(f"❌ Line {symbol['line']}: `{symbol['symbol']}` not found in the examples{hint}")
+                    if not api["unknown"]:
+                        st.write(f"✅ {api['chains']} NXOpen call chain(s) known from the examples")
+                perf = lint_performance(data["code"])
+                if perf["parsed"]:
+                    st.markdown("**Performance**")
+                    for finding in perf["findings"]:
+                        icon = {"high": "🔴", "medium": "🟠"}.get(finding["cost"], "🟡")
+                        st.write(f"{icon} Line {finding['line']} ({finding['cost']} cost): {finding['message']}")
+                        st.caption(f"💡 {finding['suggestion']}")
+                    if not perf["findings"]:
+                        st.write("✅ No expensive NXOpen calls inside loops")
+                dry_run = data.get("dry_run")
+                if dry_run:
+                    st.markdown("**Dry run (mock NXOpen)**")
+                    st.write(("✅ " if dry_run["ok"] else "❌ ") + format_result(dry_run))
+                    if dry_run["top_calls"]:
+                        st.caption("Most frequent calls: " + ", ".join(
+                            f"`{path}` ×{count}" for path, count in dry_run["top_calls"][:5]))
         
         st.code(data["code"], language="python")
+
+        reference, diff = reference_diff(data)
+        if diff and diff["added"] + diff["removed"]:
+            with st.expander(f"🔀 Changes vs. {data['closest_example_name']} ({diff['reuse_ratio']:.0%} reused)"):
+                left, right = side_by_side(reference, data["code"], diff)
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.caption(f"Reference example ({diff['reference_lines']} lines)")
+                    st.code("\n".join(left), language="diff")
+                with col2:
+                    st.caption(f"Generated code ({diff['generated_lines']} lines)")
+                    st.code("\n".join(right), language="diff")
+
+        rewrite = rewrite_batching(data["code"])
+        if rewrite["changes"]:
+            with st.expander(f"⚡ Batching Rewrite ({len(rewrite['changes'])} change(s))"):
+                for change in rewrite["changes"]:
+                    st.write(f"• {change['description']}: `{change['statement']}`")
+                st.code(rewrite["diff"], language="diff")
+                if st.button("Apply rewrite"):
+                    st.session_state.generated_data["code"] = rewrite["code"]
+                    st.session_state.generated_data["report"] = None
+                    st.rerun()
         
         st.download_button(
             label="💾 Download Python Script",
@@ -935,6 +1459,12 @@ if st.session_state.generated_data.get("code"):
             **Relevance:** {'High' if similarity_pct > 50 else 'Moderate'}  
             **Code Quality:** {data.get('quality_score', 'N/A')}/100
             """)
+
+            _, diff = reference_diff(data)
+            if diff:
+                st.metric(label="Line Reuse", value=f"{diff['reuse_ratio']:.0%}",
+                          delta=f"+{diff['added']} / -{diff['removed']} lines", delta_color="off")
+                st.caption(format_reuse(diff))
         else:
             st.info("No similarity matching was performed (generated from scratch).")
 
@@ -972,3 +1502,8 @@ if st.session_state.generated_data.get("code"):
         st.code(data.get("raw_ai_response", "No raw output available"), language="text")
 else:
     st.info("⬅️ Select an example or enter a prompt to generate **production-ready** NXOpen Python code.")
+
+
+if poll_job:
+    time.sleep(0.5)
+    st.rerun()
@@ -0,0 +1,240 @@
+"""NXOpen API existence checks against a symbol table mined from the example corpus.
+
+    python -m bot_core.api_symbols build nx_examples     # rebuild bot_core/nxopen_symbols.json
+    python -m bot_core.api_symbols check script.py       # report unknown NXOpen symbols
+"""
+import argparse
+import ast
+import difflib
+import json
+import os
+import re
+import threading
+import time
+
+from bot_core.code_analysis import ast_nodes, cached_analysis, parse_code, read_source
+
+SYMBOLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nxopen_symbols.json")
+SOURCE_EXTENSIONS = (".py", ".vb", ".cs")
+
+# Roots every chain is resolved to; journal-style names are predefined aliases
+DEFAULT_ALIASES = {
+    "NXOpen": "NXOpen",
+    "theSession": "theSession",
+    "workPart": "theSession.Parts.Work",
+    "displayPart": "theSession.Parts.Display",
+}
+GET_SESSION_RE = re.compile(r"(?:\bNXOpen\s*\.\s*)?\bSession\s*\.\s*GetSession\s*\(\s*\)")
+ALIAS_RE = re.compile(r"\b([A-Za-z_]\w*)\s*(?:As\s+[\w.]+\s*)?=\s*([A-Za-z_][\w.]*)\s*(?=;|'|#|\r?$)", re.MULTILINE)
+# Chains may continue on the next line (`workPart.Features\n    .CreateShellBuilder(...)`)
+CHAIN_RE = re.compile(r"(?<![\w.])([A-Za-z_]\w*(?:\s*\.[A-Za-z_]\w*)+)")
+
+
+def _resolve(chain, aliases):
+    head, _, rest = chain.partition(".")
+    base = aliases.get(head)
+    if base is None:
+        return None
+    return f"{base}.{rest}" if rest else base
+
+
+def mine_source(text):
+    """Resolved NXOpen chains and every member name used in one script (any language)."""
+    chains = set()
+    if GET_SESSION_RE.search(text):
+        chains.add("NXOpen.Session.GetSession")
+    text = GET_SESSION_RE.sub("theSession", text)
+    aliases = dict(DEFAULT_ALIASES)
+    for match in ALIAS_RE.finditer(text):
+        resolved = _resolve(match.group(2), aliases)
+        if resolved and match.group(1) not in ("NXOpen",):
+            aliases[match.group(1)] = resolved
+    members = set()
+    for match in CHAIN_RE.finditer(text):
+        chain = re.sub(r"\s+", "", match.group(1))
+        members.update(chain.split(".")[1:])
+        resolved = _resolve(chain, aliases)
+        if resolved:
+            chains.add(resolved)
+    return chains, members
+
+
+def build_symbol_table(corpus_dir):
+    """Mine every .py/.vb/.cs script under corpus_dir into a nested trie plus a member list."""
+    trie = {}
+    members = set()
+    sources = 0
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith(SOURCE_EXTENSIONS):
+            continue
+        chains, names = mine_source(read_source(os.path.join(corpus_dir, name)))
+        sources += 1
+        members |= names
+        for chain in chains:
+            node = trie
+            for part in chain.split("."):
+                node = node.setdefault(part, {})
+    return {"version": 1, "sources": sources, "trie": trie, "members": sorted(members)}
+
+
+class SymbolTable:
+    """Frozen view of the mined table: known chain prefixes, trie children and all member names."""
+
+    def __init__(self, data):
+        self.sources = data.get("sources", 0)
+        self.members = frozenset(data["members"])
+        chains = set()
+        children = {}
+        stack = [("", data["trie"])]
+        while stack:
+            prefix, node = stack.pop()
+            if prefix:
+                children[prefix] = frozenset(node)
+            for part, child in node.items():
+                chain = f"{prefix}.{part}" if prefix else part
+                chains.add(chain)
+                stack.append((chain, child))
+        self.chains = frozenset(chains)
+        self.children = children
+
+    def suggest(self, parent, name):
+        """Nearest known member name: siblings under the parent chain first, then any similar member."""
+        candidates = self.children.get(parent)
+        if candidates:
+            match = difflib.get_close_matches(name, candidates, n=1, cutoff=0.6)
+            if match:
+                return match[0]
+        pool = [m for m in self.members if m[:1].lower() == name[:1].lower() and abs(len(m) - len(name)) <= 3]
+        match = difflib.get_close_matches(name, pool, n=1, cutoff=0.75)
+        return match[0] if match else None
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def load_symbol_table(path=SYMBOLS_PATH):
+    global _table
+    with _table_lock:
+        if _table is None:
+            with open(path, "r", encoding="utf-8") as f:
+                _table = SymbolTable(json.load(f))
+        return _table
+
+
+def _chain_of(node):
+    """(base name, [attributes]) for an attribute chain; NXOpen.Session.GetSession() counts as theSession."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Call):
+        inner = _chain_of(node.func)
+        if inner and inner[0] == "NXOpen" and inner[1] == ["Session", "GetSession"]:
+            return "theSession", parts[::-1]
+        return None
+    if isinstance(node, ast.Name):
+        return node.id, parts[::-1]
+    return None
+
+
+def _check(code, table):
+    try:
+        tree = parse_code(code)
+    except (SyntaxError, ValueError) as e:
+        return {"parsed": False, "error": str(e), "chains": 0, "unknown": [], "unverified": 0}
+
+    nodes = ast_nodes(tree)
+    attributes = [node for node in nodes if isinstance(node, ast.Attribute)]
+    inner = {id(node.value) for node in attributes if isinstance(node.value, ast.Attribute)}
+
+    aliases = dict(DEFAULT_ALIASES)
+    assignments = sorted((node for node in nodes if isinstance(node, ast.Assign)), key=lambda n: n.lineno)
+    for node in assignments:
+        chain = _chain_of(node.value) if isinstance(node.value, (ast.Attribute, ast.Call, ast.Name)) else None
+        if not chain or chain[0] not in aliases:
+            continue
+        resolved = _resolve(".".join([chain[0]] + chain[1]), aliases)
+        for target in node.targets:
+            if isinstance(target, ast.Name) and target.id != "NXOpen":
+                aliases[target.id] = resolved
+
+    unknown = []
+    unverified = checked = 0
+    seen = set()
+    for node in attributes:
+        if id(node) in inner:
+            continue
+        chain = _chain_of(node)
+        if not chain or chain[0] not in aliases:
+            continue
+        base, parts = chain
+        key = (base, tuple(parts))
+        if key in seen:
+            continue
+        seen.add(key)
+        checked += 1
+        prefix = aliases[base]
+        for i, part in enumerate(parts):
+            candidate = f"{prefix}.{part}"
+            if candidate in table.chains:
+                prefix = candidate
+                continue
+            if part in table.members:
+                # A real member name on a path the corpus never used: cannot be confirmed either way
+                unverified += 1
+            else:
+                suggestion = table.suggest(prefix, part)
+                unknown.append({
+                    "line": node.lineno,
+                    "symbol": ".".join([base] + parts[:i + 1]),
+                    "resolved": candidate,
+                    "suggestion": ".".join([base] + parts[:i] + [suggestion]) if suggestion else None,
+                })
+            break
+    return {"parsed": True, "error": None, "chains": checked, "unknown": unknown, "unverified": unverified}
+
+
+def check_api(code, table=None):
+    """Unknown NXOpen symbols in the code with line numbers and nearest known suggestions (cached)."""
+    table = table or load_symbol_table()
+    return cached_analysis("api", code, lambda source: _check(source, table))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the NXOpen symbol table.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="Mine the example corpus into the symbol table")
+    build_parser.add_argument("corpus", nargs="?", default="nx_examples")
+    build_parser.add_argument("-o", "--output", default=SYMBOLS_PATH)
+    check_parser = sub.add_parser("check", help="Report unknown NXOpen symbols in scripts")
+    check_parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        data = build_symbol_table(args.corpus)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"), sort_keys=True)
+        table = SymbolTable(data)
+        print(f"{data['sources']} sources -> {len(table.chains)} chains, {len(table.members)} members: {args.output}")
+        return
+
+    table = load_symbol_table()
+    unknown_total = 0
+    for path in args.paths:
+        start = time.perf_counter()
+        result = _check(read_source(path), table)
+        elapsed = (time.perf_counter() - start) * 1000
+        if not result["parsed"]:
+            print(f"{path}: could not parse ({result['error']})")
+        for item in result["unknown"]:
+            hint = f" (did you mean {item['suggestion']}?)" if item["suggestion"] else ""
+            print(f"{path}:{item['line']}: unknown symbol {item['symbol']}{hint}")
+        unknown_total += len(result["unknown"])
+        print(f"{path}: {result['chains']} chains checked, {len(result['unknown'])} unknown, "
+              f"{result['unverified']} unverified in {elapsed:.2f} ms")
+    raise SystemExit(1 if unknown_total else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Safe batching rewrites for NXOpen journals, returned as a reviewable unified diff.
+
+    python -m bot_core.batch_rewriter nx_examples        # print the diff for every script it would change
+
+Rewrites (each only when the moved statement does not depend on anything the loop assigns):
+- hoist `x = ...GetSession()` and `x = ....Parts.Work` out of loops, unless the loop also calls
+  a method on the same receiver (e.g. `theSession.Parts.SetWork(part)`) or x is read after the
+  loop (a loop that runs zero times would leave it bound);
+- move a per-iteration `SetUndoMark` in front of the loop, so the batch undoes as one step, unless
+  the loop uses the mark for anything but a trailing `DoUpdate` (`UndoToMark`, `DeleteUndoMark`, ...
+  would then act on the whole batch);
+- defer a per-iteration `UpdateManager.DoUpdate(...)` to a single call after the loop.
+"""
+import argparse
+import ast
+import difflib
+import os
+
+from bot_core.code_analysis import cached_analysis, parse_code, read_source
+
+MAX_PASSES = 50
+HOISTS = ("hoist_session", "hoist_work_part")
+# Calls that change what `Parts.Work` returns, whatever name the Parts collection is reached by
+WORK_PART_SETTERS = {"SetWork", "SetWorkComponent", "SetDisplay", "SetActiveDisplay", "SetWorkComponentFrom"}
+
+
+def _names_read(node):
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)}
+
+
+def _names_assigned(nodes):
+    names = set()
+    for node in nodes:
+        for n in ast.walk(node):
+            if isinstance(n, ast.Name) and isinstance(n.ctx, (ast.Store, ast.Del)):
+                names.add(n.id)
+            elif isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                names.add(n.name)
+    return names
+
+
+def _dotted(node):
+    """`a.b.c` for a chain of attributes on a name, else None."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    return ".".join([node.id] + parts[::-1])
+
+
+def _receiver(value):
+    """Dotted receiver of the hoisted expression: `theSession.Parts` for `theSession.Parts.Work`."""
+    return _dotted(value.func.value if isinstance(value, ast.Call) else value.value)
+
+
+def _mutates_receiver(kind, value, others):
+    """True when another statement in the loop calls a method on the hoisted expression's receiver."""
+    receiver = _receiver(value)
+    for node in others:
+        for n in ast.walk(node):
+            if not isinstance(n, ast.Call) or not isinstance(n.func, ast.Attribute):
+                continue
+            if receiver and _dotted(n.func.value) == receiver:
+                return True
+            if kind == "hoist_work_part" and n.func.attr in WORK_PART_SETTERS:
+                return True
+    return False
+
+
+def _read_after(tree, loop, name):
+    """True when name is read after the loop in the function (or module) that contains it."""
+    scope = tree
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) \
+                and node.lineno <= loop.lineno and node.end_lineno >= loop.end_lineno \
+                and (scope is tree or node.lineno >= scope.lineno):
+            scope = node
+    return any(isinstance(n, ast.Name) and n.id == name and isinstance(n.ctx, ast.Load)
+               and n.lineno > loop.end_lineno for n in ast.walk(scope))
+
+
+def _call_of(stmt):
+    """(call, assigned name or None) for `call(...)` and `name = call(...)` statements."""
+    if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+        return stmt.value, None
+    if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+        return stmt.value, stmt.targets[0].id
+    return None, None
+
+
+def _classify(stmt):
+    """Which rewrite a loop-body statement qualifies for, if any."""
+    value, target = _call_of(stmt)
+    if value is None:
+        return None
+    if target and isinstance(value, ast.Call) and isinstance(value.func, ast.Attribute) \
+            and value.func.attr == "GetSession":
+        return "hoist_session"
+    if target and isinstance(value, ast.Attribute) and value.attr == "Work" \
+            and isinstance(value.value, ast.Attribute) and value.value.attr == "Parts":
+        return "hoist_work_part"
+    if isinstance(value, ast.Call) and isinstance(value.func, ast.Attribute):
+        if value.func.attr == "SetUndoMark":
+            return "hoist_undo_mark"
+        if value.func.attr == "DoUpdate" and isinstance(value.func.value, ast.Attribute) \
+                and value.func.value.attr == "UpdateManager":
+            return "defer_update"
+    return None
+
+
+DESCRIPTIONS = {
+    "hoist_session": "hoisted GetSession() out of the loop",
+    "hoist_work_part": "hoisted the Parts.Work lookup out of the loop",
+    "hoist_undo_mark": "set one undo mark before the loop instead of one per iteration",
+    "defer_update": "deferred DoUpdate to a single call after the loop",
+}
+
+
+def _loops(tree):
+    """Loops with an indented block body, innermost last so outer loops are tried first."""
+    return [n for n in ast.walk(tree)
+            if isinstance(n, (ast.For, ast.While)) and n.body and n.body[0].lineno > n.lineno]
+
+
+def _find_edit(tree):
+    for loop in _loops(tree):
+        loop_assigned = _names_assigned([loop.target] if isinstance(loop, ast.For) else [])
+        loop_assigned |= _names_assigned(loop.body)
+        has_break = any(isinstance(n, ast.Break) for n in ast.walk(loop))
+        for stmt in loop.body:
+            kind = _classify(stmt)
+            if kind is None or len(loop.body) == 1:
+                continue
+            _, target = _call_of(stmt)
+            others = [s for s in loop.body if s is not stmt]
+            # The moved statement must not read anything the loop changes
+            if _names_read(stmt) & loop_assigned:
+                continue
+            if target and target in _names_assigned(others):
+                continue
+            if kind in HOISTS and (_mutates_receiver(kind, stmt.value, others) or _read_after(tree, loop, target)):
+                continue
+            if kind == "hoist_undo_mark" and target and any(
+                    target in _names_read(s) and not (s is loop.body[-1] and _classify(s) == "defer_update")
+                    for s in others):
+                continue
+            if kind == "defer_update":
+                # Only a trailing update is deferred: nothing later in the iteration reads the model
+                if stmt is not loop.body[-1] or has_break or (target and any(target in _names_read(s) for s in others)):
+                    continue
+            return kind, loop, stmt
+    return None
+
+
+def _reindent(lines, from_col, to_col):
+    shift = from_col - to_col
+    return [line[shift:] if not line[:shift].strip() else line for line in lines]
+
+
+def _apply(lines, kind, loop, stmt):
+    moved = lines[stmt.lineno - 1:stmt.end_lineno]
+    moved = _reindent(moved, stmt.col_offset, loop.col_offset)
+    del lines[stmt.lineno - 1:stmt.end_lineno]
+    if kind == "defer_update":
+        # The loop ends earlier now that the statement is gone
+        end = loop.end_lineno - (stmt.end_lineno - stmt.lineno + 1)
+        lines[end:end] = moved
+    else:
+        lines[loop.lineno - 1:loop.lineno - 1] = moved
+
+
+def _rewrite(code):
+    try:
+        tree = parse_code(code)
+    except (SyntaxError, ValueError) as e:
+        return {"parsed": False, "error": str(e), "code": code, "changes": [], "diff": ""}
+    text = code.lstrip("\ufeff")
+    newline = "\r\n" if "\r\n" in text else "\n"
+    lines = text.replace("\r\n", "\n").split("\n")
+    changes = []
+    for _ in range(MAX_PASSES):
+        edit = _find_edit(tree)
+        if edit is None:
+            break
+        kind, loop, stmt = edit
+        statement = lines[stmt.lineno - 1].strip()
+        _apply(lines, kind, loop, stmt)
+        # A statement hoisted out of nested loops one level per pass is reported once
+        if not any(c["kind"] == kind and c["statement"] == statement for c in changes):
+            changes.append({"kind": kind, "statement": statement, "description": DESCRIPTIONS[kind]})
+        try:
+            tree = parse_code("\n".join(lines))
+        except (SyntaxError, ValueError):
+            # Never hand back code that does not parse
+            return {"parsed": True, "error": "rewrite produced invalid code", "code": code, "changes": [],
+                    "diff": ""}
+    rewritten = newline.join(lines)
+    return {
+        "parsed": True,
+        "error": None,
+        "code": rewritten if changes else code,
+        "changes": changes,
+        "diff": unified_diff(text, rewritten) if changes else "",
+    }
+
+
+def rewrite_batching(code):
+    """Apply the safe batching rewrites; returns the new code, the list of changes and a unified diff."""
+    return cached_analysis("batch_rewrite", code, _rewrite)
+
+
+def unified_diff(before, after, name="script.py"):
+    return "".join(difflib.unified_diff(
+        before.replace("\r\n", "\n").splitlines(True), after.replace("\r\n", "\n").splitlines(True),
+        fromfile=f"a/{name}", tofile=f"b/{name}",
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the batching rewrites for NXOpen scripts.")
+    parser.add_argument("paths", nargs="+", help="Python scripts or directories of scripts")
+    args = parser.parse_args()
+
+    changed = 0
+    for path in args.paths:
+        files = [os.path.join(path, n) for n in sorted(os.listdir(path)) if n.endswith(".py")] \
+            if os.path.isdir(path) else [path]
+        for script in files:
+            result = _rewrite(read_source(script))
+            if result["changes"]:
+                changed += 1
+                print(unified_diff(read_source(script).lstrip("\ufeff"), result["code"], os.path.basename(script)))
+    print(f"{changed} scripts would change")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""Builder lifecycle analysis: every Create*Builder result must be committed and destroyed.
+
+    python -m bot_core.builder_lifecycle nx_examples            # report leaks in the corpus
+    python -m bot_core.builder_lifecycle generated_script.py
+"""
+import argparse
+import ast
+import os
+import re
+import time
+
+from bot_core.code_analysis import BUILDER_FACTORY_RE, COMMIT_METHODS, cached_analysis, parse_code, read_source
+
+NEW = (False, False)
+LIFECYCLE_CALL_RE = re.compile(r"\.\s*(?:Destroy|Commit\w*)\s*\(")
+
+
+class _State:
+    """Abstract state on one set of paths: variable -> builder ids, builder id -> {(committed, destroyed)}."""
+
+    def __init__(self, env=None, status=None):
+        self.env = dict(env or {})
+        self.status = dict(status or {})
+
+    def copy(self):
+        return _State(self.env, self.status)
+
+
+def _join(*states):
+    states = [s for s in states if s is not None]
+    if not states:
+        return None
+    joined = states[0].copy()
+    for state in states[1:]:
+        for var, ids in state.env.items():
+            joined.env[var] = joined.env.get(var, frozenset()) | ids
+        for builder_id, facts in state.status.items():
+            joined.status[builder_id] = joined.status.get(builder_id, frozenset()) | facts
+    return joined
+
+
+def _function_defs(body):
+    """Function definitions at any statement depth (methods and nested functions included)."""
+    for stmt in body:
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield stmt
+        for field in ("body", "orelse", "finalbody"):
+            yield from _function_defs(getattr(stmt, field, None) or [])
+        for handler in getattr(stmt, "handlers", None) or []:
+            yield from _function_defs(handler.body)
+
+
+def _calls_in(node):
+    """Calls inside a statement or expression, without descending into nested scopes."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(current, ast.Call):
+            yield current
+        stack.extend(ast.iter_child_nodes(current))
+
+
+class _Context:
+    def __init__(self, finally_stack=(), loop_exits=None, handled=False, loop_continues=None, loop_finally=0):
+        self.finally_stack = list(finally_stack)
+        self.loop_exits = loop_exits
+        self.loop_continues = loop_continues
+        # finally blocks from this index on are inside the innermost loop; break/continue run them
+        self.loop_finally = loop_finally
+        self.handled = handled
+
+    def inner(self, finally_stack=None, handled=None):
+        return _Context(self.finally_stack if finally_stack is None else finally_stack, self.loop_exits,
+                        self.handled if handled is None else handled, self.loop_continues, self.loop_finally)
+
+
+class _FunctionAnalysis:
+    """Path-sensitive walk of one function (or module) body."""
+
+    def __init__(self, scope, report, lines):
+        self.scope = scope
+        self.report = report
+        self.lines = lines
+        self.escaped = set()
+
+    def run(self, body):
+        end = self.block(body, _State(), _Context())
+        if end is not None:
+            last = body[-1] if body else None
+            self.exit(end, getattr(last, "end_lineno", None) or getattr(last, "lineno", 0), "end of scope")
+
+    # --- effects -------------------------------------------------------------------------------
+    def apply_calls(self, node, state, in_finally=False):
+        if not state.env:
+            return
+        # Cheap text check first: most statements never touch a builder's lifecycle
+        source = self.lines[node.lineno - 1:getattr(node, "end_lineno", None) or node.lineno]
+        if not any(LIFECYCLE_CALL_RE.search(line) for line in source):
+            return
+        for call in _calls_in(node):
+            func = call.func
+            if not isinstance(func, ast.Attribute) or not isinstance(func.value, ast.Name):
+                continue
+            for builder_id in state.env.get(func.value.id, ()):
+                facts = state.status.get(builder_id, frozenset())
+                if func.attr in COMMIT_METHODS:
+                    state.status[builder_id] = frozenset((True, d) for _, d in facts)
+                    self.report.builders[builder_id]["commit_lines"].add(call.lineno)
+                elif func.attr == "Destroy":
+                    state.status[builder_id] = frozenset((c, True) for c, _ in facts)
+                    self.report.builders[builder_id]["destroy_lines"].add(call.lineno)
+                    if in_finally:
+                        self.report.builders[builder_id]["in_finally"] = True
+                    self.settle(builder_id, state)
+
+    def settle(self, builder_id, state):
+        """Drop a builder destroyed on every path so far; it cannot change any more.
+
+        Keeping only live builders in the state keeps joins cheap on long scripts.
+        """
+        self.report.builders[builder_id]["settled"] |= state.status.pop(builder_id)
+        for var in [name for name, ids in state.env.items() if builder_id in ids]:
+            remaining = state.env[var] - {builder_id}
+            if remaining:
+                state.env[var] = remaining
+            else:
+                del state.env[var]
+
+    def bind(self, var, ids, state, line):
+        previous = state.env.get(var, frozenset()) - ids
+        for builder_id in previous:
+            still_referenced = any(builder_id in other for name, other in state.env.items() if name != var)
+            if not still_referenced and any(not d for _, d in state.status.get(builder_id, ())):
+                self.report.issue(line, "error",
+                                  f"'{var}' is reassigned before builder from line "
+                                  f"{self.report.builders[builder_id]['line']} is destroyed")
+                state.status[builder_id] = frozenset((c, True) for c, _ in state.status[builder_id])
+                self.settle(builder_id, state)
+        if ids:
+            state.env[var] = ids
+        else:
+            state.env.pop(var, None)
+
+    def assign(self, node, state, in_finally):
+        self.apply_calls(node.value, state, in_finally)
+        value = node.value
+        ids = frozenset()
+        names = [t.id for t in node.targets if isinstance(t, ast.Name)]
+        if isinstance(value, ast.Call) and names:
+            # Builders stored only on attributes (self.builder = ...) belong to the object and are not tracked
+            factory = value.func.attr if isinstance(value.func, ast.Attribute) else getattr(value.func, "id", None)
+            if factory and BUILDER_FACTORY_RE.match(factory):
+                builder_id = self.report.new_builder(self.scope, factory, node.lineno, node.targets)
+                if any(not d for _, d in state.status.get(builder_id, ())):
+                    # Only reachable on the second pass over a loop body
+                    self.report.issue(node.lineno, "error",
+                                      f"Builder '{names[0]}' ({factory}, line {node.lineno}) is created again on "
+                                      f"the next loop iteration before the previous one is destroyed")
+                    self.report.builders[builder_id]["leaks_per_iteration"] = True
+                    state.status[builder_id] = frozenset((c, True) for c, _ in state.status[builder_id])
+                    self.settle(builder_id, state)
+                ids = frozenset([builder_id])
+                state.status[builder_id] = frozenset([NEW])
+        elif isinstance(value, ast.Name):
+            ids = state.env.get(value.id, frozenset())
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self.bind(target.id, ids, state, node.lineno)
+
+    def exit(self, state, line, how):
+        for builder_id, facts in state.status.items():
+            if builder_id in self.escaped:
+                continue
+            self.report.builders[builder_id]["exits"].append((line, how, facts))
+
+    # --- control flow --------------------------------------------------------------------------
+    def run_finally(self, state, ctx, start=0):
+        for finalbody in reversed(ctx.finally_stack[start:]):
+            if state is None:
+                break
+            state = self.block(finalbody, state, _Context(handled=ctx.handled), in_finally=True)
+        return state
+
+    def block(self, body, state, ctx, in_finally=False):
+        for stmt in body:
+            if state is None:
+                return None
+            state = self.statement(stmt, state, ctx, in_finally)
+        return state
+
+    def statement(self, stmt, state, ctx, in_finally):
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            return state
+        if isinstance(stmt, ast.Assign):
+            self.assign(stmt, state, in_finally)
+            return state
+        if isinstance(stmt, ast.If):
+            self.apply_calls(stmt.test, state, in_finally)
+            return _join(self.block(stmt.body, state.copy(), ctx, in_finally),
+                         self.block(stmt.orelse, state.copy(), ctx, in_finally))
+        if isinstance(stmt, (ast.For, ast.AsyncFor, ast.While)):
+            self.apply_calls(stmt.iter if isinstance(stmt, (ast.For, ast.AsyncFor)) else stmt.test, state, in_finally)
+            exits, continues = [], []
+            loop_ctx = _Context(ctx.finally_stack, exits, ctx.handled, continues, len(ctx.finally_stack))
+            # Two passes approximate any number of iterations: the second starts from what the
+            # first leaves behind, so builders still live from the previous iteration are seen
+            first_end = self.block(stmt.body, state.copy(), loop_ctx, in_finally)
+            second_start = _join(first_end, *continues)
+            continues.clear()
+            second_end = self.block(stmt.body, second_start, loop_ctx, in_finally) if second_start else None
+            after = _join(state, first_end, second_end, *continues, *exits)
+            return self.block(stmt.orelse, after, ctx, in_finally) if stmt.orelse else after
+        if isinstance(stmt, (ast.With, ast.AsyncWith)):
+            for item in stmt.items:
+                self.apply_calls(item.context_expr, state, in_finally)
+            return self.block(stmt.body, state, ctx, in_finally)
+        if isinstance(stmt, ast.Try) or type(stmt).__name__ == "TryStar":
+            return self.try_statement(stmt, state, ctx, in_finally)
+        if isinstance(stmt, ast.Return):
+            if stmt.value is not None:
+                self.apply_calls(stmt.value, state, in_finally)
+                if isinstance(stmt.value, ast.Name):
+                    # Returning the builder hands ownership to the caller
+                    self.escaped.update(state.env.get(stmt.value.id, ()))
+            final = self.run_finally(state, ctx)
+            if final is not None:
+                self.exit(final, stmt.lineno, "return")
+            return None
+        if isinstance(stmt, ast.Raise):
+            if not ctx.handled:
+                final = self.run_finally(state, ctx)
+                if final is not None:
+                    self.exit(final, stmt.lineno, "raise")
+            return None
+        if isinstance(stmt, (ast.Break, ast.Continue)):
+            targets = ctx.loop_exits if isinstance(stmt, ast.Break) else ctx.loop_continues
+            if targets is not None:
+                state = self.run_finally(state, ctx, ctx.loop_finally)
+                if state is not None:
+                    targets.append(state)
+            return None
+        self.apply_calls(stmt, state, in_finally)
+        return state
+
+    def try_statement(self, stmt, state, ctx, in_finally):
+        finally_stack = ctx.finally_stack + ([stmt.finalbody] if stmt.finalbody else [])
+        body_ctx = ctx.inner(finally_stack, ctx.handled or bool(stmt.handlers))
+        before = state.copy()
+        body_end = self.block(stmt.body, state.copy(), body_ctx, in_finally)
+        # A handler may be entered from anywhere in the body; the two ends bracket that
+        raised = _join(before, body_end)
+        handler_ctx = ctx.inner(finally_stack)
+        ends = [self.block(handler.body, raised.copy(), handler_ctx, in_finally) for handler in stmt.handlers]
+        if body_end is not None and stmt.orelse:
+            body_end = self.block(stmt.orelse, body_end, handler_ctx, in_finally)
+        normal = _join(body_end, *ends)
+        if not stmt.finalbody:
+            return normal
+        if normal is None:
+            return None
+        return self.block(stmt.finalbody, normal, ctx.inner(), True)
+
+
+class _Report:
+    def __init__(self):
+        self.builders = {}
+        self.issues = []
+
+    def new_builder(self, scope, factory, line, targets):
+        names = [t.id for t in targets if isinstance(t, ast.Name)]
+        builder_id = (scope, line, factory)
+        if builder_id not in self.builders:
+            self.builders[builder_id] = {
+                "var": names[0] if names else None,
+                "factory": factory,
+                "line": line,
+                "scope": scope,
+                "commit_lines": set(),
+                "destroy_lines": set(),
+                "in_finally": False,
+                "exits": [],
+                "settled": frozenset(),
+                "leaks_per_iteration": False,
+            }
+        return builder_id
+
+    def issue(self, line, severity, message):
+        issue = {"line": line, "severity": severity, "message": message}
+        # Loop bodies are walked twice; report each finding once
+        if issue not in self.issues:
+            self.issues.append(issue)
+
+
+def _coverage(values):
+    if all(values):
+        return "always"
+    return "sometimes" if any(values) else "never"
+
+
+def _analyze(code):
+    try:
+        tree = parse_code(code)
+    except (SyntaxError, ValueError) as e:
+        return {"parsed": False, "error": str(e), "builders": [], "issues": [], "leaks": 0}
+
+    report = _Report()
+    lines = code.lstrip("\ufeff").split("\n")
+    _FunctionAnalysis("<module>", report, lines).run(tree.body)
+    for node in _function_defs(tree.body):
+        _FunctionAnalysis(node.name, report, lines).run(node.body)
+
+    builders = []
+    for info in sorted(report.builders.values(), key=lambda b: b["line"]):
+        facts = [fact for _, _, exit_facts in info["exits"] for fact in exit_facts] + list(info["settled"])
+        leak_lines = sorted({line for line, _, exit_facts in info["exits"] if any(not d for _, d in exit_facts)})
+        destroyed = _coverage([d for _, d in facts]) if facts else "always"
+        committed = _coverage([c for c, _ in facts]) if facts else "always"
+        label = f"'{info['var']}' ({info['factory']}, line {info['line']})"
+        if info["leaks_per_iteration"]:
+            # Already reported where the builder is re-created
+            destroyed = "sometimes"
+        elif destroyed != "always":
+            where = ", ".join(str(line) for line in leak_lines)
+            report.issue(info["line"], "error",
+                         f"Builder {label} is not destroyed on {'any' if destroyed == 'never' else 'every'} path"
+                         f" (leaks at line {where})")
+        elif info["destroy_lines"] and not info["in_finally"]:
+            report.issue(info["line"], "info",
+                         f"Builder {label} is destroyed outside try/finally; an exception would leak it")
+        if committed == "never":
+            report.issue(info["line"], "warning", f"Builder {label} is never committed")
+        elif committed == "sometimes":
+            report.issue(info["line"], "warning", f"Builder {label} is not committed on every path")
+        builders.append({
+            "var": info["var"],
+            "factory": info["factory"],
+            "line": info["line"],
+            "scope": info["scope"],
+            "committed": committed,
+            "destroyed": destroyed,
+            "exception_safe": info["in_finally"],
+            "leak_lines": leak_lines,
+        })
+    issues = sorted(report.issues, key=lambda i: (i["line"], i["severity"]))
+    return {
+        "parsed": True,
+        "error": None,
+        "builders": builders,
+        "issues": issues,
+        "leaks": sum(1 for i in issues if i["severity"] == "error"),
+    }
+
+
+def analyze_builders(code):
+    """Builders created in the code with commit/destroy coverage, plus issues with line numbers (cached)."""
+    return cached_analysis("builders", code, _analyze)
+
+
+def _script_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".py"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report builders that are not committed or destroyed.")
+    parser.add_argument("paths", nargs="+", help="Python scripts or directories of scripts")
+    parser.add_argument("--all", action="store_true", help="Also list info-level findings")
+    args = parser.parse_args()
+
+    scripts = leaks = 0
+    elapsed = 0.0
+    for path in _script_paths(args.paths):
+        code = read_source(path)
+        start = time.perf_counter()
+        result = _analyze(code)
+        elapsed += time.perf_counter() - start
+        scripts += 1
+        shown = [i for i in result["issues"] if args.all or i["severity"] != "info"]
+        if not result["parsed"]:
+            print(f"{path}: could not parse ({result['error']})")
+        for issue in shown:
+            print(f"{path}:{issue['line']}: {issue['severity']}: {issue['message']}")
+        leaks += result["leaks"]
+    print(f"{scripts} scripts, {leaks} leaks, {elapsed * 1000:.1f} ms analysis")
+    raise SystemExit(1 if leaks else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+import ast
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+# Check -> weight in the quality score (sums to 100)
+CHECK_WEIGHTS = {
+    "has_imports": 20,
+    "has_main_function": 20,
+    "has_session": 15,
+    "has_builder": 15,
+    "has_commit": 15,
+    "has_destroy": 15,
+}
+
+CHECK_LABELS = {
+    "has_imports": ("Has NXOpen imports", "Missing NXOpen imports"),
+    "has_main_function": ("Has main function", "Missing main function"),
+    "has_main_guard": ("Has __main__ guard", "Missing __main__ guard"),
+    "has_session": ("Has session management", "Missing session"),
+    "has_builder": ("Uses builders", "No builders found"),
+    "has_commit": ("Has commit", "Missing commit"),
+    "has_destroy": ("Has destroy", "Missing destroy"),
+}
+
+BUILDER_FACTORY_RE = re.compile(r"^Create\w*Builder$")
+COMMIT_METHODS = {"Commit", "CommitFeature", "CommitCreateOnTheFly"}
+
+_CACHE_SIZE = 512
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def code_hash(code):
+    return hashlib.blake2b((code or "").encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _attr_name(node):
+    return node.attr if isinstance(node, ast.Attribute) else getattr(node, "id", None)
+
+
+def _target_name(node):
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _is_main_guard(node):
+    test = node.test
+    if not isinstance(test, ast.Compare) or len(test.comparators) != 1:
+        return False
+    sides = [test.left, test.comparators[0]]
+    names = [s.id for s in sides if isinstance(s, ast.Name)]
+    consts = [s.value for s in sides if isinstance(s, ast.Constant)]
+    return names == ["__name__"] and consts == ["__main__"]
+
+
+def _summarize_ast(tree):
+    imports = set()
+    functions = []
+    method_calls = set()
+    builders = []
+    builder_calls = {}
+    has_main_guard = False
+
+    for node in ast_nodes(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            imports.add(node.module)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions.append(node.name)
+        elif isinstance(node, ast.If) and _is_main_guard(node):
+            has_main_guard = True
+        elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+            factory = _attr_name(node.value.func)
+            if factory and BUILDER_FACTORY_RE.match(factory):
+                for target in node.targets:
+                    builders.append({"var": _target_name(target), "factory": factory, "line": node.lineno})
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            method_calls.add(node.func.attr)
+            owner = _target_name(node.func.value)
+            if owner:
+                builder_calls.setdefault(owner, set()).add(node.func.attr)
+
+    builder_vars = {b["var"] for b in builders if b["var"]}
+    return {
+        "parsed": True,
+        "syntax_error": None,
+        "imports": sorted(imports),
+        "functions": functions,
+        "has_main_guard": has_main_guard,
+        "method_calls": sorted(method_calls),
+        "builders": builders,
+        "builder_calls": {var: sorted(calls) for var, calls in builder_calls.items() if var in builder_vars},
+        "lines": max((getattr(n, "end_lineno", 0) or 0 for n in tree.body), default=0),
+    }
+
+
+def _summarize_text(code, error):
+    """Fallback for code that does not parse: line-based checks with comments stripped."""
+    text = "\n".join(line.split("#", 1)[0] for line in code.split("\n"))
+    builders = [
+        {"var": m.group(1), "factory": m.group(2), "line": text.count("\n", 0, m.start()) + 1}
+        for m in re.finditer(r"(\w+)\s*=\s*[\w.]*\.(Create\w*Builder)\s*\(", text)
+    ]
+    return {
+        "parsed": False,
+        "syntax_error": f"{error.msg} (line {error.lineno})" if isinstance(error, SyntaxError) else str(error),
+        "imports": sorted(set(re.findall(r"^\s*(?:import|from)\s+([\w.]+)", text, re.MULTILINE))),
+        "functions": re.findall(r"^\s*def\s+(\w+)\s*\(", text, re.MULTILINE),
+        "has_main_guard": bool(re.search(r"__name__\s*==\s*['\"]__main__['\"]", text)),
+        "method_calls": sorted(set(re.findall(r"\.(\w+)\s*\(", text))),
+        "builders": builders,
+        "builder_calls": {},
+        "lines": code.count("\n") + 1,
+    }
+
+
+def read_source(path):
+    """Read a corpus script, honouring UTF-16/UTF-8 byte order marks."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if raw[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        return raw.decode("utf-16")
+    return raw.decode("utf-8-sig", errors="replace")
+
+
+_TREE_CACHE_SIZE = 8
+_trees = OrderedDict()
+
+
+def parse_code(code):
+    """ast.parse tolerant of a leading BOM; raises SyntaxError or ValueError like ast.parse.
+
+    The last few trees are kept so every analysis of the same code shares one parse;
+    the tree is shared, treat it as read-only.
+    """
+    key = code_hash(code)
+    with _cache_lock:
+        if key in _trees:
+            _trees.move_to_end(key)
+            tree = _trees[key]
+            if isinstance(tree, Exception):
+                raise tree
+            return tree
+    try:
+        tree = ast.parse((code or "").lstrip("\ufeff"))
+    except (SyntaxError, ValueError) as e:
+        tree = e
+    with _cache_lock:
+        _trees[key] = tree
+        while len(_trees) > _TREE_CACHE_SIZE:
+            _trees.popitem(last=False)
+    if isinstance(tree, Exception):
+        raise tree
+    return tree
+
+
+_node_lists = OrderedDict()
+
+
+def ast_nodes(tree):
+    """Every node of tree in ast.walk order, computed once per tree and shared (read-only)."""
+    key = id(tree)
+    with _cache_lock:
+        entry = _node_lists.get(key)
+        if entry is not None and entry[0] is tree:
+            _node_lists.move_to_end(key)
+            return entry[1]
+    nodes = [tree]
+    append, extend, node_type = nodes.append, nodes.extend, ast.AST
+    i = 0
+    while i < len(nodes):
+        node = nodes[i]
+        i += 1
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                extend([item for item in value if isinstance(item, node_type)])
+            elif isinstance(value, node_type):
+                append(value)
+    with _cache_lock:
+        # Holding the tree keeps its id from being reused while the entry lives
+        _node_lists[key] = (tree, nodes)
+        while len(_node_lists) > _TREE_CACHE_SIZE:
+            _node_lists.popitem(last=False)
+    return nodes
+
+
+def cached_analysis(name, code, compute, key=None):
+    """Run compute(code) once per (analysis name, code hash); results are shared, treat as read-only.
+
+    key replaces the code hash for analyses that give the same answer for equivalent code
+    (e.g. code_fingerprint).
+    """
+    key = (name, key or code_hash(code))
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    result = compute(code or "")
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def _summarize(code):
+    try:
+        summary = _summarize_ast(parse_code(code))
+    except (SyntaxError, ValueError) as e:
+        summary = _summarize_text(code, e)
+    summary["hash"] = code_hash(code)
+    return summary
+
+
+# Constants whose value matters to the checks are kept; every other literal collapses to its type
+KEPT_CONSTANTS = (True, False, None, Ellipsis)
+COMMENT_RE = re.compile(r"#[^\n]*")
+
+
+def _constant_bucket(value):
+    if any(value is kept for kept in KEPT_CONSTANTS):
+        return repr(value)
+    if isinstance(value, str) and value.startswith("__") and value.endswith("__"):
+        return value
+    return type(value).__name__
+
+
+# Fields that never affect the fingerprint (expression context, type comments, string kind)
+_SKIPPED_FIELDS = {"ctx", "type_comment", "kind"}
+_fields_by_type = {}
+
+
+def _fingerprint_ast(tree):
+    """Canonical token string of a tree: node types and structure, attribute and function names,
+    the script's own variables renamed v0, v1, ... in order of first appearance, literals bucketed."""
+    out = []
+    append = out.append
+    names = []      # (position in out, identifier) for every variable occurrence
+    bound = set()   # identifiers the script binds; the rest (builtins, journal globals) keep their name
+    node_type, constant, name_type, arg_type, load = ast.AST, ast.Constant, ast.Name, ast.arg, ast.Load
+
+    def visit(node):
+        kind = type(node)
+        append(kind.__name__)
+        if kind is constant:
+            append(_constant_bucket(node.value))
+            return
+        if kind is name_type:
+            names.append((len(out), node.id))
+            append(node.id)
+            if type(node.ctx) is not load:
+                bound.add(node.id)
+            return
+        if kind is arg_type:
+            names.append((len(out), node.arg))
+            append(node.arg)
+            bound.add(node.arg)
+            if node.annotation is not None:
+                visit(node.annotation)
+            return
+        fields = _fields_by_type.get(kind)
+        if fields is None:
+            fields = _fields_by_type[kind] = tuple(f for f in kind._fields if f not in _SKIPPED_FIELDS)
+        for field in fields:
+            value = getattr(node, field, None)
+            if type(value) is list:
+                append("[")
+                for item in value:
+                    if isinstance(item, node_type):
+                        visit(item)
+                    else:
+                        append(repr(item))
+                append("]")
+            elif isinstance(value, node_type):
+                visit(value)
+            elif field == "name" and kind is ast.ExceptHandler and value:
+                names.append((len(out), value))
+                append(value)
+                bound.add(value)
+            else:
+                append(repr(value))
+        append(")")
+
+    visit(tree)
+    renamed = {}
+    for position, name in names:
+        if name in bound:
+            out[position] = renamed.setdefault(name, f"v{len(renamed)}")
+    return "\x1f".join(out)
+
+
+def _fingerprint(code):
+    try:
+        canonical = "ast:" + _fingerprint_ast(parse_code(code))
+    except (SyntaxError, ValueError, RecursionError):
+        canonical = "text:" + " ".join(COMMENT_RE.sub("", code).split())
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def code_fingerprint(code):
+    """Hash of the normalized AST: equal for scripts that differ only in whitespace, comments,
+    variable names or literal values (cached)."""
+    return cached_analysis("fingerprint", code, _fingerprint)
+
+
+def summarize_code(code):
+    """One-pass structural summary of a script, cached by code hash; treat the result as read-only."""
+    return cached_analysis("summary", code, _summarize)
+
+
+def quality_checks(summary):
+    """Boolean checks derived from a summary (the keys of CHECK_LABELS)."""
+    calls = set(summary["method_calls"])
+    return {
+        "has_imports": any(name == "NXOpen" or name.startswith("NXOpen.") for name in summary["imports"]),
+        "has_main_function": "main" in summary["functions"],
+        "has_main_guard": summary["has_main_guard"],
+        "has_session": "GetSession" in calls,
+        "has_builder": bool(summary["builders"]) or any(BUILDER_FACTORY_RE.match(call) for call in calls),
+        "has_commit": bool(calls & COMMIT_METHODS),
+        "has_destroy": "Destroy" in calls,
+    }
+
+
+def quality_score(checks):
+    return sum(weight for check, weight in CHECK_WEIGHTS.items() if checks.get(check))
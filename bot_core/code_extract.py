@@ -0,0 +1,230 @@
+"""Fenced code blocks in LLM responses, found in one pass and usable on streamed chunks.
+
+    python -m bot_core.code_extract bench                  # time extraction on ~50 KB responses
+    python -m bot_core.code_extract check llm_traffic.jsonl   # extract from recorded responses
+"""
+import argparse
+import json
+import re
+import time
+
+FENCE_RE = re.compile(r"^[ \t]*(`{3,}|~{3,})[ \t]*([\w+.-]*)")
+PYTHON_TAGS = {"python", "py", "python3"}
+IMPORT_PREFIXES = ("import ", "from ")
+# What marks a block as the journal itself rather than a helper or usage snippet
+MAIN_SCRIPT_RE = re.compile(r"^[ \t]*(?:import NXOpen|from NXOpen\b|def main\s*\()", re.MULTILINE)
+
+
+class FenceTokenizer:
+    """Single-pass, incremental splitter of markdown text into fenced code blocks.
+
+    feed() takes any slice of the text (a whole response or one streamed delta) and returns
+    the blocks its complete lines closed. Each block is a dict with tag, code, python (tagged
+    python, or untagged and importing something), closed, and start/end character offsets
+    of the code and of the end of the closing fence line. close() flushes the last line and
+    keeps a block left open by a truncated response (closed=False).
+    """
+
+    def __init__(self):
+        self.blocks = []
+        self.offset = 0
+        self._pending = ""
+        self._open = None
+
+    def feed(self, delta):
+        self._pending += delta
+        cut = self._pending.rfind("\n")
+        if cut < 0:
+            return []
+        lines = self._pending[:cut].split("\n")
+        self._pending = self._pending[cut + 1:]
+        closed = []
+        for line in lines:
+            self.offset += len(line) + 1
+            block = self._line(line.rstrip("\r"))
+            if block is not None:
+                closed.append(block)
+        return closed
+
+    def close(self):
+        if self._pending:
+            line, self._pending = self._pending, ""
+            self.offset += len(line)
+            self._line(line.rstrip("\r"))
+        if self._open is not None:
+            self.blocks.append(self._finish(closed=False))
+        return self.blocks
+
+    def _line(self, line):
+        opening = self._open
+        if opening is None:
+            if line.lstrip(" \t")[:3] in ("```", "~~~"):
+                match = FENCE_RE.match(line)
+                self._open = {"fence": match.group(1), "tag": match.group(2).lower(), "lines": [],
+                              "imports": False, "start": self.offset}
+            return None
+        if line.lstrip(" \t")[:3] == opening["fence"][:3]:
+            match = FENCE_RE.match(line)
+            fence = match.group(1)
+            if len(fence) >= len(opening["fence"]) and not match.group(2):
+                block = self._finish(closed=True)
+                self.blocks.append(block)
+                return block
+        opening["lines"].append(line)
+        if not opening["imports"] and line.lstrip().startswith(IMPORT_PREFIXES):
+            opening["imports"] = True
+        return None
+
+    def _finish(self, closed):
+        opening, self._open = self._open, None
+        tag = opening["tag"]
+        return {
+            "tag": tag,
+            "code": "\n".join(opening["lines"]),
+            "python": tag in PYTHON_TAGS or (not tag and opening["imports"]),
+            "closed": closed,
+            "start": opening["start"],
+            "end": self.offset,
+        }
+
+
+def extract_code_blocks(text):
+    """Every fenced block in text, in order (see FenceTokenizer)."""
+    tokenizer = FenceTokenizer()
+    tokenizer.feed(text or "")
+    return tokenizer.close()
+
+
+def extract_python_code(text, min_code_chars=50):
+    """The largest Python block in an LLM response, or None.
+
+    Responses without any fence are taken as bare code from the first import line on.
+    """
+    if not text:
+        return None
+    blocks = extract_code_blocks(text)
+    candidates = [block["code"].strip() for block in blocks if block["python"]]
+    candidates = [code for code in candidates if len(code) >= min_code_chars]
+    if candidates:
+        return max(candidates, key=len)
+    if blocks:
+        return None
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if line.startswith(IMPORT_PREFIXES):
+            code = "\n".join(lines[i:]).strip()
+            return code if len(code) >= min_code_chars else None
+    return None
+
+
+class FenceWatcher:
+    """Watches streamed text and reports when the main Python code block has been closed.
+
+    The main block is the first Python block (see FenceTokenizer) holding at least
+    min_code_chars of code that imports NXOpen or defines main(); shorter helper or usage
+    snippets before it do not stop the stream. feed() returns True once its closing fence
+    line is complete; stop_offset is then the length of text up to there.
+    """
+
+    def __init__(self, min_code_chars=50):
+        self.min_code_chars = min_code_chars
+        self.stop_offset = None
+        self._tokenizer = FenceTokenizer()
+
+    def feed(self, delta):
+        if self.stop_offset is not None:
+            return True
+        for block in self._tokenizer.feed(delta):
+            if block["python"] and len(block["code"]) + 1 >= self.min_code_chars \
+                    and MAIN_SCRIPT_RE.search(block["code"]):
+                self.stop_offset = block["end"]
+                return True
+        return False
+
+
+def trailing_text(text, watcher_factory=FenceWatcher):
+    """Text after the point where watcher_factory's watcher would have stopped ("" if never)."""
+    watcher = watcher_factory()
+    if not watcher.feed((text or "") + "\n"):
+        return ""
+    return text[watcher.stop_offset:]
+
+
+def _sample_response(size):
+    """A response shaped like the generator's: prose, a shell block, the script, more prose."""
+    script = ["import NXOpen", "import NXOpen.Features", "", "def main():",
+              "    theSession = NXOpen.Session.GetSession()", "    workPart = theSession.Parts.Work"]
+    i = 0
+    while sum(len(line) + 1 for line in script) < size * 0.6:
+        script += [f"    builder{i} = workPart.Features.CreateBlockFeatureBuilder(NXOpen.Features.Feature.Null)",
+                   f"    builder{i}.Commit()", f"    builder{i}.Destroy()"]
+        i += 1
+    prose = "This journal creates a series of blocks and commits each builder before destroying it.\n"
+    head = prose * int(size * 0.15 / len(prose))
+    tail = prose * int(size * 0.2 / len(prose))
+    return (f"{head}\n```bash\nrun_journal.exe block.py\n```\n\n```python\n" + "\n".join(script)
+            + f"\n\nif __name__ == '__main__':\n    main()\n```\n\n{tail}")
+
+
+def _bench(size, rounds, chunk):
+    text = _sample_response(size)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        code = extract_python_code(text)
+    whole = (time.perf_counter() - start) / rounds * 1000
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        tokenizer = FenceTokenizer()
+        for i in range(0, len(text), chunk):
+            tokenizer.feed(text[i:i + chunk])
+        tokenizer.close()
+    streamed = (time.perf_counter() - start) / rounds * 1000
+    print(f"{len(text) / 1024:.1f} KB response, {len(code) / 1024:.1f} KB code: "
+          f"{whole:.3f} ms whole, {streamed:.3f} ms streamed in {chunk}-char chunks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark or check fenced-code extraction.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_parser = sub.add_parser("bench", help="Time extraction on synthetic responses")
+    bench_parser.add_argument("--size", type=int, default=50 * 1024)
+    bench_parser.add_argument("--rounds", type=int, default=200)
+    bench_parser.add_argument("--chunk", type=int, default=16, help="Streamed delta size in characters")
+    check_parser = sub.add_parser("check", help="Extract code from recorded LLM traffic")
+    check_parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        _bench(args.size, args.rounds, args.chunk)
+        return
+
+    from bot_core.code_analysis import parse_code
+
+    found = failed = total = 0
+    for path in args.paths:
+        with open(path, "r", encoding="utf-8") as f:
+            # Generation result records (llm_replay) carry no response to extract from
+            records = [record for record in map(json.loads, filter(str.strip, f)) if "response" in record]
+        for number, record in enumerate(records, 1):
+            content = record.get("response", {}).get("content") or ""
+            blocks = extract_code_blocks(content)
+            code = extract_python_code(content)
+            total += 1
+            status = "no code"
+            if code:
+                found += 1
+                try:
+                    parse_code(code)
+                    status = "parses"
+                except (SyntaxError, ValueError) as e:
+                    failed += 1
+                    status = f"does not parse ({e})"
+            tags = ",".join(block["tag"] or "-" for block in blocks) or "none"
+            print(f"{path}:{number}: {len(blocks)} block(s) [{tags}], "
+                  f"{len(code or '')} chars extracted, {status}")
+    print(f"{total} responses, {found} with code, {failed} of those do not parse")
+
+
+if __name__ == "__main__":
+    main()
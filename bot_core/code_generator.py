@@ -1,7 +1,8 @@
 import os
-import re
 import chardet
 
+from bot_core.param_template import fill_params
+
 def read_script_auto_encode(path):
     with open(path, "rb") as f:
         raw_data = f.read()
@@ -26,9 +27,5 @@ def generate_code(intent, params):
     if not os.path.exists(filepath):
         return f"# ❌ File not found: {filepath}"
     code = read_script_auto_encode(filepath)
-    matches = re.findall(r"\{param(\d+)\}", code)
-    max_param = max([int(m) for m in matches], default=0)
-    for i in range(1, max_param + 1):
-        param_val = params[i-1] if len(params) >= i else "0"
-        code = code.replace(f"{{param{i}}}", param_val)
-    return code
+    # Parsed once per distinct file content; each call is a single join
+    return fill_params(code, params)
@@ -0,0 +1,197 @@
+import re
+import threading
+
+from bot_core.code_analysis import parse_code
+from bot_core.llm_backends import estimate_tokens
+
+# Validation check -> what the model is asked to fix, and where in the code to look
+REPAIR_HINTS = {
+    "has_imports": ("Import NXOpen at the top (`import NXOpen`, plus `import NXOpen.Features` if features are used).",
+                    None),
+    "has_main_function": ("Wrap the script in `def main():` and call it under `if __name__ == '__main__':`.",
+                          r"^\S"),
+    "has_main_guard": ("End the script with `if __name__ == '__main__':` calling `main()` (append it with an "
+                       "empty SEARCH).", r"^def main|^main\(|__name__"),
+    "has_session": ("Get the session with `theSession = NXOpen.Session.GetSession()` before using it.",
+                    r"Session|workPart|def main"),
+    "has_builder": ("Create the feature through the matching NXOpen builder (e.g. `CreateBlockFeatureBuilder`).",
+                    r"workPart|Features|Create"),
+    "has_commit": ("Call `builder.Commit()` once the builder parameters are set.", r"[Bb]uilder"),
+    "has_destroy": ("Call `builder.Destroy()` after the builder has been committed.", r"Commit\(|[Bb]uilder"),
+}
+
+PATCH_RE = re.compile(r"<<<<<<< SEARCH\n(.*?)\n?=======\n(.*?)\n?>>>>>>> REPLACE", re.DOTALL)
+
+REPAIR_SYSTEM_PROMPT = """You fix NXOpen Python scripts with the smallest possible edits.
+Reply ONLY with one or more patches in exactly this format:
+<<<<<<< SEARCH
+lines copied exactly from the snippet
+=======
+the replacement lines
+>>>>>>> REPLACE
+Leave SEARCH empty to append the replacement at the end of the script. Do not rewrite unrelated code."""
+
+
+def failing_checks(validation_results):
+    return [check for check in REPAIR_HINTS if not validation_results.get(check)]
+
+
+def _progress(validation_results):
+    """Score first, then the number of passing checks (the __main__ guard carries no weight)."""
+    return validation_results["quality_score"], len(REPAIR_HINTS) - len(failing_checks(validation_results))
+
+
+def _parses(code):
+    try:
+        parse_code(code)
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+def relevant_snippet(code, checks, context=4, max_lines=60):
+    """Lines around the anchors of the failing checks; the file head is always included."""
+    lines = code.split("\n")
+    keep = set(range(min(len(lines), 6)))
+    for check in checks:
+        anchor = REPAIR_HINTS[check][1]
+        if not anchor:
+            continue
+        for i, line in enumerate(lines):
+            if re.search(anchor, line):
+                keep.update(range(max(0, i - context), min(len(lines), i + context + 1)))
+    picked = sorted(keep)[:max_lines]
+    parts = []
+    previous = -1
+    for i in picked:
+        if i != previous + 1:
+            parts.append("# ...")
+        parts.append(lines[i])
+        previous = i
+    if previous < len(lines) - 1:
+        parts.append("# ...")
+    return "\n".join(parts)
+
+
+def build_repair_messages(code, checks):
+    problems = "\n".join(f"- {REPAIR_HINTS[check][0]}" for check in checks)
+    return [
+        {"role": "system", "content": REPAIR_SYSTEM_PROMPT},
+        {"role": "user", "content": f"The script fails these checks:\n{problems}\n\n"
+                                    f"Relevant parts of the script (`# ...` marks omitted lines):\n"
+                                    f"```python\n{relevant_snippet(code, checks)}\n```"},
+    ]
+
+
+def parse_patches(text):
+    """SEARCH/REPLACE pairs from a repair response."""
+    return [(search, replace) for search, replace in PATCH_RE.findall((text or "").replace("\r\n", "\n"))]
+
+
+def _find_lines(code_lines, search_lines):
+    """Index where search_lines match code_lines ignoring trailing whitespace and indentation, or -1."""
+    wanted = [line.strip() for line in search_lines]
+    stripped = [line.strip() for line in code_lines]
+    for i in range(len(code_lines) - len(wanted) + 1):
+        if stripped[i:i + len(wanted)] == wanted:
+            return i
+    return -1
+
+
+def apply_patches(code, patches):
+    """Apply patches in order; returns (new code, applied count, patches that did not match)."""
+    applied = 0
+    failed = []
+    for search, replace in patches:
+        if not search.strip():
+            code = code.rstrip("\n") + "\n" + replace + "\n"
+            applied += 1
+        elif search in code:
+            code = code.replace(search, replace, 1)
+            applied += 1
+        else:
+            lines = code.split("\n")
+            search_lines = search.split("\n")
+            start = _find_lines(lines, search_lines)
+            if start < 0:
+                failed.append((search, replace))
+                continue
+            lines[start:start + len(search_lines)] = replace.split("\n")
+            code = "\n".join(lines)
+            applied += 1
+    return code, applied, failed
+
+
+class CodeRepairer:
+    """Bounded repair loop: ask for patches that fix only the failing checks and apply them locally."""
+
+    def __init__(self, client, validate, model="llama-3.3-70b-versatile", max_rounds=2, target_score=70,
+                 max_tokens=800):
+        self.client = client
+        self.validate = validate
+        self.model = model
+        self.max_rounds = max_rounds
+        self.target_score = target_score
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self.stats = {"attempts": 0, "repaired": 0, "rounds": 0, "tokens_used": 0, "tokens_saved": 0}
+
+    def repair(self, code, full_cost_tokens=0, cancel_event=None):
+        """Return a dict with the (possibly) patched code, scores, rounds and token accounting.
+
+        full_cost_tokens is what regenerating from scratch would cost; the difference to the
+        tokens spent here is counted as saved when the repair reaches the target score.
+        """
+        results, _ = self.validate(code)
+        score_before = score = results["quality_score"]
+        rounds = 0
+        applied_total = 0
+        tokens_used = 0
+        while score < self.target_score and rounds < self.max_rounds:
+            checks = failing_checks(results)
+            if not checks:
+                break
+            rounds += 1
+            completion = self.client.complete(
+                model=self.model,
+                messages=build_repair_messages(code, checks),
+                temperature=0.0,
+                max_tokens=self.max_tokens,
+                task="repair",
+                cancel_event=cancel_event
+            )
+            tokens_used += completion.prompt_tokens + completion.completion_tokens
+            patched, applied, _ = apply_patches(code, parse_patches(completion.content))
+            if not applied:
+                break
+            patched_results, _ = self.validate(patched)
+            # The text fallback of the checks can score broken code higher: only parsing patches count
+            if not _parses(patched) or _progress(patched_results) <= _progress(results):
+                break
+            code, results, score = patched, patched_results, patched_results["quality_score"]
+            applied_total += applied
+
+        repaired = score >= self.target_score > score_before
+        saved = max(0, full_cost_tokens - tokens_used) if repaired else 0
+        with self._lock:
+            self.stats["attempts"] += 1
+            self.stats["repaired"] += int(repaired)
+            self.stats["rounds"] += rounds
+            self.stats["tokens_used"] += tokens_used
+            self.stats["tokens_saved"] += saved
+        return {
+            "code": code,
+            "repaired": repaired,
+            "score_before": score_before,
+            "score_after": score,
+            "rounds": rounds,
+            "patches_applied": applied_total,
+            "tokens_used": tokens_used,
+            "full_cost_tokens": full_cost_tokens,
+            "tokens_saved": saved,
+        }
+
+
+def regeneration_cost(messages, response_text):
+    """Token estimate of a full generation: its prompt plus the response it produced."""
+    return sum(estimate_tokens(m.get("content")) for m in messages) + estimate_tokens(response_text)
@@ -0,0 +1,242 @@
+"""Corpus-wide validation: score every script with all static analyses in a process pool.
+
+    python -m bot_core.corpus_report nx_examples                                # -> corpus_report.json
+    python -m bot_core.corpus_report nx_examples generated/ llm_traffic.jsonl -o report.json
+    python -m bot_core.corpus_report nx_examples --baseline report.json        # exit 1 on regressions
+    python -m bot_core.corpus_report nx_examples --dry-run                     # also run the NXOpen mock
+
+Inputs are .py files, directories (searched recursively for .py files) and recorded LLM
+traffic (.jsonl from NXBOT_LLM_RECORD), whose responses are scored on the code they contain.
+Identical scripts are analysed once; scripts that differ only in whitespace, comments, variable
+names or literal values share a fingerprint and are listed as duplicate groups.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from bot_core.api_symbols import check_api, load_symbol_table
+from bot_core.builder_lifecycle import analyze_builders
+from bot_core.code_analysis import (code_fingerprint, code_hash, quality_checks, quality_score, read_source,
+                                    summarize_code)
+from bot_core.code_extract import extract_python_code
+from bot_core.perf_lint import lint_performance
+
+HISTOGRAM_BUCKETS = [(low, low + 9) for low in range(0, 90, 10)] + [(90, 100)]
+# Per-file fields where a larger number is worse; any increase against the baseline is a regression
+REGRESSION_FIELDS = ("lifecycle_errors", "api_unknown", "perf_high")
+DUPLICATE_GROUP_LIMIT = 50
+
+
+def _read(path):
+    try:
+        return path, read_source(path), None
+    except (OSError, UnicodeError) as e:
+        return path, None, str(e)
+
+
+def collect_sources(paths):
+    """(source id, code or None, read error or None) for every script under paths."""
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                sources += [_read(os.path.join(root, n)) for n in sorted(names) if n.endswith(".py")]
+        elif path.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as f:
+                for number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    content = json.loads(line).get("response", {}).get("content")
+                    code = extract_python_code(content)
+                    if code:
+                        sources.append((f"{path}:{number}", code, None))
+        else:
+            sources.append(_read(path))
+    return sources
+
+
+def analyze_code(code):
+    """Quality score plus the counts from every static analysis for one script."""
+    start = time.perf_counter()
+    summary = summarize_code(code)
+    checks = quality_checks(summary)
+    lifecycle = analyze_builders(code)
+    api = check_api(code)
+    perf = lint_performance(code)
+    severities = [issue["severity"] for issue in lifecycle["issues"]]
+    return {
+        "hash": summary["hash"],
+        "fingerprint": code_fingerprint(code),
+        "lines": summary["lines"],
+        "parsed": summary["parsed"],
+        "syntax_error": summary["syntax_error"],
+        "score": quality_score(checks),
+        "failed_checks": [name for name, passed in checks.items() if not passed],
+        "builders": len(lifecycle["builders"]),
+        "lifecycle_errors": severities.count("error"),
+        "lifecycle_warnings": severities.count("warning"),
+        "api_unknown": len(api["unknown"]),
+        "perf_high": perf["counts"].get("high", 0),
+        "perf_medium": perf["counts"].get("medium", 0),
+        "perf_low": perf["counts"].get("low", 0),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def _analyze_batch(codes):
+    return [analyze_code(code) for code in codes]
+
+
+def _batches(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def histogram(scores):
+    counts = {f"{low}-{high}": 0 for low, high in HISTOGRAM_BUCKETS}
+    for score in scores:
+        low, high = next(b for b in HISTOGRAM_BUCKETS if b[0] <= score <= b[1])
+        counts[f"{low}-{high}"] += 1
+    return counts
+
+
+def duplicate_groups(files, limit=DUPLICATE_GROUP_LIMIT):
+    """Source ids sharing a fingerprint, largest groups first (at most limit groups)."""
+    groups = {}
+    for entry in files:
+        if entry.get("fingerprint"):
+            groups.setdefault(entry["fingerprint"], []).append(entry["id"])
+    duplicates = sorted(((fp, ids) for fp, ids in groups.items() if len(ids) > 1),
+                        key=lambda item: len(item[1]), reverse=True)
+    return [{"fingerprint": fp, "ids": ids} for fp, ids in duplicates[:limit]]
+
+
+def build_report(paths, workers=None, dry_run=False, dry_run_workers=2):
+    """Analyse every script under paths; returns the report dict (files, summary, histogram)."""
+    start = time.perf_counter()
+    sources = collect_sources(paths)
+    codes = {}
+    for _, code, _ in sources:
+        if code is not None:
+            codes.setdefault(code_hash(code), code)
+    workers = workers or os.cpu_count() or 1
+    # Large batches keep inter-process overhead small; several per worker keep the load even
+    batch_size = max(1, min(200, len(codes) // (workers * 4)))
+    unique = list(codes.values())
+    if workers > 1 and len(unique) > batch_size:
+        with ProcessPoolExecutor(max_workers=workers, initializer=load_symbol_table) as executor:
+            batches = executor.map(_analyze_batch, _batches(unique, batch_size))
+            results = [result for batch in batches for result in batch]
+    else:
+        results = _analyze_batch(unique)
+    analyses = dict(zip(codes, results))
+
+    files = []
+    for source_id, code, error in sources:
+        if code is None:
+            files.append({"id": source_id, "hash": None, "error": error, "score": None})
+        else:
+            files.append(dict(analyses[code_hash(code)], id=source_id))
+
+    if dry_run and codes:
+        from bot_core.dry_run import DryRunPool
+        pool = DryRunPool(workers=dry_run_workers)
+        try:
+            with ThreadPoolExecutor(max_workers=dry_run_workers) as executor:
+                runs = dict(zip(codes, executor.map(pool.run, codes.values())))
+        finally:
+            pool.close()
+        for entry in files:
+            run = runs.get(entry["hash"])
+            if run:
+                entry["dry_run"] = {key: run[key] for key in ("ok", "error", "error_line", "counts", "elapsed_ms")}
+
+    scores = [f["score"] for f in files if f["score"] is not None]
+    summary = {
+        "files": len(files),
+        "unique": len(codes),
+        "distinct_fingerprints": len({f["fingerprint"] for f in files if f.get("fingerprint")}),
+        "unreadable": sum(1 for f in files if f["score"] is None),
+        "parse_failures": sum(1 for f in files if f.get("parsed") is False),
+        "mean_score": round(statistics.mean(scores), 2) if scores else None,
+        "median_score": statistics.median(scores) if scores else None,
+        "lifecycle_errors": sum(f.get("lifecycle_errors", 0) for f in files),
+        "api_unknown": sum(f.get("api_unknown", 0) for f in files),
+        "perf_high": sum(f.get("perf_high", 0) for f in files),
+    }
+    if dry_run:
+        summary["dry_run_failures"] = sum(1 for f in files if f.get("dry_run") and not f["dry_run"]["ok"])
+    return {
+        "version": 1,
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+        "workers": workers,
+        "summary": summary,
+        "histogram": histogram(scores),
+        "duplicates": duplicate_groups(files),
+        "files": files,
+    }
+
+
+def compare_reports(report, baseline):
+    """Files whose score dropped or whose error counts grew since the baseline report."""
+    previous = {f["id"]: f for f in baseline.get("files", [])}
+    regressions = []
+    for entry in report["files"]:
+        old = previous.get(entry["id"])
+        if old is None or entry["score"] is None or old.get("score") is None:
+            continue
+        reasons = []
+        if entry["score"] < old["score"]:
+            reasons.append(f"score {old['score']} -> {entry['score']}")
+        reasons += [f"{field} {old.get(field, 0)} -> {entry[field]}"
+                    for field in REGRESSION_FIELDS if entry[field] > old.get(field, 0)]
+        if entry.get("dry_run") and old.get("dry_run") and old["dry_run"]["ok"] and not entry["dry_run"]["ok"]:
+            reasons.append(f"dry run now fails: {entry['dry_run']['error']}")
+        if reasons:
+            regressions.append({"id": entry["id"], "reasons": reasons})
+    return regressions
+
+
+def format_histogram(counts, width=40):
+    peak = max(counts.values()) or 1
+    return [f"{bucket:>7} | {'#' * round(count / peak * width):<{width}} {count}" for bucket, count in counts.items()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate and score every script in a corpus.")
+    parser.add_argument("paths", nargs="+", help="Scripts, directories of scripts or recorded .jsonl traffic")
+    parser.add_argument("-o", "--output", default="corpus_report.json")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="Also run each script against the NXOpen mock")
+    parser.add_argument("--baseline", help="Earlier report to compare against; exit 1 on regressions")
+    args = parser.parse_args()
+
+    report = build_report(args.paths, workers=args.workers, dry_run=args.dry_run)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["regressions"] = compare_reports(report, json.load(f))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+
+    summary = report["summary"]
+    print(f"{summary['files']} scripts ({summary['unique']} unique, "
+          f"{summary['distinct_fingerprints']} structurally distinct) in {report['elapsed_seconds']:.2f} s "
+          f"with {report['workers']} worker(s) -> {args.output}")
+    print(f"mean score {summary['mean_score']}, median {summary['median_score']}, "
+          f"{summary['parse_failures']} parse failures, {summary['lifecycle_errors']} lifecycle errors, "
+          f"{summary['api_unknown']} unknown API symbols, {summary['perf_high']} high-cost loop calls")
+    print("\n".join(format_histogram(report["histogram"])))
+    for group in report["duplicates"]:
+        print(f"DUPLICATES {len(group['ids'])}: {', '.join(group['ids'])}")
+    for item in report.get("regressions", []):
+        print(f"REGRESSION {item['id']}: {', '.join(item['reasons'])}")
+    if report.get("regressions"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
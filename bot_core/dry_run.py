@@ -0,0 +1,421 @@
+"""Dry-run generated NXOpen scripts against the recording mock in sandboxed worker processes.
+
+    python -m bot_core.dry_run nx_examples              # run every script, print exceptions and call counts
+    python -m bot_core.dry_run script.py --timeout 2
+
+Each worker is a separate Python process with an address-space limit, a per-script CPU timer
+and a wall-clock timeout enforced by the parent; a worker that overruns is killed and replaced.
+
+Before it accepts a script, a worker isolates itself (Linux only): it enters new user and network
+namespaces (no network interfaces), chroots into its empty scratch directory (no app files, no
+.env; the environment is already minimal) and installs a seccomp filter that refuses sockets,
+process creation, signals to other processes and namespace/mount changes. Modules a script may
+import are loaded before the chroot. Where isolation is not possible the pool refuses to start
+(SandboxUnavailable); the audit hook that also blocks these operations is not a boundary on its own.
+
+The job protocol runs over private copies of the worker's stdin/stdout taken before any script
+runs; fds 0-2 then point at /dev/null. Every job carries a random id that its reply must echo,
+so a reply forged by a script, or left over from an earlier job, is never accepted.
+"""
+import argparse
+import ctypes
+import io
+import json
+import logging
+import os
+import platform
+import queue
+import secrets
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+from bot_core.code_analysis import code_hash, read_source
+
+logger = logging.getLogger("nx_codebot.dry_run")
+
+SCRIPT_NAME = "<generated>"
+OUTPUT_LIMIT = 2000
+BLOCKED_EVENTS = ("subprocess.Popen", "os.system", "os.exec", "os.spawn", "os.posix_spawn", "os.fork",
+                  "os.kill", "socket.connect", "socket.bind", "ctypes.dlopen")
+# Filesystem changes are only allowed inside the worker's scratch directory
+PATH_EVENTS = ("os.remove", "os.rename", "os.rmdir", "os.mkdir", "shutil.rmtree")
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_TIMEOUT = 10.0
+# Importable after the chroot (everything else is gone with the filesystem)
+PRELOADED_MODULES = ("math", "cmath", "random", "time", "datetime", "traceback", "collections", "itertools",
+                     "functools", "json", "re", "string", "decimal", "fractions", "statistics", "typing",
+                     "enum", "copy", "operator", "encodings.latin_1", "encodings.cp1252")
+
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+PR_SET_NO_NEW_PRIVS = 38
+PR_SET_SECCOMP = 22
+SECCOMP_MODE_FILTER = 2
+SECCOMP_RET_KILL_PROCESS = 0x80000000
+SECCOMP_RET_ERRNO_EPERM = 0x00050001
+SECCOMP_RET_ALLOW = 0x7FFF0000
+# (audit arch, syscalls refused with EPERM): sockets, process creation, signals, ptrace,
+# namespace/mount/chroot changes, kernel keyrings and modules, bpf and io_uring
+SECCOMP_DENY = {
+    "x86_64": (0xC000003E, (41, 42, 43, 44, 46, 49, 50, 53, 56, 57, 58, 59, 62, 101, 135, 155, 161, 165,
+                            166, 169, 175, 200, 234, 246, 248, 249, 250, 272, 288, 298, 304, 307, 308,
+                            310, 311, 313, 321, 322, 323, 425, 435)),
+    "aarch64": (0xC00000B7, (39, 40, 41, 51, 92, 97, 104, 105, 117, 129, 130, 131, 142, 198, 199, 200, 201,
+                             202, 203, 206, 211, 217, 218, 219, 220, 221, 241, 242, 265, 268, 269, 270,
+                             271, 273, 280, 281, 282, 425, 435)),
+}
+
+
+# --- worker side -------------------------------------------------------------
+
+class _CpuLimit(Exception):
+    pass
+
+
+class SandboxUnavailable(RuntimeError):
+    """The worker could not isolate itself, so no script is run."""
+
+
+_scratch = None
+
+
+def _inside_scratch(path):
+    try:
+        return os.path.abspath(os.fsdecode(path)).startswith(_scratch.rstrip(os.sep) + os.sep)
+    except (TypeError, ValueError):
+        return False
+
+
+def _audit(event, args):
+    if event.startswith(BLOCKED_EVENTS):
+        raise PermissionError(f"dry run blocked {event}")
+    if event in PATH_EVENTS and not _inside_scratch(args[0]):
+        raise PermissionError(f"dry run blocked {event} on {args[0]}")
+    if event == "open" and not isinstance(args[0], int):
+        mode, flags = args[1], args[2] or 0
+        writing = any(flag in mode for flag in "wax+") if isinstance(mode, str) else bool(flags & WRITE_FLAGS)
+        if writing and not _inside_scratch(args[0]):
+            raise PermissionError(f"dry run blocked writing {args[0]}")
+
+
+def _error_line(tb):
+    for frame in reversed(traceback.extract_tb(tb)):
+        if frame.filename == SCRIPT_NAME:
+            return frame.lineno
+    return None
+
+
+def _execute(code, cpu_seconds, trace):
+    from bot_core import nxopen_mock
+
+    nxopen_mock.reset()
+    output = io.StringIO()
+    result = {"ok": True, "error": None, "error_line": None, "ran_main": False}
+    start = time.perf_counter()
+    saved = sys.stdin, sys.stdout
+    # The script must never see the protocol pipes: input() gets EOF and exit() closes a dummy stdin
+    sys.stdin, sys.stdout = io.StringIO(), output
+    _arm_cpu_timer(cpu_seconds)
+    try:
+        namespace = {"__name__": "__dry_run__", "__file__": SCRIPT_NAME}
+        exec(compile(code.lstrip("\ufeff"), SCRIPT_NAME, "exec"), namespace)
+        entry = namespace.get("main")
+        if callable(entry):
+            result["ran_main"] = True
+            entry()
+    except SystemExit:
+        pass
+    except _CpuLimit:
+        result.update(ok=False, error=f"CPU limit of {cpu_seconds}s exceeded")
+    except BaseException as e:
+        result.update(ok=False, error=f"{type(e).__name__}: {e}", error_line=_error_line(e.__traceback__))
+    finally:
+        _arm_cpu_timer(0)
+        sys.stdin, sys.stdout = saved
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    result["counts"] = trace.counts()
+    result["top_calls"] = trace.top()
+    result["output"] = output.getvalue()[:OUTPUT_LIMIT]
+    return result
+
+
+def _arm_cpu_timer(seconds):
+    try:
+        import signal
+        signal.setitimer(signal.ITIMER_PROF, seconds)
+    except (ImportError, AttributeError):
+        pass
+
+
+def _on_cpu_timer(signum, frame):
+    raise _CpuLimit()
+
+
+def _check(result, what):
+    if result != 0:
+        error = ctypes.get_errno()
+        raise OSError(error, f"{what}: {os.strerror(error)}")
+
+
+def _seccomp_filter(arch, denied):
+    """BPF program: kill on a foreign architecture, EPERM for denied syscalls, allow the rest."""
+    def op(code, k, jt=0, jf=0):
+        return struct.pack("HBBI", code, jt, jf, k)
+    ld_abs, jeq, jge, ret = 0x20, 0x15, 0x35, 0x06
+    program = [op(ld_abs, 4), op(jeq, arch, jt=1), op(ret, SECCOMP_RET_KILL_PROCESS), op(ld_abs, 0)]
+    # x32 system calls (bit 30) reach the same handlers under other numbers
+    program.append(op(jge, 0x40000000, jt=len(denied) + 1))
+    program += [op(jeq, nr, jt=len(denied) - i) for i, nr in enumerate(denied)]
+    program += [op(ret, SECCOMP_RET_ALLOW), op(ret, SECCOMP_RET_ERRNO_EPERM)]
+    return program
+
+
+def _isolate(scratch):
+    """Namespaces, chroot into scratch and seccomp for the current (single-threaded) process."""
+    if sys.platform != "linux" or platform.machine() not in SECCOMP_DENY:
+        raise OSError(f"no sandbox for {sys.platform}/{platform.machine()}")
+    libc = ctypes.CDLL(None, use_errno=True)
+    uid, gid = os.geteuid(), os.getegid()
+    _check(libc.unshare(CLONE_NEWUSER | CLONE_NEWNET), "unshare")
+    for name, text in (("setgroups", "deny"), ("uid_map", f"0 {uid} 1"), ("gid_map", f"0 {gid} 1")):
+        with open(f"/proc/self/{name}", "w") as f:
+            f.write(text)
+    _check(libc.chroot(os.fsencode(scratch)), "chroot")
+    os.chdir("/")
+
+    arch, denied = SECCOMP_DENY[platform.machine()]
+    program = b"".join(_seccomp_filter(arch, denied))
+    buffer = ctypes.create_string_buffer(program)
+    fprog = struct.pack("HxxxxxxP", len(program) // 8, ctypes.addressof(buffer))
+    fprog_buffer = ctypes.create_string_buffer(fprog)
+    _check(libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0), "no_new_privs")
+    _check(libc.prctl(PR_SET_SECCOMP, SECCOMP_MODE_FILTER, fprog_buffer, 0, 0), "seccomp")
+
+
+def worker_main():
+    """Isolate, send a ready line, then answer one JSON job per stdin line with one JSON result."""
+    from bot_core import nxopen_mock
+
+    trace = nxopen_mock.install()
+    try:
+        import signal
+        signal.signal(signal.SIGPROF, _on_cpu_timer)
+    except (ImportError, AttributeError):
+        pass
+    for name in PRELOADED_MODULES:
+        __import__(name)
+    global _scratch
+    # Scripts reach fds 0-2 through sys.__stdout__ and friends: keep the protocol on private copies
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+    try:
+        _isolate(os.path.abspath(os.getcwd()))
+    except OSError as e:
+        protocol.write(json.dumps({"ready": False, "error": str(e)}) + "\n")
+        protocol.flush()
+        return
+    _scratch = os.sep
+    protocol.write(json.dumps({"ready": True}) + "\n")
+    protocol.flush()
+    sys.addaudithook(_audit)
+    for line in requests:
+        job = json.loads(line)
+        job_id = job.pop("id")
+        result = _execute(job["code"], job["cpu_seconds"], trace)
+        result["id"] = job_id
+        protocol.write(json.dumps(result) + "\n")
+        protocol.flush()
+
+
+# --- parent side -------------------------------------------------------------
+
+def _limit_memory(memory_mb):
+    def apply():
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    return apply
+
+
+class _Worker:
+    """One isolated worker process; raises SandboxUnavailable when it could not isolate itself."""
+
+    def __init__(self, memory_mb):
+        self.cwd = tempfile.mkdtemp(prefix="nxbot_dry_run_")
+        env = {"PYTHONPATH": PACKAGE_ROOT, "PYTHONIOENCODING": "utf-8", "PYTHONDONTWRITEBYTECODE": "1",
+               "TMPDIR": self.cwd, "TEMP": self.cwd, "TMP": self.cwd}
+        if os.name == "nt":
+            env["SYSTEMROOT"] = os.environ.get("SYSTEMROOT", "")
+        self.process = subprocess.Popen(
+            [sys.executable, "-u", "-m", "bot_core.dry_run", "--worker"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            cwd=self.cwd, env=env, text=True, encoding="utf-8",
+            preexec_fn=_limit_memory(memory_mb) if os.name == "posix" and memory_mb else None,
+        )
+        self.jobs = 0
+        ready = self._read_line(STARTUP_TIMEOUT)
+        if not ready or not ready.get("ready"):
+            self.close()
+            raise SandboxUnavailable((ready or {}).get("error") or "worker did not start")
+
+    def _read_line(self, timeout):
+        reply = []
+        reader = threading.Thread(target=lambda: reply.append(self.process.stdout.readline()), daemon=True)
+        reader.start()
+        reader.join(timeout)
+        if reader.is_alive() or not reply or not reply[0]:
+            return None
+        return json.loads(reply[0])
+
+    def run(self, code, cpu_seconds, timeout):
+        """Result dict, or None when the worker died or overran the wall-clock timeout.
+
+        Raises ValueError when the reply is not for this job (forged or out of sync).
+        """
+        job_id = secrets.token_hex(16)
+        self.process.stdin.write(json.dumps({"id": job_id, "code": code, "cpu_seconds": cpu_seconds}) + "\n")
+        self.process.stdin.flush()
+        self.jobs += 1
+        reply = self._read_line(timeout)
+        if reply is not None and reply.pop("id", None) != job_id:
+            raise ValueError("reply does not belong to this job")
+        return reply
+
+    def close(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        shutil.rmtree(self.cwd, ignore_errors=True)
+
+
+class DryRunPool:
+    """Fixed pool of sandboxed worker processes; run() is safe to call from several threads.
+
+    The first worker starts immediately, so SandboxUnavailable surfaces here rather than
+    on the first run().
+    """
+
+    def __init__(self, workers=2, timeout=5.0, cpu_seconds=3.0, memory_mb=512, max_jobs_per_worker=200):
+        self.size = workers
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._idle = queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+        self.stats = {"runs": 0, "failures": 0, "timeouts": 0, "restarts": 0}
+        self._idle.put(_Worker(self.memory_mb))
+        self._started = 1
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle.empty() and self._started < self.size:
+                self._started += 1
+                return _Worker(self.memory_mb)
+        return self._idle.get()
+
+    def _release(self, worker, healthy):
+        if healthy and worker.jobs < self.max_jobs_per_worker:
+            self._idle.put(worker)
+            return
+        worker.close()
+        with self._lock:
+            self.stats["restarts"] += 1
+        self._idle.put(_Worker(self.memory_mb))
+
+    def run(self, code):
+        """Execute the script (and its main()) against the NXOpen mock; returns exceptions and call counts."""
+        worker = self._acquire()
+        start = time.perf_counter()
+        failure = None
+        try:
+            result = worker.run(code, self.cpu_seconds, self.timeout)
+        except (OSError, ValueError) as e:
+            logger.warning("Dry-run worker failed: %s", e)
+            result, failure = None, f"worker protocol error: {e}"
+        healthy = result is not None
+        if result is None:
+            timed_out = failure is None and time.perf_counter() - start >= self.timeout
+            if timed_out:
+                failure = f"timed out after {self.timeout:g}s"
+            result = {
+                "ok": False,
+                "error": failure or "worker crashed (memory limit?)",
+                "error_line": None, "ran_main": False, "counts": {}, "top_calls": [], "output": "",
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            }
+            with self._lock:
+                self.stats["timeouts" if timed_out else "failures"] += 1
+        elif not result["ok"]:
+            with self._lock:
+                self.stats["failures"] += 1
+        with self._lock:
+            self.stats["runs"] += 1
+        self._release(worker, healthy)
+        result["hash"] = code_hash(code)
+        return result
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+def format_result(result):
+    """One-line summary for notes and the CLI."""
+    counts = result.get("counts") or {}
+    summary = (f"{counts.get('calls', 0)} calls, {counts.get('commits', 0)} commits, "
+               f"{counts.get('updates', 0)} updates, {counts.get('builders', 0)} builders "
+               f"in {result['elapsed_ms']:.1f} ms")
+    if result["ok"]:
+        return summary
+    where = f" at line {result['error_line']}" if result.get("error_line") else ""
+    return f"{result['error']}{where} ({summary})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dry-run NXOpen scripts against a recording mock.")
+    parser.add_argument("paths", nargs="*", help="Python scripts or directories of scripts")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--memory-mb", type=int, default=512)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker_main()
+        return
+
+    files = []
+    for path in args.paths:
+        files += [os.path.join(path, n) for n in sorted(os.listdir(path)) if n.endswith(".py")] \
+            if os.path.isdir(path) else [path]
+    pool = DryRunPool(workers=args.workers, timeout=args.timeout, memory_mb=args.memory_mb)
+    start = time.perf_counter()
+    try:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            results = list(executor.map(lambda p: pool.run(read_source(p)), files))
+    finally:
+        pool.close()
+    for path, result in zip(files, results):
+        print(f"{path}: {'ok' if result['ok'] else 'FAIL'} - {format_result(result)}")
+    failed = sum(1 for r in results if not r["ok"])
+    print(f"{len(files)} scripts, {failed} failed in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
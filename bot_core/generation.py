@@ -0,0 +1,35 @@
+"""The code generation call shared by the app and the replay regression check (llm_replay verify).
+
+A generation is one completion, the Python code extracted from it and that code's quality
+checks. When the backend records traffic, the outcome is recorded next to the call so a later
+replay can check that extraction and validation still produce the same result.
+"""
+from bot_core.code_analysis import quality_checks, quality_score, summarize_code
+from bot_core.code_extract import extract_python_code
+
+
+def generation_result(code):
+    """Extracted code with its quality checks and score, as recorded and compared on replay."""
+    checks = quality_checks(summarize_code(code)) if code else {}
+    return {"code": code, "checks": checks, "quality_score": quality_score(checks) if code else 0}
+
+
+def generate_code(client, messages, model, max_tokens, temperature=0.05, example=None, cancel_event=None,
+                  stop_when=None):
+    """(extracted code or None, raw response text) for one generation call; errors propagate."""
+    completion = client.complete(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        task="generate",
+        example=example,
+        cancel_event=cancel_event,
+        stop_when=stop_when
+    )
+    response_text = completion.content or ""
+    code = extract_python_code(response_text)
+    record_result = getattr(client.backend, "record_result", None)
+    if record_result and completion.request_key:
+        record_result(completion.request_key, generation_result(code))
+    return code, response_text
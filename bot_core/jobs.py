@@ -0,0 +1,176 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when its cancel flag is seen."""
+
+
+class LinkedEvent:
+    """Event that also reads as set when any parent event is set (e.g. a job's cancel flag)."""
+
+    def __init__(self, *parents):
+        self._own = threading.Event()
+        self._parents = [p for p in parents if p is not None]
+
+    def set(self):
+        self._own.set()
+
+    def is_set(self):
+        return self._own.is_set() or any(p.is_set() for p in self._parents)
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.is_set():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._own.wait(0.1 if remaining is None else min(0.1, remaining))
+        return True
+
+
+class Job:
+    """A background generation with shared progress state and a cancel flag."""
+
+    def __init__(self, key, kind, ttl=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.kind = kind
+        # Seconds a finished job is kept; None uses the manager's ttl
+        self.ttl = ttl
+        self.status = "queued"
+        self.step = "Queued"
+        self.fraction = 0.0
+        self.notes = []
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.status in ACTIVE_STATES
+
+    def update(self, step, fraction=None):
+        """Report progress; also the point where a cancelled job stops."""
+        self.check_cancelled()
+        with self._lock:
+            self.step = step
+            if fraction is not None:
+                self.fraction = max(0.0, min(1.0, fraction))
+
+    def note(self, level, message):
+        """Queue a message ("info", "success", "warning", "error") for the UI to show on completion."""
+        with self._lock:
+            self.notes.append((level, message))
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def wait(self, timeout=None):
+        """Block until the job has finished, whatever its outcome; False on timeout."""
+        return self._done.wait(timeout)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "step": self.step,
+                "fraction": self.fraction,
+                "elapsed": (self.finished or time.time()) - self.created,
+            }
+
+
+class JobManager:
+    """Runs jobs on a thread pool; submitting a key that is already running attaches to it."""
+
+    def __init__(self, max_workers=4, ttl=1800):
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, kind, fn, *args, ttl=None, **kwargs):
+        """Start fn(job, *args, **kwargs) in the background unless a job with this key is active.
+
+        ttl overrides how long this job is kept once finished (e.g. short for prefetches).
+        """
+        with self._lock:
+            self._prune()
+            existing = self._jobs.get(self._by_key.get(key))
+            if existing and existing.active:
+                return existing
+            job = Job(key, kind, ttl)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            job.check_cancelled()
+            job.status = "running"
+            result = fn(job, *args, **kwargs)
+            job.check_cancelled()
+            job.result = result
+            job.fraction = 1.0
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            if job.cancel_event.is_set():
+                job.status = "cancelled"
+            else:
+                job.error = str(e)
+                job.status = "failed"
+        finally:
+            job.finished = time.time()
+            job._done.set()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, key):
+        with self._lock:
+            return self._jobs.get(self._by_key.get(key))
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job:
+            job.cancel()
+        return job
+
+    def discard(self, job_id):
+        """Forget a finished job so its key starts fresh work next time."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job and self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
+        return job
+
+    def active_jobs(self):
+        with self._lock:
+            return [job for job in self._jobs.values() if job.active]
+
+    def _prune(self):
+        now = time.time()
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.finished and j.finished < now - (self.ttl if j.ttl is None else j.ttl)]:
+            job = self._jobs.pop(job_id)
+            if self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
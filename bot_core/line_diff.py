@@ -0,0 +1,250 @@
+"""Line diff between a reference example and generated code: patience anchors, Myers in between.
+
+    python -m bot_core.line_diff nx_examples/block.py generated.py
+
+Lines are interned to integers (trailing whitespace ignored), so every comparison is an int
+compare. Lines unique to both sides anchor the alignment (patience diff); the stretches
+between anchors are aligned with Myers' O(ND) algorithm in linear space, up to MAX_EDIT_COST
+edits per stretch; beyond that the stretch is reported as one replace block.
+"""
+import argparse
+import time
+from bisect import bisect_left
+
+from bot_core.code_analysis import cached_analysis, code_hash, read_source
+
+CONTEXT_LINES = 3
+# Edits allowed in one stretch between anchors before it is shown as a single replace block;
+# Myers costs O((N+M)*D), so this bounds the worst case (unrelated files) to tens of ms
+MAX_EDIT_COST = 400
+
+
+def _intern(a_lines, b_lines):
+    ids = {}
+    a = [ids.setdefault(line.rstrip(), len(ids)) for line in a_lines]
+    b = [ids.setdefault(line.rstrip(), len(ids)) for line in b_lines]
+    return a, b
+
+
+def _middle_snake(a, alo, ahi, b, blo, bhi, max_cost):
+    """(x, y, u, v): the middle snake of a shortest edit script, from a[x]/b[y] to a[u]/b[v].
+
+    Forward and reverse searches meet halfway, so only one row of endpoints per direction is kept.
+    None when the edit script is longer than max_cost.
+    """
+    n, m = ahi - alo, bhi - blo
+    delta = n - m
+    odd = delta % 2 == 1
+    limit = min((n + m + 1) // 2, (max_cost + 1) // 2)
+    offset = limit + 1
+    forward = [0] * (2 * offset + 1)
+    reverse = [0] * (2 * offset + 1)
+    for d in range(limit + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x_start, y_start = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if odd and -d < delta - k < d and x + reverse[offset + delta - k] >= n:
+                return x_start, y_start, x, y
+        for k in range(-d, d + 1, 2):
+            # Reverse search runs on the reversed sequences; diagonal k here is delta - k forward
+            if k == -d or (k != d and reverse[offset + k - 1] < reverse[offset + k + 1]):
+                x = reverse[offset + k + 1]
+            else:
+                x = reverse[offset + k - 1] + 1
+            y = x - k
+            x_start, y_start = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            reverse[offset + k] = x
+            if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+                return n - x, m - y, n - x_start, m - y_start
+    return None
+
+
+def _myers(a, alo, ahi, b, blo, bhi, matches, max_cost=MAX_EDIT_COST):
+    """Append the matched (i, j) pairs of a shortest edit script for a[alo:ahi] vs b[blo:bhi].
+
+    Linear-space divide and conquer on the middle snake. A stretch that needs more than
+    max_cost edits gets no matches at all and is shown as one replace block.
+    """
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        matches.append((alo, blo))
+        alo += 1
+        blo += 1
+    suffix = []
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+        suffix.append((ahi, bhi))
+    if alo < ahi and blo < bhi:
+        snake = _middle_snake(a, alo, ahi, b, blo, bhi, max_cost)
+        if snake is not None:
+            x, y, u, v = snake
+            _myers(a, alo, alo + x, b, blo, blo + y, matches, max_cost)
+            matches.extend((alo + i, blo + i - x + y) for i in range(x, u))
+            _myers(a, alo + u, ahi, b, blo + v, bhi, matches, max_cost)
+    matches.extend(reversed(suffix))
+
+
+def _unique_anchors(a, alo, ahi, b, blo, bhi):
+    """(i, j) for lines occurring exactly once on each side, longest increasing run in j."""
+    counts = {}
+    for i in range(alo, ahi):
+        entry = counts.get(a[i])
+        counts[a[i]] = [1, i, None] if entry is None else [entry[0] + 1, i, None]
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None and entry[0] == 1:
+            entry[2] = j if entry[2] is None else -1
+    pairs = sorted((entry[1], entry[2]) for entry in counts.values()
+                   if entry[0] == 1 and entry[2] is not None and entry[2] >= 0)
+    # Patience sorting: longest chain of pairs increasing in both i and j
+    tails, tail_index, back = [], [], []
+    for index, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[pos] = j
+            tail_index[pos] = index
+        back.append(tail_index[pos - 1] if pos else -1)
+    chain = []
+    index = tail_index[-1] if tail_index else -1
+    while index >= 0:
+        chain.append(pairs[index])
+        index = back[index]
+    return chain[::-1]
+
+
+def _align(a, alo, ahi, b, blo, bhi, matches):
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        matches.append((alo, blo))
+        alo += 1
+        blo += 1
+    suffix = []
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+        suffix.append((ahi, bhi))
+    if alo < ahi and blo < bhi:
+        anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+        if anchors:
+            for i, j in anchors:
+                _align(a, alo, i, b, blo, j, matches)
+                matches.append((i, j))
+                alo, blo = i + 1, j + 1
+            _align(a, alo, ahi, b, blo, bhi, matches)
+        else:
+            _myers(a, alo, ahi, b, blo, bhi, matches)
+    matches.extend(reversed(suffix))
+
+
+def _opcodes(matches, n, m):
+    """difflib-style (tag, i1, i2, j1, j2) covering both sequences."""
+    opcodes = []
+    i = j = 0
+    for mi, mj in matches + [(n, m)]:
+        if i < mi or j < mj:
+            tag = "replace" if i < mi and j < mj else ("delete" if i < mi else "insert")
+            opcodes.append([tag, i, mi, j, mj])
+        if mi < n and mj < m:
+            if opcodes and opcodes[-1][0] == "equal":
+                opcodes[-1][2], opcodes[-1][4] = mi + 1, mj + 1
+            else:
+                opcodes.append(["equal", mi, mi + 1, mj, mj + 1])
+        i, j = mi + 1, mj + 1
+    return [tuple(op) for op in opcodes]
+
+
+def _diff(pair):
+    reference, generated = pair
+    a_lines = reference.lstrip("\ufeff").splitlines()
+    b_lines = generated.lstrip("\ufeff").splitlines()
+    a, b = _intern(a_lines, b_lines)
+    matches = []
+    _align(a, 0, len(a), b, 0, len(b), matches)
+    opcodes = _opcodes(matches, len(a), len(b))
+    reused = sum(1 for _, j in matches if b_lines[j].strip())
+    generated_lines = sum(1 for line in b_lines if line.strip())
+    return {
+        "opcodes": opcodes,
+        "reference_lines": len(a_lines),
+        "generated_lines": len(b_lines),
+        "unchanged": len(matches),
+        "added": sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag != "equal"),
+        "removed": sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag != "equal"),
+        # Share of the generated (non-blank) lines taken over verbatim from the reference
+        "reuse_ratio": reused / generated_lines if generated_lines else 0.0,
+    }
+
+
+def diff_lines(reference, generated):
+    """Opcodes, line counts and reuse ratio for generated code against its reference example (cached)."""
+    # The texts travel as a pair: no separator is safe, UTF-16 examples read as UTF-8 are full of NULs
+    pair = (reference or "", generated or "")
+    return cached_analysis("line_diff", pair, _diff, key=(code_hash(pair[0]), code_hash(pair[1])))
+
+
+def side_by_side(reference, generated, result, context=CONTEXT_LINES):
+    """Equal-length left/right line lists in `diff` notation, unchanged runs cut to context lines.
+
+    Rendered as two code blocks next to each other the rows line up.
+    """
+    a_lines = (reference or "").lstrip("\ufeff").splitlines()
+    b_lines = (generated or "").lstrip("\ufeff").splitlines()
+    left, right = [], []
+    opcodes = result["opcodes"]
+    for index, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+        if tag == "equal":
+            rows = list(zip(range(i1, i2), range(j1, j2)))
+            head = rows[:context] if index else []
+            tail = rows[-context:] if index < len(opcodes) - 1 else []
+            if len(rows) > len(head) + len(tail):
+                skipped = len(rows) - len(head) - len(tail)
+                rows = head + [None] + tail
+            for row in rows:
+                if row is None:
+                    left.append(f"@@ {skipped} unchanged lines @@")
+                    right.append(f"@@ {skipped} unchanged lines @@")
+                else:
+                    left.append(f"  {a_lines[row[0]]}")
+                    right.append(f"  {b_lines[row[1]]}")
+            continue
+        removed = [f"- {line}" for line in a_lines[i1:i2]]
+        added = [f"+ {line}" for line in b_lines[j1:j2]]
+        height = max(len(removed), len(added))
+        left += removed + [""] * (height - len(removed))
+        right += added + [""] * (height - len(added))
+    return left, right
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Line diff and reuse ratio of a script against a reference.")
+    parser.add_argument("reference")
+    parser.add_argument("generated")
+    args = parser.parse_args()
+
+    reference, generated = read_source(args.reference), read_source(args.generated)
+    start = time.perf_counter()
+    result = _diff((reference, generated))
+    elapsed = (time.perf_counter() - start) * 1000
+    left, right = side_by_side(reference, generated, result)
+    width = max((len(line) for line in left), default=0)
+    for l_line, r_line in zip(left, right):
+        print(f"{l_line:<{width}} | {r_line}")
+    print(f"{result['unchanged']} unchanged, {result['removed']} removed, {result['added']} added, "
+          f"reuse {result['reuse_ratio']:.0%} in {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import os
+import threading
+import time
+
+
+class CallCancelled(Exception):
+    """Raised when a caller cancels a completion, before it is sent or mid-stream."""
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) used for budgeting before a call."""
+    return max(1, len(text or "") // 4)
+
+
+def _close_when_cancelled(stream, cancel_event, finished):
+    """Close the stream as soon as cancel_event is set, even while a read is blocked on it."""
+    while not finished.is_set():
+        if cancel_event.wait(0.2):
+            if not finished.is_set():
+                stream.close()
+            return
+
+
+def _chunk_usage(chunk):
+    # OpenAI reports usage on the final chunk; Groq nests it under x_groq
+    return getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+
+
+class Completion:
+    """Provider-neutral result of a chat completion call."""
+
+    def __init__(self, content, model, prompt_tokens=0, completion_tokens=0, latency=0.0, finish_reason=None,
+                 ttft=None, stopped_early=False):
+        self.content = content
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.latency = latency
+        self.finish_reason = finish_reason
+        # Seconds until the first streamed token; None when the response was not streamed
+        self.ttft = ttft
+        # True when a stop_when watcher cut the stream; saved_* are estimates set by LLMClient
+        self.stopped_early = stopped_early
+        self.saved_tokens = 0
+        self.saved_seconds = 0.0
+        # Hash of the request, set by the recording and replay backends (see llm_replay.request_key)
+        self.request_key = None
+
+
+def _pooled_http_client(max_connections, timeout):
+    import httpx
+
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=60.0,
+        ),
+        timeout=timeout,
+    )
+
+
+class ChatBackend:
+    """Interface every LLM provider implements: one blocking chat completion per call.
+
+    When cancel_event is given the call must abort with CallCancelled once it is set,
+    even while the response is still streaming in. stop_when is a factory for a watcher
+    whose feed(delta) returns True when the rest of the response is not needed.
+    """
+
+    name = "base"
+
+    def chat(self, request, timeout, cancel_event=None, stop_when=None):
+        raise NotImplementedError
+
+
+class SDKBackend(ChatBackend):
+    """Backend for SDKs exposing client.chat.completions.create (Groq and OpenAI share this shape)."""
+
+    stream_options = {}
+
+    def __init__(self, sdk_client, model_override=None):
+        self.sdk_client = sdk_client
+        self.model_override = model_override
+
+    def chat(self, request, timeout, cancel_event=None, stop_when=None):
+        if self.model_override:
+            request = dict(request, model=self.model_override)
+        # Stream everything except JSON mode (not streamable on every provider) so
+        # time-to-first-token is measured and cancellation can close the connection
+        if not request.get("response_format"):
+            return self._chat_streaming(request, timeout, cancel_event, stop_when)
+        raw = self.sdk_client.chat.completions.create(timeout=timeout, **request)
+        usage = getattr(raw, "usage", None)
+        choice = raw.choices[0]
+        return Completion(
+            content=choice.message.content,
+            model=getattr(raw, "model", None) or request["model"],
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            finish_reason=getattr(choice, "finish_reason", None),
+        )
+
+    def _chat_streaming(self, request, timeout, cancel_event=None, stop_when=None):
+        """Stream the response so a cancel (or the stop watcher) closes the HTTP connection early."""
+        if cancel_event is not None and cancel_event.is_set():
+            raise CallCancelled("Completion cancelled before it was sent")
+        start = time.time()
+        stream = self.sdk_client.chat.completions.create(timeout=timeout, stream=True,
+                                                         **self.stream_options, **request)
+        parts = []
+        usage = None
+        finish_reason = None
+        ttft = None
+        model = request["model"]
+        watcher = stop_when() if stop_when else None
+        stopped_early = False
+        finished = threading.Event()
+        if cancel_event is not None and getattr(stream, "close", None):
+            threading.Thread(target=_close_when_cancelled, args=(stream, cancel_event, finished),
+                             daemon=True).start()
+        try:
+            for chunk in stream:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise CallCancelled("Completion cancelled mid-stream")
+                usage = _chunk_usage(chunk) or usage
+                model = getattr(chunk, "model", None) or model
+                for choice in chunk.choices or []:
+                    if choice.delta and choice.delta.content:
+                        if ttft is None:
+                            ttft = time.time() - start
+                        parts.append(choice.delta.content)
+                        if watcher is not None and watcher.feed(choice.delta.content):
+                            stopped_early = True
+                    finish_reason = choice.finish_reason or finish_reason
+                if stopped_early:
+                    finish_reason = "early_stop"
+                    break
+        except Exception:
+            if cancel_event is not None and cancel_event.is_set():
+                # The read failed because the stream was closed under it
+                raise CallCancelled("Completion cancelled mid-stream") from None
+            raise
+        finally:
+            finished.set()
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+
+        content = "".join(parts)
+        return Completion(
+            content=content,
+            model=model,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or sum(
+                estimate_tokens(m.get("content")) for m in request["messages"]),
+            completion_tokens=getattr(usage, "completion_tokens", 0) or estimate_tokens(content),
+            finish_reason=finish_reason,
+            ttft=ttft,
+            stopped_early=stopped_early,
+        )
+
+
+class GroqBackend(SDKBackend):
+    name = "groq"
+
+    def __init__(self, api_key, max_connections=8, timeout=60.0, model_override=None):
+        from groq import Groq
+
+        # Retries are left to LLMClient so rate limits are handled in one place
+        client = Groq(api_key=api_key, http_client=_pooled_http_client(max_connections, timeout), max_retries=0)
+        super().__init__(client, model_override)
+
+
+class OpenAICompatibleBackend(SDKBackend):
+    name = "openai"
+    stream_options = {"stream_options": {"include_usage": True}}
+
+    def __init__(self, api_key, base_url=None, max_connections=8, timeout=60.0, model_override=None):
+        from openai import OpenAI
+
+        client = OpenAI(
+            api_key=api_key or "not-needed",
+            base_url=base_url,
+            http_client=_pooled_http_client(max_connections, timeout),
+            max_retries=0,
+        )
+        super().__init__(client, model_override)
+
+
+BACKENDS = {
+    "groq": GroqBackend,
+    "openai": OpenAICompatibleBackend,
+}
+
+
+def backend_from_env(groq_api_key=None, max_connections=8, timeout=60.0):
+    """Build the backend selected by NXBOT_LLM_BACKEND (groq by default).
+
+    NXBOT_LLM_REPLAY serves a recorded JSONL file instead of any provider, and
+    NXBOT_LLM_RECORD appends every live call to a JSONL file.
+    """
+    from bot_core.llm_replay import RecordingBackend, ReplayBackend
+
+    replay_path = os.getenv("NXBOT_LLM_REPLAY")
+    if replay_path:
+        return ReplayBackend(replay_path, speed=float(os.getenv("NXBOT_LLM_REPLAY_SPEED", "1.0")))
+
+    name = os.getenv("NXBOT_LLM_BACKEND", "groq").lower()
+    model_override = os.getenv("NXBOT_LLM_MODEL") or None
+    if name == "groq":
+        backend = GroqBackend(groq_api_key, max_connections, timeout, model_override)
+    elif name == "openai":
+        backend = OpenAICompatibleBackend(
+            os.getenv("NXBOT_LLM_API_KEY") or os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("NXBOT_LLM_BASE_URL") or None,
+            max_connections=max_connections,
+            timeout=timeout,
+            model_override=model_override,
+        )
+    else:
+        raise ValueError(f"Unknown LLM backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+
+    record_path = os.getenv("NXBOT_LLM_RECORD")
+    return RecordingBackend(backend, record_path) if record_path else backend
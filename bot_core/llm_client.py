@@ -0,0 +1,324 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from bot_core.code_extract import trailing_text
+from bot_core.jobs import LinkedEvent
+from bot_core.llm_backends import CallCancelled, estimate_tokens
+
+logger = logging.getLogger("nx_codebot.llm")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = ("APITimeoutError", "APIConnectionError", "Timeout", "ConnectError", "ReadError")
+# "ms" is listed before "m" so "150ms" is never read as 150 minutes
+DURATION_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_RE = re.compile(r"(?:\d+(?:\.\d+)?(?:ms|h|m|s))+")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class CallTimeout(Exception):
+    """A call did not complete within LLMClient.timeout (retryable, like an SDK timeout)."""
+
+
+class TokenBucket:
+    """Per-minute budget that refills continuously; acquire blocks until enough is available."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, amount):
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def acquire(self, amount, cancel_event=None):
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise CallCancelled("Completion cancelled while waiting for rate limit budget")
+            delay = self.try_acquire(amount)
+            if delay <= 0:
+                return
+            if cancel_event is not None:
+                cancel_event.wait(min(delay, 1.0))
+            else:
+                time.sleep(min(delay, 1.0))
+
+    def refund(self, amount):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + max(0.0, float(amount)))
+
+
+def _status_code(exc):
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def parse_duration(value):
+    """Seconds in "2", "1.5s", "150ms" or Groq's "1m3.5s" / "2h1m"; None when unparseable."""
+    value = str(value).strip().lower()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if not DURATION_RE.fullmatch(value):
+        return None
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in DURATION_PART_RE.findall(value))
+
+
+def _retry_after(exc):
+    """Seconds the provider asked us to wait, from retry-after style headers."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    for header in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(header)
+        if not value:
+            continue
+        seconds = parse_duration(value)
+        if seconds is not None:
+            return max(0.0, seconds)
+    return None
+
+
+def is_retryable(exc):
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return any(name in type(exc).__name__ for name in RETRYABLE_ERRORS)
+
+
+class LLMClient:
+    """Shared, rate-limited entry point for every chat completion the app makes."""
+
+    def __init__(self, backend, requests_per_minute=30, tokens_per_minute=12000, max_concurrency=4,
+                 max_retries=4, timeout=60.0, backoff_base=1.0, backoff_cap=30.0,
+                 hedge_percentile=0.95, hedge_min_samples=20, router=None, telemetry=None,
+                 early_stop_calibration=20):
+        self.backend = backend
+        self.router = router
+        self.telemetry = telemetry
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        # Every Nth call with a stop watcher runs to the end to measure what stopping saves
+        self.early_stop_calibration = early_stop_calibration
+        self._stop_calls = 0
+        self._trailers = deque(maxlen=50)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix="llm")
+        self._latencies = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "hedged": 0, "hedge_wins": 0,
+                      "early_stops": 0, "saved_tokens": 0, "saved_seconds": 0.0}
+
+    def hedge_threshold(self):
+        """Latency above which a duplicate request is sent, or None until enough samples exist."""
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile))]
+
+    def _budget(self, messages, max_tokens):
+        prompt = sum(estimate_tokens(m.get("content")) for m in messages)
+        return prompt + max_tokens
+
+    def _call(self, request, cancel_event=None, stop_when=None):
+        """One request; self.timeout bounds the whole call (the SDK only applies it per read)."""
+        start = time.time()
+        expired = threading.Event()
+        leg = LinkedEvent(cancel_event, expired)
+        deadline = threading.Timer(self.timeout, expired.set)
+        deadline.daemon = True
+        with self._slots:
+            deadline.start()
+            try:
+                completion = self.backend.chat(request, self.timeout, leg, stop_when)
+            except CallCancelled:
+                if expired.is_set() and not (cancel_event is not None and cancel_event.is_set()):
+                    raise CallTimeout(f"No complete response within {self.timeout:g}s") from None
+                raise
+            finally:
+                deadline.cancel()
+        completion.latency = time.time() - start
+        return completion
+
+    def _hedged_call(self, request, budget, cancel_event=None, stop_when=None):
+        threshold = self.hedge_threshold()
+        # Each leg has its own cancel flag so the loser of a hedge can be stopped
+        primary_cancel = LinkedEvent(cancel_event)
+        primary = self._executor.submit(self._call, request, primary_cancel, stop_when)
+        if threshold is None:
+            return primary.result()
+
+        done, _ = wait([primary], timeout=threshold)
+        if done:
+            return primary.result()
+        # Only hedge when the budget allows it right now; never queue behind the primary
+        if self.request_bucket.try_acquire(1) > 0:
+            return primary.result()
+        if self.token_bucket.try_acquire(budget) > 0:
+            self.request_bucket.refund(1)
+            return primary.result()
+
+        with self._lock:
+            self.stats["hedged"] += 1
+        hedge_cancel = LinkedEvent(cancel_event)
+        hedge = self._executor.submit(self._call, request, hedge_cancel, stop_when)
+        legs = {primary: primary_cancel, hedge: hedge_cancel}
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self.stats["hedge_wins"] += 1
+                    # Stop the other leg: it would keep streaming, holding a slot and spending tokens
+                    for other in pending:
+                        legs[other].set()
+                    # The winner's unused budget is refunded by the caller; the second leg's here
+                    self.token_bucket.refund(budget)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def complete(self, messages, model, temperature=0.2, max_tokens=1024, task=None, example=None,
+                 cancel_event=None, stop_when=None, **extra):
+        """Run a chat completion with rate limiting, retries, timeout and latency hedging.
+
+        task ("generate", "explain", "similarity", ...) and example let the router pick
+        the model and size max_tokens; the caller's model and max_tokens are the baseline.
+        Setting cancel_event aborts the call, closing a response that is still streaming.
+        stop_when (e.g. code_extract.FenceWatcher) ends the stream as soon as its watcher
+        has seen what the caller needs.
+        """
+        decision = None
+        if self.router:
+            prompt_tokens = sum(estimate_tokens(m.get("content")) for m in messages)
+            decision = self.router.route(task, model, max_tokens, example=example, prompt_tokens=prompt_tokens)
+            model, routed_max_tokens = decision["model"], decision["max_tokens"]
+        else:
+            routed_max_tokens = max_tokens
+
+        completion = self._complete(dict(model=model, messages=messages, temperature=temperature,
+                                         max_tokens=routed_max_tokens, **extra), cancel_event, task, example,
+                                    stop_when)
+        if decision:
+            self.router.observe(decision, completion)
+            if completion.finish_reason == "length" and routed_max_tokens < max_tokens:
+                # Adaptive cap cut the answer short; pay once more at the caller's budget
+                completion = self._complete(dict(model=model, messages=messages, temperature=temperature,
+                                                 max_tokens=max_tokens, **extra), cancel_event, task, example,
+                                            stop_when)
+        return completion
+
+    def _complete(self, request, cancel_event=None, task=None, example=None, stop_when=None):
+        """One logical call (retries included), logged to telemetry whatever the outcome."""
+        calibrate = False
+        if stop_when is not None and self.early_stop_calibration:
+            with self._lock:
+                calibrate = self._stop_calls % self.early_stop_calibration == 0
+                self._stop_calls += 1
+        start = time.time()
+        try:
+            completion = self._complete_with_retries(request, cancel_event, None if calibrate else stop_when)
+        except Exception as exc:
+            if self.telemetry:
+                status = "cancelled" if isinstance(exc, CallCancelled) else "error"
+                self.telemetry.record(task, request["model"], latency=time.time() - start,
+                                      status=status, example=example)
+            raise
+        if stop_when is not None:
+            self._account_early_stop(completion, stop_when, calibrate, task)
+        if self.telemetry:
+            self.telemetry.record(task, request["model"], completion, example=example)
+        return completion
+
+    def _account_early_stop(self, completion, stop_when, calibrated, task=None):
+        """Measure the tail of full responses and credit early-stopped ones with its median."""
+        if calibrated:
+            if completion.finish_reason != "length":
+                trailer = trailing_text(completion.content, stop_when)
+                with self._lock:
+                    self._trailers.append(estimate_tokens(trailer) if trailer.strip() else 0)
+            return
+        if not completion.stopped_early:
+            return
+        with self._lock:
+            self.stats["early_stops"] += 1
+            trailers = sorted(self._trailers)
+        if not trailers:
+            return
+        completion.saved_tokens = trailers[len(trailers) // 2]
+        generation_time = completion.latency - (completion.ttft or 0.0)
+        if completion.completion_tokens and generation_time > 0:
+            completion.saved_seconds = completion.saved_tokens * generation_time / completion.completion_tokens
+        with self._lock:
+            self.stats["saved_tokens"] += completion.saved_tokens
+            self.stats["saved_seconds"] += completion.saved_seconds
+        logger.info("early stop task=%s used=%d saved~%d tokens ~%.2fs", task, completion.completion_tokens,
+                    completion.saved_tokens, completion.saved_seconds)
+
+    def _complete_with_retries(self, request, cancel_event=None, stop_when=None):
+        budget = self._budget(request["messages"], request["max_tokens"])
+
+        for attempt in range(self.max_retries + 1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise CallCancelled("Completion cancelled before it was sent")
+            self.request_bucket.acquire(1, cancel_event)
+            try:
+                self.token_bucket.acquire(budget, cancel_event)
+            except CallCancelled:
+                self.request_bucket.refund(1)
+                raise
+            try:
+                completion = self._hedged_call(request, budget, cancel_event, stop_when)
+            except Exception as exc:
+                if attempt >= self.max_retries or not is_retryable(exc):
+                    raise
+                delay = _retry_after(exc)
+                with self._lock:
+                    self.stats["retries"] += 1
+                    if _status_code(exc) == 429:
+                        self.stats["rate_limited"] += 1
+                if delay is None:
+                    delay = min(self.backoff_cap, self.backoff_base * 2 ** attempt) * (0.5 + random.random() / 2)
+                # A provider hint never holds a job longer than our own backoff would
+                delay = min(delay, self.backoff_cap)
+                if cancel_event is not None:
+                    cancel_event.wait(delay)
+                else:
+                    time.sleep(delay)
+                continue
+
+            with self._lock:
+                self.stats["calls"] += 1
+                self._latencies.append(completion.latency)
+            used = completion.prompt_tokens + completion.completion_tokens
+            if used:
+                self.token_bucket.refund(budget - used)
+            return completion
@@ -0,0 +1,208 @@
+"""Record LLM traffic to JSONL and replay it deterministically.
+
+    NXBOT_LLM_RECORD=llm_traffic.jsonl streamlit run app.py     # record real calls
+    NXBOT_LLM_REPLAY=llm_traffic.jsonl streamlit run app.py     # serve them back offline
+    python -m bot_core.llm_replay verify llm_traffic.jsonl      # replay the generate flow and compare
+
+Besides one record per call, a recording holds a "result" record for every code generation
+(bot_core.generation): the extracted code and its quality checks. verify drives the same
+generate flow with the replayed responses and reports where the code or the checks now differ.
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+
+from bot_core.llm_backends import CallCancelled, ChatBackend, Completion
+
+KEY_FIELDS = ("model", "messages", "temperature", "max_tokens", "response_format")
+RESULT_FIELDS = ("code", "checks", "quality_score")
+
+
+class ReplayMiss(LookupError):
+    """Raised when a request was never recorded; never retried by LLMClient."""
+
+
+def request_key(request):
+    """Stable hash of the fields that determine a completion."""
+    payload = {field: request.get(field) for field in KEY_FIELDS}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:24]
+
+
+def load_records(path, kind="call"):
+    """Records of one kind: "call" (request and response) or "result" (a generation's outcome)."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                if record.get("kind", "call") == kind:
+                    records.append(record)
+    return records
+
+
+class RecordingBackend(ChatBackend):
+    """Pass-through backend that appends every request, response and timing to a JSONL file."""
+
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.path = path
+        self.name = f"{inner.name}+record"
+        self._lock = threading.Lock()
+
+    def chat(self, request, timeout, cancel_event=None, stop_when=None):
+        start = time.time()
+        completion = self.inner.chat(request, timeout, cancel_event, stop_when)
+        record = {
+            "key": request_key(request),
+            "timestamp": start,
+            "latency": time.time() - start,
+            "ttft": completion.ttft,
+            "request": {field: request.get(field) for field in KEY_FIELDS if field in request},
+            "response": {
+                "content": completion.content,
+                "model": completion.model,
+                "prompt_tokens": completion.prompt_tokens,
+                "completion_tokens": completion.completion_tokens,
+                "finish_reason": completion.finish_reason,
+                "stopped_early": completion.stopped_early,
+            },
+        }
+        self._append(record)
+        completion.request_key = record["key"]
+        return completion
+
+    def record_result(self, key, result):
+        """Append what the app made of the response to request key (see bot_core.generation)."""
+        self._append({"kind": "result", "key": key, "timestamp": time.time(), "result": result})
+
+    def _append(self, record):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+class ReplayBackend(ChatBackend):
+    """Serves recorded responses by request key, reproducing each one's recorded latency.
+
+    Identical requests recorded several times are served in recording order and then cycle.
+    Recorded responses already reflect any early stop, so stop_when is not applied again.
+    """
+
+    name = "replay"
+
+    def __init__(self, path, honor_latency=True, speed=1.0):
+        self.honor_latency = honor_latency
+        self.speed = speed
+        self._records = defaultdict(list)
+        self._cursor = defaultdict(int)
+        self._lock = threading.Lock()
+        for record in load_records(path):
+            self._records[record["key"]].append(record)
+        self.stats = {"served": 0, "misses": 0}
+
+    def chat(self, request, timeout, cancel_event=None, stop_when=None):
+        key = request_key(request)
+        with self._lock:
+            candidates = self._records.get(key)
+            if not candidates:
+                self.stats["misses"] += 1
+                raise ReplayMiss(f"No recorded response for {request.get('model')} request {key}")
+            record = candidates[self._cursor[key] % len(candidates)]
+            self._cursor[key] += 1
+            self.stats["served"] += 1
+
+        if self.honor_latency:
+            delay = min(timeout or record["latency"], record["latency"] / self.speed)
+            if cancel_event is not None:
+                if cancel_event.wait(delay):
+                    raise CallCancelled("Replayed completion cancelled")
+            else:
+                time.sleep(delay)
+        response = record["response"]
+        completion = Completion(
+            content=response["content"],
+            model=response["model"],
+            prompt_tokens=response["prompt_tokens"],
+            completion_tokens=response["completion_tokens"],
+            finish_reason=response["finish_reason"],
+            ttft=record.get("ttft"),
+            stopped_early=response.get("stopped_early", False),
+        )
+        completion.request_key = key
+        return completion
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+def verify(path, speed=1.0, honor_latency=True):
+    """Run the generate flow for every recorded generation against the replayed responses.
+
+    Mismatches are generations whose extracted code, checks or score differ from what was
+    recorded; latency percentiles compare the replay with the recording.
+    """
+    from bot_core.generation import generate_code, generation_result
+    from bot_core.llm_client import LLMClient
+
+    records = load_records(path)
+    requests = {record["key"]: record["request"] for record in records}
+    backend = ReplayBackend(path, honor_latency=honor_latency, speed=speed)
+    client = LLMClient(backend, requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9,
+                       max_retries=0, hedge_min_samples=10 ** 9)
+    mismatches = []
+    replayed = []
+    results = load_records(path, kind="result")
+    for index, record in enumerate(results):
+        request = requests.get(record["key"])
+        if request is None:
+            mismatches.append({"index": index, "key": record["key"], "model": None, "fields": ["request missing"]})
+            continue
+        start = time.time()
+        code, _ = generate_code(client, request["messages"], request["model"], request["max_tokens"],
+                                temperature=request.get("temperature", 0.05))
+        replayed.append(time.time() - start)
+        expected, actual = record["result"], generation_result(code)
+        fields = [field for field in RESULT_FIELDS if expected.get(field) != actual[field]]
+        if fields:
+            mismatches.append({"index": index, "key": record["key"], "model": request["model"], "fields": fields})
+
+    recorded = [r["latency"] for r in records if r["key"] in {result["key"] for result in results}]
+    return {
+        "records": len(records),
+        "generations": len(results),
+        "mismatches": mismatches,
+        "recorded_p50": _percentile(recorded, 0.50),
+        "recorded_p95": _percentile(recorded, 0.95),
+        "replayed_p50": _percentile(replayed, 0.50) * speed,
+        "replayed_p95": _percentile(replayed, 0.95) * speed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded LLM traffic and compare it with the recording.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    verify_parser = sub.add_parser("verify", help="Replay recorded generations and report result/latency drift")
+    verify_parser.add_argument("path")
+    verify_parser.add_argument("--speed", type=float, default=1.0, help="Replay latency speed-up factor")
+    verify_parser.add_argument("--no-latency", action="store_true", help="Serve responses immediately")
+    args = parser.parse_args()
+
+    report = verify(args.path, speed=args.speed, honor_latency=not args.no_latency)
+    print(f"Replayed {report['generations']} generations ({report['records']} recorded calls), "
+          f"{len(report['mismatches'])} mismatches")
+    print(f"  latency p50 recorded={report['recorded_p50']:.3f}s replayed={report['replayed_p50']:.3f}s")
+    print(f"  latency p95 recorded={report['recorded_p95']:.3f}s replayed={report['replayed_p95']:.3f}s")
+    for mismatch in report["mismatches"]:
+        print(f"  mismatch #{mismatch['index']} {mismatch['model']} key={mismatch['key']}: "
+              f"{', '.join(mismatch['fields'])}")
+    raise SystemExit(1 if report["mismatches"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Drive concurrent AI-generation sessions against an LLM backend and report latency.
+
+    python -m bot_core.loadtest --standin --sessions 8 --rounds 5
+    python -m bot_core.loadtest --base-url http://127.0.0.1:8008/v1 --sessions 16
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bot_core.llm_backends import OpenAICompatibleBackend
+from bot_core.llm_client import LLMClient
+
+SESSION_CALLS = [
+    ("generate", "groq/compound", 4000,
+     "# REFERENCE EXAMPLE: block.py\nCreate a block {param1} x {param2} x {param3}"),
+    ("similarity", "llama-3.3-70b-versatile", 1500,
+     "Matched Example: \"block.py\" (Similarity Score: 85.00%)"),
+    ("explain", "llama-3.3-70b-versatile", 2000,
+     "Analyze and explain this NXOpen Python code in detail:\nimport NXOpen"),
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run_session(client):
+    """One user generation: generate, then similarity and explanation, like the app does."""
+    timings = []
+    for task, model, max_tokens, content in SESSION_CALLS:
+        completion = client.complete([{"role": "user", "content": content}], model=model,
+                                     temperature=0.1, max_tokens=max_tokens)
+        timings.append((task, completion.latency, completion.completion_tokens))
+    return timings
+
+
+def run_loadtest(client, sessions, rounds):
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(lambda _: run_session(client), range(sessions * rounds)))
+    elapsed = time.time() - start
+
+    report = {"sessions": sessions * rounds, "elapsed": elapsed, "tasks": {}}
+    for task, _, _, _ in SESSION_CALLS:
+        latencies = [lat for session in results for name, lat, _ in session if name == task]
+        tokens = sum(tok for session in results for name, _, tok in session if name == task)
+        report["tasks"][task] = {
+            "calls": len(latencies),
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "tokens": tokens,
+        }
+    report["sessions_per_second"] = report["sessions"] / elapsed if elapsed else 0.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the LLM client layer offline.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8008/v1")
+    parser.add_argument("--standin", action="store_true", help="Start an in-process stand-in server")
+    parser.add_argument("--latency", type=float, default=0.4)
+    parser.add_argument("--tokens-per-second", type=float, default=250.0)
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent user sessions")
+    parser.add_argument("--rounds", type=int, default=3, help="Generations per session")
+    parser.add_argument("--requests-per-minute", type=int, default=600)
+    parser.add_argument("--tokens-per-minute", type=int, default=1000000)
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if args.standin:
+        from bot_core.standin_server import serve
+
+        server = serve(port=0, latency=args.latency, tokens_per_second=args.tokens_per_second, background=True)
+        base_url = f"http://127.0.0.1:{server.server_port}/v1"
+
+    client = LLMClient(
+        OpenAICompatibleBackend("standin", base_url=base_url, max_connections=args.sessions),
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+        max_concurrency=args.sessions,
+    )
+    report = run_loadtest(client, args.sessions, args.rounds)
+
+    print(f"{report['sessions']} generations in {report['elapsed']:.2f}s "
+          f"({report['sessions_per_second']:.2f}/s)")
+    for task, stats in report["tasks"].items():
+        print(f"  {task:<11} calls={stats['calls']:<4} p50={stats['p50']:.3f}s "
+              f"p95={stats['p95']:.3f}s tokens={stats['tokens']}")
+    print(f"  client stats: {client.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+
+logger = logging.getLogger("nx_codebot.router")
+
+FAST_MODEL = os.getenv("NXBOT_FAST_MODEL", "llama-3.1-8b-instant")
+
+# Task -> model used when routing is on. Code synthesis keeps the large models.
+TASK_MODELS = {
+    "explain": FAST_MODEL,
+    "similarity": FAST_MODEL,
+    "generate": None,
+    "structured": None,
+    "repair": None,
+}
+
+# USD per million tokens (input, output); unknown models are costed like the 70B model
+MODEL_PRICING = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "groq/compound": (0.59, 0.79),
+}
+
+MIN_SAMPLES = 5
+HEADROOM = {"generate": 1.5, "structured": 1.5, "repair": 1.5}
+DEFAULT_HEADROOM = 1.25
+MIN_MAX_TOKENS = 256
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    price_in, price_out = MODEL_PRICING.get(model, MODEL_PRICING["llama-3.3-70b-versatile"])
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+class ModelRouter:
+    """Pick a model and max_tokens per task from a fixed policy and observed output lengths."""
+
+    def __init__(self, enabled=True, history=200):
+        self.enabled = enabled
+        self._lengths = defaultdict(lambda: deque(maxlen=history))
+        self._speed = defaultdict(lambda: deque(maxlen=history))
+        self._lock = threading.Lock()
+        self.decisions = deque(maxlen=500)
+
+    def _sized_max_tokens(self, task, example, requested):
+        with self._lock:
+            samples = list(self._lengths[(task, example)])
+            if len(samples) < MIN_SAMPLES:
+                samples = list(self._lengths[(task, None)])
+        if len(samples) < MIN_SAMPLES:
+            return requested
+        p95 = _percentile(samples, 0.95)
+        sized = int(p95 * HEADROOM.get(task, DEFAULT_HEADROOM)) + 64
+        return max(MIN_MAX_TOKENS, min(requested, sized))
+
+    def route(self, task, model, max_tokens, example=None, prompt_tokens=0):
+        """Return a decision dict with the model and max_tokens to use for this call."""
+        routed_model = model
+        routed_max = max_tokens
+        if self.enabled and task:
+            routed_model = TASK_MODELS.get(task) or model
+            routed_max = self._sized_max_tokens(task, example, max_tokens)
+        return {
+            "task": task,
+            "example": example,
+            "baseline_model": model,
+            "baseline_max_tokens": max_tokens,
+            "model": routed_model,
+            "max_tokens": routed_max,
+            "prompt_tokens": prompt_tokens,
+        }
+
+    def observe(self, decision, completion):
+        """Record the outcome of a routed call and log its cost and latency impact."""
+        task, example = decision["task"], decision["example"]
+        tokens = completion.completion_tokens
+        truncated = completion.finish_reason == "length"
+        if truncated:
+            # The cap was too tight: remember a longer output so the next sizing backs off
+            tokens = int(decision["max_tokens"] * 2)
+
+        tps = completion.completion_tokens / completion.latency if completion.latency else None
+        with self._lock:
+            if task:
+                self._lengths[(task, example)].append(tokens)
+                self._lengths[(task, None)].append(tokens)
+            if tps:
+                self._speed[decision["model"]].append(tps)
+            baseline_speed = list(self._speed[decision["baseline_model"]])
+
+        prompt_tokens = completion.prompt_tokens or decision["prompt_tokens"]
+        cost = estimate_cost(decision["model"], prompt_tokens, completion.completion_tokens)
+        baseline_cost = estimate_cost(decision["baseline_model"], prompt_tokens, completion.completion_tokens)
+        baseline_latency = None
+        if baseline_speed and decision["model"] != decision["baseline_model"]:
+            baseline_latency = completion.completion_tokens / _percentile(baseline_speed, 0.5)
+
+        entry = dict(decision, completion_tokens=completion.completion_tokens, latency=completion.latency,
+                     truncated=truncated, cost=cost, baseline_cost=baseline_cost,
+                     baseline_latency=baseline_latency)
+        self.decisions.append(entry)
+        logger.info(
+            "route task=%s example=%s model=%s (baseline %s) max_tokens=%d (baseline %d) "
+            "used=%d latency=%.2fs%s cost=$%.5f (baseline $%.5f)%s",
+            task, example, decision["model"], decision["baseline_model"], decision["max_tokens"],
+            decision["baseline_max_tokens"], completion.completion_tokens, completion.latency,
+            f" (baseline est. {baseline_latency:.2f}s)" if baseline_latency else "",
+            cost, baseline_cost, " TRUNCATED" if truncated else "",
+        )
+        return entry
+
+    def summary(self):
+        """Totals across logged decisions: actual vs. baseline cost."""
+        entries = list(self.decisions)
+        return {
+            "calls": len(entries),
+            "rerouted": sum(1 for e in entries if e["model"] != e["baseline_model"]),
+            "cost": sum(e["cost"] for e in entries),
+            "baseline_cost": sum(e["baseline_cost"] for e in entries),
+            "truncated": sum(1 for e in entries if e["truncated"]),
+        }
@@ -0,0 +1,194 @@
+"""Recording stand-in for the NXOpen package, generated on import from the mined symbol table.
+
+install() puts an import hook in place so `import NXOpen`, `import NXOpen.Features` and
+`from NXOpen import UF` resolve to mock modules. Every call is appended to the trace, and a
+member the symbol table has never seen on a known chain raises AttributeError as it would in NX.
+"""
+import importlib.abc
+import importlib.machinery
+import re
+import sys
+import types
+from collections import Counter
+
+from bot_core.api_symbols import load_symbol_table
+
+# Loops over mock collections (bodies, faces, features...) run this many iterations
+ITERATION_ITEMS = 2
+TRACE_LIMIT = 20000
+
+BUILDER_FACTORY_RE = re.compile(r"\.Create\w*Builder$")
+COUNTED_CALLS = {
+    "commits": re.compile(r"\.(?:Commit|CommitFeature|CommitCreateOnTheFly)$"),
+    "updates": re.compile(r"\.DoUpdate$"),
+    "builders": BUILDER_FACTORY_RE,
+    "destroys": re.compile(r"\.Destroy$"),
+    "undo_marks": re.compile(r"\.SetUndoMark$"),
+    "sessions": re.compile(r"\.GetSession$"),
+}
+
+
+class Trace:
+    """Ordered call log of one dry run."""
+
+    def __init__(self):
+        self.calls = []
+        self.dropped = 0
+
+    def record(self, path):
+        if len(self.calls) < TRACE_LIMIT:
+            self.calls.append(path)
+        else:
+            self.dropped += 1
+
+    def counts(self):
+        counts = {name: 0 for name in COUNTED_CALLS}
+        for path in self.calls:
+            for name, pattern in COUNTED_CALLS.items():
+                if pattern.search(path):
+                    counts[name] += 1
+        counts["calls"] = len(self.calls) + self.dropped
+        return counts
+
+    def top(self, n=15):
+        return Counter(self.calls).most_common(n)
+
+
+trace = Trace()
+_table = None
+
+
+def _checked_child(path, name):
+    """Resolve path.name, raising AttributeError for names the symbol table has never seen."""
+    child = f"{path}.{name}"
+    if _table is not None and path in _table.chains and child not in _table.chains and name not in _table.members:
+        raise AttributeError(f"'{path}' has no attribute '{name}'")
+    return child
+
+
+class Mock:
+    """Any NXOpen object: attribute access builds a path, calls are traced, values are benign."""
+
+    __slots__ = ("_path",)
+
+    def __init__(self, path):
+        object.__setattr__(self, "_path", path)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Mock(_checked_child(self._path, name))
+
+    def __setattr__(self, name, value):
+        trace.record(f"{self._path}.{name}=")
+
+    def __call__(self, *args, **kwargs):
+        trace.record(self._path)
+        if self._path == "NXOpen.Session.GetSession":
+            return Mock("theSession")
+        return Mock(self._path + "()")
+
+    def __iter__(self):
+        return iter([Mock(f"{self._path}[{i}]") for i in range(ITERATION_ITEMS)])
+
+    def __getitem__(self, key):
+        return Mock(f"{self._path}[]")
+
+    def __setitem__(self, key, value):
+        trace.record(f"{self._path}[]=")
+
+    def __len__(self):
+        return ITERATION_ITEMS
+
+    def __bool__(self):
+        return True
+
+    def __index__(self):
+        return ITERATION_ITEMS
+
+    __int__ = __index__
+
+    def __float__(self):
+        return 1.0
+
+    def __str__(self):
+        return self._path
+
+    __repr__ = __str__
+
+    def __format__(self, spec):
+        return format(str(self), spec) if not spec or spec[-1:] == "s" else format(1.0, spec)
+
+    def __eq__(self, other):
+        return isinstance(other, Mock) and other._path == self._path
+
+    def __hash__(self):
+        return hash(self._path)
+
+    def __instancecheck__(self, instance):
+        # `isinstance(obj, NXOpen.Features.Feature)` takes the branch the script expects
+        return True
+
+    def __subclasscheck__(self, subclass):
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _same(self, *args):
+        return self
+
+    __add__ = __radd__ = __sub__ = __rsub__ = __mul__ = __rmul__ = _same
+    __truediv__ = __rtruediv__ = __neg__ = __abs__ = _same
+    __lt__ = __le__ = __gt__ = __ge__ = lambda self, other: False
+
+
+class _MockModule(types.ModuleType):
+    def __getattr__(self, name):
+        # Class names are usually imported, never chained, so the table cannot vouch for them
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name.endswith(("Exception", "Error")):
+            # `except NXOpen.NXException` needs a real exception class
+            value = type(name, (Exception,), {"__module__": self.__name__})
+        else:
+            value = Mock(f"{self.__name__}.{name}")
+        setattr(self, name, value)
+        return value
+
+
+class _Finder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """Serves NXOpen and the namespaces under it that the symbol table knows."""
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname != "NXOpen" and not fullname.startswith("NXOpen."):
+            return None
+        if _table is not None and fullname not in _table.chains:
+            return None
+        return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+
+    def create_module(self, spec):
+        module = _MockModule(spec.name)
+        module.__path__ = []
+        return module
+
+    def exec_module(self, module):
+        pass
+
+
+def install(table=None):
+    """Route NXOpen imports to the mock; returns the shared trace."""
+    global _table
+    _table = table or load_symbol_table()
+    if not any(isinstance(finder, _Finder) for finder in sys.meta_path):
+        sys.meta_path.insert(0, _Finder())
+    return trace
+
+
+def reset():
+    """Start a fresh trace for the next script."""
+    trace.calls = []
+    trace.dropped = 0
@@ -0,0 +1,202 @@
+"""Static performance lint: expensive NXOpen calls made once per loop iteration.
+
+    python -m bot_core.perf_lint nx_examples
+"""
+import argparse
+import ast
+import os
+
+from bot_core.code_analysis import BUILDER_FACTORY_RE, COMMIT_METHODS, cached_analysis, parse_code, read_source
+
+COST_ORDER = ("low", "medium", "high")
+
+# rule -> (cost class, what happens, batched pattern to use instead)
+RULES = {
+    "commit": ("high", "builder Commit() per iteration rebuilds the model each time",
+               "set every iteration's parameters first and commit once per batch; unite.py adds every body "
+               "to one boolean builder inside the loop and commits once after it"),
+    "update": ("high", "UpdateManager.DoUpdate per iteration runs a full model update each time",
+               "set one undo mark before the loop and call DoUpdate(mark) once after it"),
+    "undo_mark": ("medium", "SetUndoMark per iteration fills the undo stack with one mark per item",
+                  "set a single undo mark before the loop so the batch undoes as one step"),
+    "builder": ("medium", "a builder is created (and destroyed) on every iteration",
+                "create the builder once before the loop and reuse it, as unite.py does with its boolean "
+                "builder"),
+    "display": ("medium", "the display is refreshed on every iteration",
+                "refresh or fit the view once after the loop"),
+    "session": ("low", "Session.GetSession() is looked up on every iteration",
+                "get the session once before the loop; ListFeatures.py fetches the session, work part and "
+                "listing window once and only writes inside the loop"),
+    "work_part": ("low", "Parts.Work is looked up on every iteration",
+                  "read Parts.Work once into workPart before the loop, as ListFeatures.py does"),
+    "listing_open": ("low", "the listing window is opened on every iteration",
+                     "open the listing window once before the loop (ListFeatures.py)"),
+}
+
+DISPLAY_METHODS = {"Refresh", "Fit", "UpdateDisplay", "Regenerate", "Redisplay"}
+
+
+def _rule_for(node):
+    """Rule name for an expensive call or attribute access, or None."""
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        name = node.func.attr
+        owner = node.func.value
+        if name in COMMIT_METHODS:
+            return "commit"
+        if name == "DoUpdate":
+            return "update"
+        if name == "SetUndoMark":
+            return "undo_mark"
+        if BUILDER_FACTORY_RE.match(name):
+            return "builder"
+        if name in DISPLAY_METHODS:
+            return "display"
+        if name == "GetSession":
+            return "session"
+        if name == "Open" and isinstance(owner, ast.Attribute) and owner.attr == "ListingWindow":
+            return "listing_open"
+    if isinstance(node, ast.Attribute) and node.attr == "Work" and isinstance(node.value, ast.Attribute) \
+            and node.value.attr == "Parts":
+        return "work_part"
+    return None
+
+
+def _escalate(cost, depth):
+    """Nested loops multiply the work: each extra level raises the cost class by one."""
+    index = min(len(COST_ORDER) - 1, COST_ORDER.index(cost) + max(0, depth - 1))
+    return COST_ORDER[index]
+
+
+LOOP_TYPES = (ast.For, ast.AsyncFor, ast.While)
+COMPREHENSION_TYPES = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+class _LoopScan:
+    """One pre-order pass recording expensive calls with their loop depth (iterative, no recursion)."""
+
+    def __init__(self, tree):
+        self.hits = []            # (node, rule, depth, loop line)
+        self.calls_in_loops = []  # (call node, function name, depth, loop line)
+        self.functions = {}
+        self._scan(tree)
+
+    def _scan(self, tree):
+        # Stack entries: (node, loop depth, innermost loop line); children pushed reversed keep source order
+        stack = [(tree, 0, None)]
+        pop, push = stack.pop, stack.append
+        while stack:
+            node, depth, loop_line = pop()
+            if isinstance(node, LOOP_TYPES):
+                # Target, iterable and test run once; only the body repeats
+                for child in reversed(node.orelse):
+                    push((child, depth, loop_line))
+                for child in reversed(node.body):
+                    push((child, depth + 1, node.lineno))
+                for field in ("test", "iter", "target"):
+                    child = getattr(node, field, None)
+                    if child is not None:
+                        push((child, depth, loop_line))
+                continue
+            if isinstance(node, COMPREHENSION_TYPES):
+                depth, loop_line = depth + 1, node.lineno
+            elif isinstance(node, FUNCTION_TYPES):
+                # Expensive calls anywhere in a function count when the function is called from a loop
+                self.functions[node.name] = node
+                depth, loop_line = 0, None
+            elif depth:
+                rule = _rule_for(node)
+                if rule:
+                    self.hits.append((node, rule, depth, loop_line))
+                if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+                    self.calls_in_loops.append((node, node.func.id, depth, loop_line))
+            children = []
+            for field in node._fields:
+                value = getattr(node, field, None)
+                if isinstance(value, list):
+                    children += [item for item in value if isinstance(item, ast.AST)]
+                elif isinstance(value, ast.AST):
+                    children.append(value)
+            for child in reversed(children):
+                push((child, depth, loop_line))
+
+
+def _rules_in(function):
+    rules = {}
+    for node in ast.walk(function):
+        rule = _rule_for(node)
+        if rule and rule not in rules:
+            rules[rule] = node.lineno
+    return rules
+
+
+def _finding(rule, line, depth, loop_line, via=None):
+    cost, problem, suggestion = RULES[rule]
+    message = problem if not via else f"{problem} (inside {via}(), which the loop calls)"
+    return {
+        "line": line,
+        "rule": rule,
+        "cost": _escalate(cost, depth),
+        "loop_line": loop_line,
+        "via": via,
+        "message": message,
+        "suggestion": suggestion,
+    }
+
+
+def _lint(code):
+    try:
+        tree = parse_code(code)
+    except (SyntaxError, ValueError) as e:
+        return {"parsed": False, "error": str(e), "findings": [], "counts": {}}
+
+    visitor = _LoopScan(tree)
+    findings = [_finding(rule, node.lineno, depth, loop_line) for node, rule, depth, loop_line in visitor.hits]
+    for call, name, depth, loop_line in visitor.calls_in_loops:
+        function = visitor.functions.get(name)
+        if function is None:
+            continue
+        for rule in _rules_in(function):
+            findings.append(_finding(rule, call.lineno, depth, loop_line, via=name))
+
+    unique = {}
+    for finding in findings:
+        unique.setdefault((finding["line"], finding["rule"], finding["via"]), finding)
+    findings = sorted(unique.values(), key=lambda f: (-COST_ORDER.index(f["cost"]), f["line"]))
+    counts = {cost: sum(1 for f in findings if f["cost"] == cost) for cost in COST_ORDER}
+    return {"parsed": True, "error": None, "findings": findings, "counts": counts}
+
+
+def lint_performance(code):
+    """Expensive calls inside loops with line numbers, cost class and a batched alternative (cached)."""
+    return cached_analysis("perf", code, _lint)
+
+
+def format_findings(result):
+    """Plain-text lines for reports."""
+    return [
+        f"[{f['cost'].upper()}] line {f['line']} (loop at line {f['loop_line']}): {f['message']}. "
+        f"Suggestion: {f['suggestion']}."
+        for f in result["findings"]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag expensive NXOpen calls inside loops.")
+    parser.add_argument("paths", nargs="+", help="Python scripts or directories of scripts")
+    args = parser.parse_args()
+
+    total = 0
+    for path in args.paths:
+        files = [os.path.join(path, n) for n in sorted(os.listdir(path)) if n.endswith(".py")] \
+            if os.path.isdir(path) else [path]
+        for script in files:
+            result = _lint(read_source(script))
+            for line in format_findings(result):
+                print(f"{script}: {line}")
+            total += len(result["findings"])
+    print(f"{total} findings")
+
+
+if __name__ == "__main__":
+    main()
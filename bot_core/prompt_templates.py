@@ -0,0 +1,25 @@
+from bot_core.llm_backends import estimate_tokens
+
+
+class CompiledPrompt:
+    """A prompt whose static part is built once; only the user request is appended per call.
+
+    The system text comes first and the example block next, so consecutive requests share
+    an identical prefix that providers can cache.
+    """
+
+    def __init__(self, system, prefix):
+        self.system = system
+        self.prefix = prefix
+        self.system_tokens = estimate_tokens(system)
+        self.prefix_tokens = estimate_tokens(prefix)
+
+    @property
+    def static_tokens(self):
+        return self.system_tokens + self.prefix_tokens
+
+    def messages(self, user_request):
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.prefix + user_request},
+        ]
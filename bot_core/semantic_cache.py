@@ -0,0 +1,256 @@
+import ast
+import io
+import re
+import threading
+import tokenize
+import time
+from collections import OrderedDict
+
+from scipy.sparse import vstack
+from sklearn.metrics.pairwise import cosine_similarity
+
+from bot_core.code_analysis import parse_code
+
+NUMBER_RE = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+WORD_RE = re.compile(r"\w+")
+
+# Prose fields of a stored generation in which prompt numbers are substituted on a hit;
+# the code is only rewritten at its parameter sites (see parameter_sites)
+SUBSTITUTED_FIELDS = ("explanation", "similarity_explanation")
+# A site value this many times a prompt number is taken as derived from it (diameter, half length)
+DERIVED_FACTORS = (2.0, 0.5)
+
+
+def mask_numbers(prompt):
+    """Replace numeric literals in a prompt with a NUM token and return them in order."""
+    numbers = NUMBER_RE.findall(prompt or "")
+    masked = NUMBER_RE.sub(" NUM ", (prompt or "").lower())
+    return " ".join(masked.split()), numbers
+
+
+def prompt_words(masked):
+    """Word tokens of a masked prompt, NUM included; punctuation, case and spacing are ignored."""
+    return tuple(WORD_RE.findall(masked))
+
+
+def substitute_numbers(text, mapping):
+    """Swap every numeric literal found in mapping in one pass, so 20->30 and 30->40 never chain."""
+    if not text or not mapping:
+        return text
+    return NUMBER_RE.sub(lambda m: mapping.get(m.group(0), m.group(0)), text)
+
+
+def _offsets(text):
+    """Character offset of each line start, for turning (lineno, utf-8 col) into an index."""
+    starts, total = [0], 0
+    lines = text.split("\n")
+    for line in lines[:-1]:
+        total += len(line) + 1
+        starts.append(total)
+    return starts, lines
+
+
+def _index(starts, lines, lineno, col):
+    return starts[lineno - 1] + len(lines[lineno - 1].encode("utf-8")[:col].decode("utf-8", "ignore"))
+
+
+def _is_site(node, parent):
+    """Constants that carry user parameters: expression strings (RightHandSide), values assigned to
+    builder attributes and literal arguments of Set* methods."""
+    if isinstance(parent, ast.Assign):
+        return all(isinstance(t, ast.Attribute) for t in parent.targets)
+    if isinstance(parent, ast.Call) and node in parent.args:
+        return isinstance(parent.func, ast.Attribute) and parent.func.attr.startswith("Set")
+    return False
+
+
+def parameter_sites(code):
+    """(start, end, number) spans of numbers in code where parameters go; None if it does not parse."""
+    try:
+        tree = parse_code(code)
+    except (SyntaxError, ValueError):
+        return None
+    starts, lines = _offsets(code)
+    parents = {child: node for node in ast.walk(tree) for child in ast.iter_child_nodes(node)}
+    sites = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Constant) or isinstance(node.value, bool) \
+                or not isinstance(node.value, (int, float, str)):
+            continue
+        parent = parents.get(node)
+        if isinstance(parent, ast.UnaryOp):
+            node, parent = parent, parents.get(parent)
+        if not _is_site(node, parent):
+            continue
+        start = _index(starts, lines, node.lineno, node.col_offset)
+        end = _index(starts, lines, node.end_lineno, node.end_col_offset)
+        sites += [(start + m.start(), start + m.end(), m.group(0)) for m in NUMBER_RE.finditer(code[start:end])]
+    return sorted(sites)
+
+
+def _comment_spans(code):
+    spans = []
+    starts, lines = _offsets(code)
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type == tokenize.COMMENT:
+                spans.append((starts[token.start[0] - 1] + token.start[1], starts[token.end[0] - 1] + token.end[1]))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return None
+    return spans
+
+
+def substitute_parameters(code, mapping):
+    """code with the prompt's old numbers replaced at their parameter sites, or None when that is unsafe.
+
+    Unsafe: an old number also appears elsewhere in the code (an index, a count), a mapped number
+    never appears at a site, or a site holds a value derived from a mapped number (2x, 0.5x),
+    which plain substitution would leave stale.
+    """
+    mapping = {old: new for old, new in mapping.items() if float(old) != float(new)}
+    if not mapping or not code:
+        return code
+    text = code.lstrip("\ufeff")
+    bom = code[:len(code) - len(text)]
+    sites = parameter_sites(text)
+    comments = _comment_spans(text)
+    if sites is None or comments is None:
+        return None
+    values = {float(old): old for old in mapping}
+    site_starts = {start for start, _, _ in sites}
+    found = set()
+    for start, _, number in sites:
+        value = float(number)
+        if value in values:
+            found.add(values[value])
+        elif value and any(value == old * factor for old in values for factor in DERIVED_FACTORS):
+            return None
+    if found != set(mapping):
+        return None
+    edits = []
+    for match in NUMBER_RE.finditer(text):
+        old = values.get(float(match.group(0)))
+        if old is None:
+            continue
+        in_comment = any(a <= match.start() < b for a, b in comments)
+        if match.start() not in site_starts and not in_comment:
+            return None
+        new = mapping[old]
+        if "." in match.group(0) and "." not in new and match.start() in site_starts:
+            new += ".0"  # keep float literals floats
+        edits.append((match.start(), match.end(), new))
+    parts, last = [], 0
+    for start, end, new in edits:
+        parts += [text[last:start], new]
+        last = end
+    return bom + "".join(parts) + text[last:]
+
+
+class SemanticCache:
+    """Reuse prior AI generations for prompts that differ only in their numbers."""
+
+    def __init__(self, vectorizer, threshold=0.92, max_entries=256):
+        self.vectorizer = vectorizer
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._matrix = None
+        self._keys = []
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "unsafe_misses": 0, "saved_seconds": 0.0}
+
+    def _rebuild_matrix(self):
+        self._keys = list(self._entries)
+        vectors = [self._entries[k]["vector"] for k in self._keys]
+        self._matrix = vstack(vectors) if vectors else None
+
+    def _best_match(self, masked, vector):
+        """Most similar entry above the threshold whose words are the prompt's, in the same order.
+
+        The vectorizer was fit on example code, so shape words such as "cube" or "wedge" are out
+        of its vocabulary and only the word check tells those prompts apart; the order also
+        decides which old number maps to which new one.
+        """
+        if masked in self._entries:
+            return masked, 1.0
+        if self._matrix is None or vector.nnz == 0:
+            return None, 0.0
+        words = prompt_words(masked)
+        sims = cosine_similarity(self._matrix, vector).flatten()
+        for idx in sims.argsort()[::-1]:
+            if sims[idx] < self.threshold:
+                break
+            if self._entries[self._keys[idx]]["words"] == words:
+                return self._keys[idx], float(sims[idx])
+        return None, 0.0
+
+    def lookup(self, prompt):
+        """Return a cached generation adapted to the prompt's numbers, or None on a miss."""
+        start = time.time()
+        masked, numbers = mask_numbers(prompt)
+        vector = self.vectorizer.transform([masked])
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            key, similarity = self._best_match(masked, vector)
+            if key is None or similarity < self.threshold:
+                return None
+            entry = self._entries[key]
+            if len(entry["numbers"]) != len(numbers):
+                return None
+
+            mapping = {}
+            for old, new in zip(entry["numbers"], numbers):
+                if mapping.setdefault(old, new) != new:
+                    # Same number used for two different new values - substitution is ambiguous
+                    return None
+
+            result = dict(entry["result"])
+            code = substitute_parameters(result.get("code"), mapping)
+            if code is None:
+                # The numbers are not confined to parameter sites; regenerate instead
+                self.stats["unsafe_misses"] += 1
+                return None
+            if result.get("raw_ai_response") and result.get("code"):
+                result["raw_ai_response"] = result["raw_ai_response"].replace(result["code"], code)
+            result["code"] = code
+            for field in SUBSTITUTED_FIELDS:
+                result[field] = substitute_numbers(result.get(field), mapping)
+            self._entries.move_to_end(key)
+
+            saved = max(0.0, entry["elapsed"] - (time.time() - start))
+            self.stats["hits"] += 1
+            self.stats["saved_seconds"] += saved
+
+        return {
+            "result": result,
+            "similarity": similarity,
+            "source_prompt": entry["prompt"],
+            "saved_seconds": saved,
+        }
+
+    def store(self, prompt, result, elapsed):
+        """Remember a completed generation and how long the full pipeline took."""
+        masked, numbers = mask_numbers(prompt)
+        entry = {
+            "prompt": prompt,
+            "numbers": numbers,
+            "words": prompt_words(masked),
+            "vector": self.vectorizer.transform([masked]),
+            "result": dict(result),
+            "elapsed": float(elapsed),
+        }
+        with self._lock:
+            self._entries[masked] = entry
+            self._entries.move_to_end(masked)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._rebuild_matrix()
+
+    @property
+    def hit_rate(self):
+        lookups = self.stats["lookups"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self._entries)
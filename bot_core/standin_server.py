@@ -0,0 +1,243 @@
+"""Local OpenAI-compatible stand-in for the LLM provider.
+
+Serves canned NXOpen completions with configurable latency and token throughput so the
+app can be load-tested offline:
+
+    python -m bot_core.standin_server --port 8008 --latency 0.4 --tokens-per-second 250
+    NXBOT_LLM_BACKEND=openai NXBOT_LLM_BASE_URL=http://127.0.0.1:8008/v1 streamlit run app.py
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHARS_PER_TOKEN = 4
+
+CANNED_EXPLANATION = """**Overview**: This NXOpen journal creates a feature in the work part using the builder pattern.
+
+**Key Components**: `NXOpen.Session` gives access to the running NX session, `Parts.Work` is the active part and the feature builder collects the parameters before the feature is created.
+
+**Step-by-Step Breakdown**:
+1. Get the session and the work part.
+2. Create the feature builder and set its parameters.
+3. Commit the builder to create the feature.
+4. Destroy the builder to release its memory.
+
+**Parameters**: `{param1}`, `{param2}` and so on are replaced with the values you enter.
+
+**Usage Notes**: Run the journal from File > Execute > NX Open with a part open."""
+
+CANNED_SIMILARITY = """1. **Why This Example Matches**: The example builds the same kind of feature the request asks for.
+2. **Key NXOpen Patterns**: Session and work part access, a Create*Builder call, Commit and Destroy.
+3. **Code Reusability**: Imports, session handling and the builder lifecycle can be reused as-is.
+4. **Adaptations Needed**: Replace the hard-coded dimensions with the requested parameters."""
+
+CANNED_TRAILER = """
+
+This script follows the reference example: it gets the session and work part, creates the feature through its builder, commits it and destroys the builder afterwards. Replace the parameter placeholders with your values before running it in NX."""
+
+
+def load_canned_examples(examples_dir):
+    examples = {}
+    if not os.path.isdir(examples_dir):
+        return examples
+    for fname in os.listdir(examples_dir):
+        if fname.endswith(".py"):
+            with open(os.path.join(examples_dir, fname), "r", encoding="utf-8", errors="ignore") as f:
+                examples[fname] = f.read()
+    return examples
+
+
+def pick_example(text, examples):
+    """Choose the example a prompt refers to, preferring an explicit reference block."""
+    match = re.search(r"REFERENCE EXAMPLE:\s*(.+)", text)
+    if match and match.group(1).strip() in examples:
+        return examples[match.group(1).strip()]
+    text_lower = text.lower()
+    for name in sorted(examples, key=len, reverse=True):
+        if name[:-3].lower() in text_lower:
+            return examples[name]
+    return examples.get("block.py") or next(iter(examples.values()), "import NXOpen\n\ndef main():\n    pass\n")
+
+
+def canned_completion(messages, examples, json_mode=False):
+    """Return a plausible completion for whichever app task produced these messages."""
+    text = "\n".join(str(m.get("content") or "") for m in messages)
+    if json_mode:
+        return json.dumps({
+            "code": pick_example(text, examples).strip(),
+            "explanation": CANNED_EXPLANATION,
+            "parameters": [
+                {"name": name, "value": value, "unit": "mm", "description": f"{name.title()} of the feature"}
+                for name, value in (("length", 100), ("width", 50), ("height", 30))
+            ],
+            "shape": "block",
+            "similarity_analysis": CANNED_SIMILARITY if "REFERENCE EXAMPLE:" in text else None,
+        })
+    if "Analyze and explain this NXOpen Python code" in text:
+        return CANNED_EXPLANATION
+    if "Matched Example:" in text:
+        return CANNED_SIMILARITY
+    return "```python\n" + pick_example(text, examples).strip() + "\n```" + CANNED_TRAILER
+
+
+def split_tokens(text):
+    return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+    examples = None
+
+    def log_message(self, fmt, *args):
+        if self.config.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "standin", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if random.random() < self.config.error_rate:
+            self._send_json(429, {"error": {"message": "Rate limit reached (stand-in)", "type": "rate_limit"}},
+                            headers={"Retry-After": "1"})
+            return
+
+        messages = request.get("messages") or []
+        json_mode = (request.get("response_format") or {}).get("type") == "json_object"
+        content = canned_completion(messages, self.examples, json_mode)
+        tokens = split_tokens(content)
+        max_tokens = request.get("max_tokens") or len(tokens)
+        finish_reason = "length" if len(tokens) > max_tokens else "stop"
+        tokens = tokens[:max_tokens]
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // CHARS_PER_TOKEN
+
+        jitter = 1.0 + random.uniform(-self.config.jitter, self.config.jitter)
+        time.sleep(max(0.0, self.config.latency * jitter))
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = request.get("model") or "standin"
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        if request.get("stream"):
+            self._stream(completion_id, model, tokens, finish_reason, usage)
+            return
+
+        time.sleep(len(tokens) / self.config.tokens_per_second)
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": finish_reason,
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id, model, tokens, finish_reason, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish=None, with_usage=False):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if with_usage:
+                chunk["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        interval = 1.0 / self.config.tokens_per_second
+        try:
+            event({"role": "assistant", "content": ""})
+            for token in tokens:
+                time.sleep(interval)
+                event({"content": token})
+            event({}, finish=finish_reason, with_usage=True)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client aborted the stream (cancellation or early stop)
+            pass
+
+
+def serve(host="127.0.0.1", port=8008, latency=0.4, jitter=0.25, tokens_per_second=250.0,
+          error_rate=0.0, examples_dir="nx_examples", verbose=False, background=False):
+    """Start the stand-in server; with background=True it runs on a daemon thread and is returned."""
+    config = argparse.Namespace(latency=latency, jitter=jitter, tokens_per_second=tokens_per_second,
+                                error_rate=error_rate, verbose=verbose)
+    handler = type("ConfiguredStandInHandler", (StandInHandler,), {
+        "config": config,
+        "examples": load_canned_examples(examples_dir),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    print(f"Stand-in LLM server on http://{host}:{server.server_port}/v1 "
+          f"(latency {latency}s, {tokens_per_second} tok/s, {len(handler.examples)} canned examples)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stand-in LLM server for offline testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--latency", type=float, default=0.4, help="Seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.25, help="Relative +/- jitter applied to latency")
+    parser.add_argument("--tokens-per-second", type=float, default=250.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--examples-dir", default="nx_examples")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.latency, args.jitter, args.tokens_per_second,
+          args.error_rate, args.examples_dir, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import json
+import re
+
+# Field name -> (accepted types, required)
+STRUCTURED_SCHEMA = {
+    "code": (str, True),
+    "explanation": (str, True),
+    "parameters": (list, True),
+    "shape": ((str, type(None)), True),
+    "similarity_analysis": ((str, type(None)), False),
+}
+
+PARAMETER_SCHEMA = {
+    "name": (str, True),
+    "value": ((str, int, float), True),
+    "unit": ((str, type(None)), False),
+    "description": ((str, type(None)), False),
+}
+
+KNOWN_SHAPES = {"block", "cube", "cylinder", "sphere", "cone", "edge_blend", "hole", "boss"}
+
+STRUCTURED_INSTRUCTIONS = """Respond with ONE JSON object and nothing else, using exactly these keys:
+{
+  "code": "<the complete NXOpen Python script as a single string>",
+  "explanation": "<markdown explanation: Overview, Key Components, Step-by-Step Breakdown, Parameters, Usage Notes>",
+  "parameters": [{"name": "<param name>", "value": <number or string>, "unit": "<unit or null>", "description": "<what it controls>"}],
+  "shape": "<one of: block, cube, cylinder, sphere, cone, edge_blend, hole, boss, or null>"%s
+}
+List parameters in the order their {paramN} placeholders appear in the code."""
+
+SIMILARITY_FIELD = (
+    ',\n  "similarity_analysis": "<markdown: why the reference example matches, '
+    'reusable NXOpen patterns, adaptations made>"'
+)
+
+
+def structured_instructions(with_similarity):
+    return STRUCTURED_INSTRUCTIONS % (SIMILARITY_FIELD if with_similarity else "")
+
+
+def _check_fields(obj, schema, where):
+    errors = []
+    if not isinstance(obj, dict):
+        return [f"{where} must be an object"]
+    for field, (types, required) in schema.items():
+        if field not in obj:
+            if required:
+                errors.append(f"{where}.{field} is missing")
+            continue
+        value = obj[field]
+        if isinstance(value, bool) or not isinstance(value, types):
+            errors.append(f"{where}.{field} has type {type(value).__name__}")
+    return errors
+
+
+def validate_structured_response(data):
+    """Return a list of schema violations (empty when the response is usable)."""
+    errors = _check_fields(data, STRUCTURED_SCHEMA, "response")
+    if errors:
+        return errors
+    if len(data["code"].strip()) < 50:
+        errors.append("response.code is too short to be a script")
+    for i, param in enumerate(data["parameters"]):
+        errors.extend(_check_fields(param, PARAMETER_SCHEMA, f"parameters[{i}]"))
+    return errors
+
+
+def parse_structured_response(text):
+    """Parse and validate a JSON-mode response; returns (normalized data or None, errors)."""
+    if not text:
+        return None, ["empty response"]
+    body = text.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", body, re.DOTALL)
+    if fenced:
+        body = fenced.group(1)
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        return None, [f"invalid JSON: {e}"]
+
+    errors = validate_structured_response(data)
+    if errors:
+        return None, errors
+
+    shape = (data["shape"] or "").strip().lower().replace(" ", "_") or None
+    return {
+        "code": data["code"].strip(),
+        "explanation": data["explanation"].strip(),
+        "parameters": [
+            {
+                "name": p["name"],
+                "value": str(p["value"]),
+                "unit": p.get("unit"),
+                "description": p.get("description"),
+            }
+            for p in data["parameters"]
+        ],
+        "shape": shape if shape in KNOWN_SHAPES else None,
+        "similarity_analysis": (data.get("similarity_analysis") or "").strip() or None,
+    }, []
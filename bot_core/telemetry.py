@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+from collections import deque
+
+from bot_core.model_router import estimate_cost
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else None
+
+
+class Telemetry:
+    """In-memory log of every completion call with per-task aggregates and exports."""
+
+    def __init__(self, max_records=5000):
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def record(self, task, model, completion=None, latency=None, status="ok", example=None):
+        """Log one logical completion call; failed calls pass status and their elapsed latency."""
+        entry = {
+            "timestamp": time.time(),
+            "task": task or "unknown",
+            "example": example,
+            "model": model,
+            "status": status,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "ttft": None,
+            "latency": latency,
+            "tokens_per_second": None,
+            "cost": 0.0,
+            "stopped_early": False,
+            "saved_tokens": 0,
+            "saved_seconds": 0.0,
+        }
+        if completion is not None:
+            latency = completion.latency if latency is None else latency
+            entry.update(
+                model=completion.model or model,
+                prompt_tokens=completion.prompt_tokens,
+                completion_tokens=completion.completion_tokens,
+                ttft=completion.ttft,
+                latency=latency,
+                cost=estimate_cost(completion.model or model, completion.prompt_tokens,
+                                   completion.completion_tokens),
+                stopped_early=completion.stopped_early,
+                saved_tokens=completion.saved_tokens,
+                saved_seconds=completion.saved_seconds,
+            )
+            # Throughput over the generation phase only, once the first token arrived
+            generation_time = latency - (completion.ttft or 0.0)
+            if completion.completion_tokens and generation_time > 0:
+                entry["tokens_per_second"] = completion.completion_tokens / generation_time
+        with self._lock:
+            self.records.append(entry)
+        return entry
+
+    def aggregates(self):
+        """Per-task summary: call counts, latency/TTFT percentiles, token and cost totals."""
+        with self._lock:
+            records = list(self.records)
+        tasks = {}
+        for task in sorted({r["task"] for r in records}):
+            rows = [r for r in records if r["task"] == task]
+            ok = [r for r in rows if r["status"] == "ok"]
+            latencies = [r["latency"] for r in ok if r["latency"] is not None]
+            ttfts = [r["ttft"] for r in ok if r["ttft"] is not None]
+            tasks[task] = {
+                "calls": len(rows),
+                "errors": sum(1 for r in rows if r["status"] == "error"),
+                "cancelled": sum(1 for r in rows if r["status"] == "cancelled"),
+                "latency_p50": _percentile(latencies, 0.50),
+                "latency_p95": _percentile(latencies, 0.95),
+                "ttft_p50": _percentile(ttfts, 0.50),
+                "ttft_p95": _percentile(ttfts, 0.95),
+                "prompt_tokens_per_request": _mean([r["prompt_tokens"] for r in ok]),
+                "completion_tokens_per_request": _mean([r["completion_tokens"] for r in ok]),
+                "tokens_per_second": _mean([r["tokens_per_second"] for r in ok if r["tokens_per_second"]]),
+                "prompt_tokens_total": sum(r["prompt_tokens"] for r in ok),
+                "completion_tokens_total": sum(r["completion_tokens"] for r in ok),
+                "cost_total": sum(r["cost"] for r in ok),
+                "early_stops": sum(1 for r in ok if r["stopped_early"]),
+                "saved_tokens_total": sum(r["saved_tokens"] for r in ok),
+                "saved_seconds_total": sum(r["saved_seconds"] for r in ok),
+                "models": sorted({r["model"] for r in rows if r["model"]}),
+            }
+        return tasks
+
+    def to_json(self, include_records=False):
+        payload = {"generated_at": time.time(), "tasks": self.aggregates()}
+        if include_records:
+            with self._lock:
+                payload["records"] = list(self.records)
+        return json.dumps(payload, indent=2)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (suitable for a textfile collector)."""
+        with self._lock:
+            records = list(self.records)
+        lines = [
+            "# HELP nxbot_llm_calls_total LLM completion calls by task, model and status.",
+            "# TYPE nxbot_llm_calls_total counter",
+        ]
+        counts = {}
+        for r in records:
+            key = (r["task"], r["model"] or "", r["status"])
+            counts[key] = counts.get(key, 0) + 1
+        for (task, model, status), count in sorted(counts.items()):
+            lines.append(f'nxbot_llm_calls_total{{task="{task}",model="{model}",status="{status}"}} {count}')
+
+        aggregates = self.aggregates()
+        lines += [
+            "# HELP nxbot_llm_tokens_total Tokens used by successful calls.",
+            "# TYPE nxbot_llm_tokens_total counter",
+        ]
+        for task, agg in aggregates.items():
+            lines.append(f'nxbot_llm_tokens_total{{task="{task}",kind="prompt"}} {agg["prompt_tokens_total"]}')
+            lines.append(f'nxbot_llm_tokens_total{{task="{task}",kind="completion"}} {agg["completion_tokens_total"]}')
+
+        lines += [
+            "# HELP nxbot_llm_early_stop_saved_tokens_total Estimated tokens not generated thanks to early stops.",
+            "# TYPE nxbot_llm_early_stop_saved_tokens_total counter",
+        ]
+        for task, agg in aggregates.items():
+            lines.append(f'nxbot_llm_early_stop_saved_tokens_total{{task="{task}"}} {agg["saved_tokens_total"]}')
+
+        for metric, field, help_text in (
+            ("nxbot_llm_latency_seconds", "latency", "Total completion latency."),
+            ("nxbot_llm_ttft_seconds", "ttft", "Time to first streamed token."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} summary"]
+            for task, agg in aggregates.items():
+                for quantile, label in (("50", "0.5"), ("95", "0.95")):
+                    value = agg[f"{field}_p{quantile}"]
+                    if value is not None:
+                        lines.append(f'{metric}{{task="{task}",quantile="{label}"}} {value:.6f}')
+
+        lines += [
+            "# HELP nxbot_llm_cost_dollars_total Estimated spend of successful calls.",
+            "# TYPE nxbot_llm_cost_dollars_total counter",
+        ]
+        for task, agg in aggregates.items():
+            lines.append(f'nxbot_llm_cost_dollars_total{{task="{task}"}} {agg["cost_total"]:.6f}')
+        return "\n".join(lines) + "\n"
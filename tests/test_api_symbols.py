@@ -0,0 +1,72 @@
+import os
+
+from bot_core.api_symbols import SymbolTable, build_symbol_table, check_api, mine_source
+from bot_core.code_analysis import read_source
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nx_examples")
+
+JOURNAL = '''import NXOpen
+def main():
+    theSession = NXOpen.Session.GetSession()
+    workPart = theSession.Parts.Work
+    builder = workPart.Features.CreateBlockFeatureBuilder(NXOpen.Features.Feature.Null)
+    builder.Commit()
+'''
+VB_JOURNAL = '''Dim theSession As Session = Session.GetSession()
+Dim wp As NXOpen.Part = theSession.Parts.Work
+wp.Features.CreateBlockFeatureBuilder(Nothing)
+'''
+
+
+def _table(tmp_path):
+    (tmp_path / "block.py").write_text(JOURNAL, encoding="utf-8")
+    (tmp_path / "block.vb").write_text(VB_JOURNAL.replace("Block", "Cylinder"), encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("theSession.Parts.Display.Ignored", encoding="utf-8")
+    return SymbolTable(build_symbol_table(str(tmp_path)))
+
+
+def test_vb_aliases_resolve_to_session_chains():
+    chains, members = mine_source(VB_JOURNAL)
+    assert "theSession.Parts.Work.Features.CreateBlockFeatureBuilder" in chains
+    assert "NXOpen.Session.GetSession" in chains
+    assert "CreateBlockFeatureBuilder" in members
+
+
+def test_symbol_table_mines_only_source_files(tmp_path):
+    table = _table(tmp_path)
+    assert table.sources == 2
+    assert "theSession.Parts.Work.Features.CreateCylinderFeatureBuilder" in table.chains
+    assert "Ignored" not in table.members
+    assert table.children["theSession.Parts.Work.Features"] == {"CreateBlockFeatureBuilder", "CreateCylinderFeatureBuilder"}
+
+
+def test_typo_through_an_alias_gets_a_suggestion(tmp_path):
+    code = JOURNAL.replace("    builder = workPart.Features.", "    features = workPart.Features\n"
+                                                               "    builder = features.") \
+        .replace("CreateBlockFeatureBuilder", "CreateBlockFeatureBuidler")
+    result = check_api(code, _table(tmp_path))
+    assert result["unknown"] == [{
+        "line": 6,
+        "symbol": "features.CreateBlockFeatureBuidler",
+        "resolved": "theSession.Parts.Work.Features.CreateBlockFeatureBuidler",
+        "suggestion": "features.CreateBlockFeatureBuilder",
+    }]
+
+
+def test_known_member_on_an_unmined_path_is_unverified(tmp_path):
+    code = JOURNAL + "    theSession.Features.CreateCylinderFeatureBuilder(None)\n"
+    result = check_api(code, _table(tmp_path))
+    assert result["unknown"] == []
+    assert result["unverified"] == 1
+
+
+def test_unparsable_code_is_reported():
+    result = check_api("def main(:\n")
+    assert not result["parsed"] and result["error"]
+
+
+def test_corpus_scripts_have_no_unknown_symbols():
+    names = [name for name in sorted(os.listdir(CORPUS)) if name.endswith(".py")]
+    assert names
+    for name in names:
+        assert check_api(read_source(os.path.join(CORPUS, name)))["unknown"] == [], name
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from bot_core.batch_rewriter import rewrite_batching
+from bot_core.code_analysis import parse_code, read_source
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nx_examples")
+# Corpus scripts that loop over bodies and faces
+BODY_FACE_SCRIPTS = ["unite.py", "Defeaturing_Simplify Tools.py", "Fill_Heal_ Patch.py", "Make a fillet.py",
+                     "Select_Cylindrical_delete_openings.py", "apply_edge_blend.py"]
+
+
+def corpus(name):
+    return read_source(os.path.join(CORPUS, name)).lstrip("\ufeff").replace("\r\n", "\n")
+
+
+def kinds(result):
+    return [change["kind"] for change in result["changes"]]
+
+
+@pytest.mark.parametrize("name", BODY_FACE_SCRIPTS)
+def test_corpus_rewrite_keeps_valid_code(name):
+    result = rewrite_batching(corpus(name))
+    assert result["parsed"] and result["error"] is None
+    parse_code(result["code"])
+
+
+def test_hoists_lookups_out_of_body_loop():
+    code = corpus("unite.py").replace(
+        "    for body in work_part.Bodies:\n        bodies.append(body)\n",
+        "    for body in work_part.Bodies:\n"
+        "        session = NXOpen.Session.GetSession()\n"
+        "        part = session.Parts.Work\n"
+        "        bodies.append(body)\n")
+    result = rewrite_batching(code)
+    assert kinds(result) == ["hoist_session", "hoist_work_part"]
+    assert "    session = NXOpen.Session.GetSession()\n    part = session.Parts.Work\n" \
+           "    for body in work_part.Bodies:\n        bodies.append(body)\n" in result["code"]
+
+
+def test_no_hoist_when_loop_switches_work_part():
+    code = corpus("Defeaturing_Simplify Tools.py").replace(
+        "    for face in target_body.GetFaces():\n",
+        "    for face in target_body.GetFaces():\n"
+        "        the_session.Parts.SetWork(face.OwningPart)\n"
+        "        face_part = the_session.Parts.Work\n"
+        "        face_part.Features.ToArray()\n")
+    assert "face_part = the_session.Parts.Work" in code
+    assert "hoist_work_part" not in kinds(rewrite_batching(code))
+
+
+def test_no_hoist_when_switch_goes_through_an_alias():
+    code = corpus("unite.py").replace(
+        "        bodies.append(body)\n",
+        "        parts = the_session.Parts\n"
+        "        parts.SetWork(body.OwningPart)\n"
+        "        owner = the_session.Parts.Work\n"
+        "        bodies.append(owner)\n")
+    assert "hoist_work_part" not in kinds(rewrite_batching(code))
+
+
+def test_no_hoist_when_target_is_read_after_loop():
+    # With zero bodies the original never binds part; hoisting would
+    code = corpus("unite.py").replace(
+        "        bodies.append(body)\n",
+        "        part = the_session.Parts.Work\n"
+        "        bodies.append(body)\n").replace(
+        "    if len(bodies) < 2:\n", "    print(part)\n    if len(bodies) < 2:\n")
+    assert "hoist_work_part" not in kinds(rewrite_batching(code))
+
+
+def test_undo_mark_hoisted_only_when_the_loop_does_not_use_it():
+    loop = ("    for body in work_part.Bodies:\n"
+            "        markId = the_session.SetUndoMark(NXOpen.Session.MarkVisibility.Visible, \"Body\")\n"
+            "        bodies.append(body)\n"
+            "{use}")
+    original = "    for body in work_part.Bodies:\n        bodies.append(body)\n"
+    trailing_update = "        the_session.UpdateManager.DoUpdate(markId)\n"
+    assert "hoist_undo_mark" in kinds(rewrite_batching(corpus("unite.py").replace(
+        original, loop.format(use=trailing_update))))
+    for use in ("        the_session.DeleteUndoMark(markId, None)\n",
+                "        the_session.UndoToMark(markId, None)\n" + trailing_update):
+        code = corpus("unite.py").replace(original, loop.format(use=use))
+        assert "markId = the_session.SetUndoMark" in code
+        assert "hoist_undo_mark" not in kinds(rewrite_batching(code))
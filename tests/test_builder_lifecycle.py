@@ -0,0 +1,42 @@
+from bot_core.builder_lifecycle import analyze_builders
+
+
+def errors(code):
+    return [issue["message"] for issue in analyze_builders(code)["issues"] if issue["severity"] == "error"]
+
+
+def test_builder_recreated_each_iteration_and_destroyed_once_leaks():
+    code = '''def main(parts):
+    for part in parts:
+        builder = part.Features.CreateBlockFeatureBuilder(None)
+        builder.Commit()
+    builder.Destroy()
+'''
+    result = analyze_builders(code)
+    assert any("created again on the next loop iteration" in message for message in errors(code))
+    assert result["builders"][0]["destroyed"] == "sometimes"
+
+
+def test_builder_destroyed_every_iteration_is_clean():
+    code = '''def main(parts):
+    for part in parts:
+        builder = part.Features.CreateBlockFeatureBuilder(None)
+        try:
+            if part is None:
+                continue
+            builder.Commit()
+        finally:
+            builder.Destroy()
+'''
+    assert errors(code) == []
+    assert analyze_builders(code)["builders"][0]["destroyed"] == "always"
+
+
+def test_builder_on_attribute_is_not_reported():
+    code = '''class Journal:
+    def run(self, part):
+        self.builder = part.Features.CreateBlockFeatureBuilder(None)
+        self.builder.Commit()
+'''
+    result = analyze_builders(code)
+    assert result["builders"] == [] and errors(code) == []
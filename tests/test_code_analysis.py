@@ -0,0 +1,72 @@
+import pytest
+
+from bot_core.code_analysis import code_fingerprint
+
+SCRIPT = '''import NXOpen
+
+def main():
+    theSession = NXOpen.Session.GetSession()
+    workPart = theSession.Parts.Work
+    builder = workPart.Features.CreateBlockFeatureBuilder(None)
+    builder.SetOriginAndLengths(NXOpen.Point3d(0.0, 0.0, 0.0), "100", "50", "25")
+    try:
+        builder.Commit()
+    except Exception as error:
+        print(error)
+    finally:
+        builder.Destroy()
+
+if __name__ == "__main__":
+    main()
+'''
+# Other variable names, other values, comments and layout: the same script
+RENAMED = '''import NXOpen
+
+
+def main():
+    # block of 20 x 10 x 5
+    session = NXOpen.Session.GetSession()
+    part = session.Parts.Work
+    block = part.Features.CreateBlockFeatureBuilder(None)
+    block.SetOriginAndLengths(NXOpen.Point3d(1.5, 2.5, 0.0),
+                              "20", "10", "5")  # lengths
+    try:
+        block.Commit()
+    except Exception as e:
+        print(e)
+    finally:
+        block.Destroy()
+
+if __name__ == "__main__":
+    main()
+'''
+
+
+def test_renames_values_and_comments_keep_the_fingerprint():
+    assert code_fingerprint(RENAMED) == code_fingerprint(SCRIPT)
+    assert code_fingerprint(SCRIPT.replace("\n", "\r\n")) == code_fingerprint(SCRIPT)
+
+
+@pytest.mark.parametrize("old, new", [
+    ("CreateBlockFeatureBuilder", "CreateCylinderBuilder"),  # another NXOpen call
+    ("(None)", "(False)"),                                   # None/True/False are kept
+    ('"100"', "100"),                                        # literal type
+    ("print(error)", "len(error)"),                          # builtins keep their names
+    ("        builder.Destroy()", "        pass"),           # structure
+    ('"__main__"', '"__other__"'),                           # dunder strings are kept
+])
+def test_structural_changes_alter_the_fingerprint(old, new):
+    assert old in SCRIPT
+    assert code_fingerprint(SCRIPT.replace(old, new)) != code_fingerprint(SCRIPT)
+
+
+def test_swapped_variable_roles_alter_the_fingerprint():
+    two = "a = 1\nb = 2\nprint(a, b)\n"
+    assert code_fingerprint(two) == code_fingerprint("x = 1\ny = 2\nprint(x, y)\n")
+    assert code_fingerprint(two) != code_fingerprint("a = 1\nb = 2\nprint(b, a)\n")
+
+
+def test_unparsable_code_falls_back_to_text_without_comments():
+    broken = "def main(:\n    builder.Commit()  # commit\n"
+    assert code_fingerprint(broken) == code_fingerprint("def main(:\n  builder.Commit()\n")
+    assert code_fingerprint(broken) != code_fingerprint("def main(:\n    builder.Destroy()\n")
@@ -0,0 +1,138 @@
+import pytest
+
+from bot_core.code_extract import FenceTokenizer, FenceWatcher, extract_code_blocks, extract_python_code
+
+SCRIPT = """import NXOpen
+import NXOpen.Features
+
+def main():
+    theSession = NXOpen.Session.GetSession()
+    workPart = theSession.Parts.Work
+    builder = workPart.Features.CreateBlockFeatureBuilder(NXOpen.Features.Feature.Null)
+    try:
+        builder.Commit()
+    finally:
+        builder.Destroy()"""
+
+# Responses as the generator returns them
+MIXED = f"""Here is a journal that creates a block.
+
+Run it from the NX command prompt:
+
+```bash
+run_journal block.py
+```
+
+```python
+{SCRIPT}
+```
+
+The builder is destroyed in the finally block, so it is released even when Commit fails.
+"""
+UNTAGGED = f"""The journal:
+
+```
+{SCRIPT}
+```
+"""
+TILDES = f"""~~~python
+{SCRIPT}
+~~~
+
+A fence of backticks inside the block does not close it:
+
+~~~~py
+print("```")
+{SCRIPT}
+~~~~
+"""
+TRUNCATED = f"""Here is the journal:
+
+```python
+{SCRIPT}
+    builder2 = workPart.Features.CreateCylinderBuilder("""
+HELPER_FIRST = f"""A helper you can reuse in other journals:
+
+```python
+def to_mm(value, unit):
+    return value * 25.4 if unit == "in" else value
+```
+
+And the journal:
+
+```python
+{SCRIPT}
+```
+"""
+PROSE_ONLY = "I cannot write a journal for that: NX has no API for it."
+BARE = f"Sure.\n{SCRIPT}\n"
+
+
+def test_mixed_response_keeps_the_python_block():
+    blocks = extract_code_blocks(MIXED)
+    assert [(b["tag"], b["python"], b["closed"]) for b in blocks] == [("bash", False, True), ("python", True, True)]
+    assert blocks[0]["code"] == "run_journal block.py"
+    assert extract_python_code(MIXED) == SCRIPT
+
+
+def test_untagged_block_with_imports_is_python():
+    assert extract_code_blocks(UNTAGGED)[0]["python"]
+    assert extract_python_code(UNTAGGED) == SCRIPT
+
+
+def test_tilde_fences_and_longer_fences():
+    blocks = extract_code_blocks(TILDES)
+    assert [b["tag"] for b in blocks] == ["python", "py"]
+    assert blocks[0]["code"] == SCRIPT
+    assert blocks[1]["code"] == f'print("```")\n{SCRIPT}'
+    assert extract_python_code(TILDES) == blocks[1]["code"]
+
+
+def test_truncated_response_keeps_the_open_block():
+    blocks = extract_code_blocks(TRUNCATED)
+    assert len(blocks) == 1 and not blocks[0]["closed"]
+    assert extract_python_code(TRUNCATED).startswith(SCRIPT)
+
+
+def test_responses_without_fences():
+    assert extract_python_code(PROSE_ONLY) is None
+    assert extract_python_code(BARE) == SCRIPT
+    assert extract_python_code(None) is None
+
+
+@pytest.mark.parametrize("text", [MIXED, UNTAGGED, TILDES, TRUNCATED, MIXED.replace("\n", "\r\n")])
+@pytest.mark.parametrize("chunk", [1, 7, 64])
+def test_streamed_chunks_match_whole_text(text, chunk):
+    tokenizer = FenceTokenizer()
+    for start in range(0, len(text), chunk):
+        tokenizer.feed(text[start:start + chunk])
+    assert tokenizer.close() == extract_code_blocks(text)
+
+
+@pytest.mark.parametrize("text", [MIXED, UNTAGGED, TILDES])
+@pytest.mark.parametrize("chunk", [1, 7, 64])
+def test_watcher_stops_after_the_main_block(text, chunk):
+    whole = FenceWatcher()
+    assert whole.feed(text)
+    streamed = FenceWatcher()
+    stopped = [start for start in range(0, len(text), chunk) if streamed.feed(text[start:start + chunk])]
+    assert streamed.stop_offset == whole.stop_offset
+    # It stops on the chunk that completes the closing fence line, and text[:stop_offset] ends with it
+    assert stopped[0] <= whole.stop_offset <= stopped[0] + chunk
+    main_block = next(block for block in extract_code_blocks(text) if block["python"])
+    assert whole.stop_offset == main_block["end"]
+    assert text[:whole.stop_offset].rstrip().endswith(("```", "~~~"))
+
+
+def test_watcher_never_stops_on_a_truncated_block():
+    watcher = FenceWatcher()
+    assert not watcher.feed(TRUNCATED)
+    assert watcher.stop_offset is None
+
+
+@pytest.mark.parametrize("chunk", [1, 64])
+def test_watcher_waits_past_a_helper_snippet(chunk):
+    watcher = FenceWatcher()
+    stopped = [start for start in range(0, len(HELPER_FIRST), chunk) if watcher.feed(HELPER_FIRST[start:start + chunk])]
+    assert stopped
+    assert extract_python_code(HELPER_FIRST[:watcher.stop_offset]) == extract_python_code(HELPER_FIRST) == SCRIPT
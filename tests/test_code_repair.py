@@ -0,0 +1,65 @@
+from bot_core.code_analysis import quality_checks, quality_score, summarize_code
+from bot_core.code_repair import CodeRepairer, build_repair_messages
+from bot_core.llm_backends import Completion
+
+# Scores 55: no session, commit, destroy or __main__ guard
+BROKEN = """import NXOpen
+
+def main():
+    workPart = find_work_part()
+    builder = workPart.Features.CreateBlockFeatureBuilder(None)
+"""
+FIX = """<<<<<<< SEARCH
+    builder = workPart.Features.CreateBlockFeatureBuilder(None)
+=======
+    builder = workPart.Features.CreateBlockFeatureBuilder(None)
+    builder.Commit()
+    builder.Destroy()
+>>>>>>> REPLACE
+"""
+GUARD = """<<<<<<< SEARCH
+=======
+if __name__ == "__main__":
+    main()
+>>>>>>> REPLACE
+"""
+
+
+def validate(code):
+    checks = quality_checks(summarize_code(code))
+    return {**checks, "quality_score": quality_score(checks)}, ""
+
+
+class FakeClient:
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.messages = []
+
+    def complete(self, messages, **kwargs):
+        self.messages.append(messages)
+        return Completion(self.replies.pop(0), "fake", prompt_tokens=100, completion_tokens=20)
+
+
+def test_patch_that_fixes_checks_is_applied():
+    client = FakeClient(FIX)
+    result = CodeRepairer(client, validate).repair(BROKEN, full_cost_tokens=2000)
+    assert result["repaired"] and result["score_after"] == 85
+    assert "    builder.Commit()\n    builder.Destroy()" in result["code"]
+    assert result["tokens_saved"] == 2000 - 120
+
+
+def test_patch_that_breaks_the_syntax_is_rejected():
+    # The text fallback finds Commit and Destroy, but the patched script no longer parses
+    broken_fix = FIX.replace("    builder.Commit()\n", "    builder.Commit(\n")
+    result = CodeRepairer(FakeClient(broken_fix), validate).repair(BROKEN)
+    assert result["code"] == BROKEN
+    assert result["patches_applied"] == 0 and not result["repaired"]
+
+
+def test_missing_main_guard_is_asked_for_and_repaired():
+    assert "__name__" in build_repair_messages(BROKEN, ["has_main_guard"])[1]["content"]
+    client = FakeClient(FIX, GUARD)
+    result = CodeRepairer(client, validate, target_score=100, max_rounds=2).repair(BROKEN)
+    assert "if __name__ == '__main__'" in client.messages[1][1]["content"]
+    assert result["code"].endswith('if __name__ == "__main__":\n    main()\n')
+    assert validate(result["code"])[0]["has_main_guard"]
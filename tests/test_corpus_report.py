@@ -0,0 +1,85 @@
+import json
+
+from bot_core.corpus_report import build_report, collect_sources, compare_reports, duplicate_groups, histogram
+
+SCRIPT = '''import NXOpen
+import NXOpen.Features
+
+def main():
+    theSession = NXOpen.Session.GetSession()
+    workPart = theSession.Parts.Work
+    builder = workPart.Features.CreateBlockFeatureBuilder(NXOpen.Features.Feature.Null)
+    try:
+        builder.Commit()
+    finally:
+        builder.Destroy()
+
+if __name__ == "__main__":
+    main()
+'''
+# The same script with other names, values and comments
+RENAMED = SCRIPT.replace("workPart", "part").replace("builder", "block_builder") \
+    .replace("def main():", "def main():\n    # one block")
+LEAKY = SCRIPT.replace("    try:\n        builder.Commit()\n    finally:\n        builder.Destroy()",
+                       "    builder.Commit()")
+
+
+def _entry(source_id, score, **fields):
+    entry = {"id": source_id, "score": score, "lifecycle_errors": 0, "api_unknown": 0, "perf_high": 0}
+    entry.update(fields)
+    return entry
+
+
+def test_histogram_buckets_include_both_ends():
+    counts = histogram([0, 9, 10, 89, 90, 100])
+    assert counts["0-9"] == 2 and counts["10-19"] == 1 and counts["80-89"] == 1 and counts["90-100"] == 2
+    assert sum(counts.values()) == 6
+
+
+def test_duplicate_groups_largest_first():
+    files = [{"id": "a", "fingerprint": "x"}, {"id": "b", "fingerprint": "y"}, {"id": "c", "fingerprint": "y"},
+             {"id": "d", "fingerprint": "x"}, {"id": "e", "fingerprint": "y"}, {"id": "f", "fingerprint": "z"},
+             {"id": "g", "fingerprint": None}, {"id": "h", "fingerprint": None}]
+    assert duplicate_groups(files) == [{"fingerprint": "y", "ids": ["b", "c", "e"]},
+                                       {"fingerprint": "x", "ids": ["a", "d"]}]
+    assert len(duplicate_groups(files, limit=1)) == 1
+
+
+def test_compare_reports_lists_each_regression():
+    baseline = {"files": [_entry("a.py", 90), _entry("b.py", 80), _entry("c.py", 70),
+                          _entry("d.py", 60, dry_run={"ok": True, "error": None})]}
+    report = {"files": [_entry("a.py", 90), _entry("b.py", 75, lifecycle_errors=1), _entry("c.py", 95, perf_high=2),
+                        _entry("d.py", 60, dry_run={"ok": False, "error": "NameError: x"}),
+                        _entry("new.py", 10), _entry("unreadable.py", None)]}
+    assert compare_reports(report, baseline) == [
+        {"id": "b.py", "reasons": ["score 80 -> 75", "lifecycle_errors 0 -> 1"]},
+        {"id": "c.py", "reasons": ["perf_high 0 -> 2"]},
+        {"id": "d.py", "reasons": ["dry run now fails: NameError: x"]},
+    ]
+
+
+def test_collect_sources_reads_responses_and_skips_result_records(tmp_path):
+    (tmp_path / "scripts").mkdir()
+    (tmp_path / "scripts" / "block.py").write_text(SCRIPT, encoding="utf-8")
+    (tmp_path / "scripts" / "notes.txt").write_text("not a script", encoding="utf-8")
+    traffic = tmp_path / "traffic.jsonl"
+    records = [{"kind": "call", "key": "k", "response": {"content": f"Here:\n```python\n{SCRIPT}```\n"}},
+               {"kind": "result", "key": "k", "result": {"code": SCRIPT}},
+               {"kind": "call", "key": "j", "response": {"content": "I cannot help with that."}}]
+    traffic.write_text("\n".join(json.dumps(r) for r in records) + "\n\n", encoding="utf-8")
+    sources = collect_sources([str(tmp_path / "scripts"), str(traffic), str(tmp_path / "missing.py")])
+    assert [source_id for source_id, _, _ in sources] == [
+        str(tmp_path / "scripts" / "block.py"), f"{traffic}:1", str(tmp_path / "missing.py")]
+    assert sources[1][1] == SCRIPT.rstrip("\n")
+    assert sources[2][1] is None and sources[2][2]
+
+
+def test_report_analyses_each_unique_script_once(tmp_path):
+    for name, code in [("a.py", SCRIPT), ("b.py", SCRIPT), ("c.py", RENAMED), ("d.py", LEAKY)]:
+        (tmp_path / name).write_text(code, encoding="utf-8")
+    report = build_report([str(tmp_path)], workers=1)
+    summary = report["summary"]
+    assert (summary["files"], summary["unique"], summary["distinct_fingerprints"]) == (4, 3, 2)
+    assert summary["lifecycle_errors"] == 1
+    assert [len(group["ids"]) for group in report["duplicates"]] == [3]
+    assert compare_reports(report, report) == []
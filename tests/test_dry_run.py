@@ -0,0 +1,52 @@
+import pytest
+
+from bot_core.dry_run import DryRunPool, SandboxUnavailable
+
+SCRIPT = """import NXOpen
+
+def main():
+    theSession = NXOpen.Session.GetSession()
+    workPart = theSession.Parts.Work
+    print(workPart)
+"""
+FORGED = '{"ok": true, "error": null, "error_line": null, "ran_main": true, "counts": {}, "top_calls": [], ' \
+         '"output": "", "elapsed_ms": 0.1}'
+
+
+@pytest.fixture(scope="module")
+def pool():
+    try:
+        pool = DryRunPool(workers=1, timeout=10.0)
+    except SandboxUnavailable as e:
+        pytest.skip(f"no sandbox here: {e}")
+    yield pool
+    pool.close()
+
+
+def test_ok_and_failing_scripts(pool):
+    ok = pool.run(SCRIPT)
+    assert ok["ok"] and ok["ran_main"] and ok["error"] is None
+    failed = pool.run(SCRIPT + "    raise ValueError('boom')\n")
+    assert not failed["ok"]
+    assert failed["error"] == "ValueError: boom" and failed["error_line"] == 7
+
+
+@pytest.mark.parametrize("forge", [
+    f"import sys\nsys.__stdout__.write({FORGED!r} + '\\n')\nsys.__stdout__.flush()\n",
+    f"import os\nos.write(1, ({FORGED!r} + '\\n').encode())\n",
+])
+def test_scripts_cannot_forge_their_result(pool, forge):
+    result = pool.run(forge + "raise ValueError('boom')\n")
+    assert not result["ok"] and result["error"] == "ValueError: boom"
+    # The next script gets its own result, not the leftover of the previous one
+    assert pool.run(SCRIPT)["ok"]
+
+
+def test_a_reply_for_another_job_is_rejected(pool):
+    # Writing straight to the private protocol fd gets past /dev/null, but not past the job id
+    forge = "import os\nfor fd in range(3, 20):\n    try:\n        os.write(fd, (%r + '\\n').encode())\n" \
+            "    except OSError:\n        pass\nraise ValueError('boom')\n" % FORGED
+    result = pool.run(forge)
+    assert not result["ok"]
+    assert result["error"] == "worker protocol error: reply does not belong to this job"
+    assert pool.run(SCRIPT)["ok"]
@@ -0,0 +1,48 @@
+import random
+
+from bot_core.line_diff import _diff, _myers, diff_lines
+
+
+def _lcs_length(a, b):
+    row = [0] * (len(b) + 1)
+    for x in a:
+        previous = 0
+        for j, y in enumerate(b):
+            previous, row[j + 1] = row[j + 1], previous + 1 if x == y else max(row[j + 1], row[j])
+    return row[-1]
+
+
+def test_myers_finds_a_longest_common_subsequence():
+    rng = random.Random(7)
+    for _ in range(500):
+        a = [rng.randint(0, 3) for _ in range(rng.randint(0, 20))]
+        b = [rng.randint(0, 3) for _ in range(rng.randint(0, 20))]
+        matches = []
+        _myers(a, 0, len(a), b, 0, len(b), matches, max_cost=10 ** 6)
+        assert all(a[i] == b[j] for i, j in matches)
+        assert all(i1 < i2 and j1 < j2 for (i1, j1), (i2, j2) in zip(matches, matches[1:]))
+        assert len(matches) == _lcs_length(a, b)
+
+
+def test_unrelated_files_become_one_replace_block():
+    reference = "\n".join(f"reference line {i}" for i in range(3000))
+    generated = "\n".join(f"generated line {i}" for i in range(3000))
+    assert _diff((reference, generated))["opcodes"] == [("replace", 0, 3000, 0, 3000)]
+
+
+def test_edits_between_repeated_lines_are_aligned():
+    reference = ["", "    builder.Commit()", "    builder.Destroy()"] * 200
+    generated = list(reference)
+    for i in range(0, 600, 40):
+        generated[i] = "    builder.CommitFeature()"
+    result = _diff(("\n".join(reference), "\n".join(generated)))
+    assert result["unchanged"] == 600 - 15
+
+
+def test_texts_with_nul_characters():
+    # A UTF-16 example read as UTF-8 keeps a NUL after every ASCII character
+    reference = "\x00".join("import NXOpen\n\ndef main():\n    pass\n")
+    result = diff_lines(reference, reference)
+    assert result["reuse_ratio"] == 1.0
+    assert result["added"] == result["removed"] == 0
+    assert diff_lines(reference, "import NXOpen\n")["unchanged"] == 0
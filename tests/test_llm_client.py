@@ -0,0 +1,122 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from bot_core.llm_backends import CallCancelled, Completion, SDKBackend
+from bot_core.llm_client import CallTimeout, LLMClient, TokenBucket, parse_duration
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {"headers": {"retry-after": retry_after}})()
+
+
+def test_parse_duration_units():
+    assert parse_duration("150ms") == 0.15
+    assert abs(parse_duration("7.66ms") - 0.00766) < 1e-9
+    assert parse_duration("1m3.5s") == 63.5
+    assert parse_duration("2") == 2.0
+    assert parse_duration("tomorrow") is None
+
+
+def test_retry_after_is_capped_by_backoff_cap():
+    class Backend:
+        def chat(self, request, timeout, cancel_event=None, stop_when=None):
+            raise RateLimited("2h")
+
+    waits = []
+
+    class Event(threading.Event):
+        def wait(self, timeout=None):
+            waits.append(timeout)
+            return False
+
+    client = LLMClient(Backend(), max_retries=1, backoff_cap=5.0)
+    try:
+        client.complete(MESSAGES, "model", cancel_event=Event())
+    except RateLimited:
+        pass
+    assert waits == [5.0]
+
+
+class SlowFirstBackend:
+    """The first call streams until it is cancelled; later calls answer at once."""
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = threading.Event()
+
+    def chat(self, request, timeout, cancel_event=None, stop_when=None):
+        self.calls += 1
+        if self.calls > 1:
+            return Completion("ok", request["model"], prompt_tokens=1, completion_tokens=1)
+        while not cancel_event.wait(0.01):
+            pass
+        self.cancelled.set()
+        raise CallCancelled("cancelled")
+
+
+def test_hedge_winner_cancels_the_other_leg_and_refunds_its_budget():
+    backend = SlowFirstBackend()
+    client = LLMClient(backend, tokens_per_minute=100000, hedge_min_samples=1, timeout=30.0)
+    client._latencies.append(0.01)
+    completion = client.complete(MESSAGES, "model", max_tokens=1000)
+    assert completion.content == "ok" and client.stats["hedge_wins"] == 1
+    assert backend.cancelled.wait(2.0)
+    # Only the winner's two tokens stay spent
+    assert client.token_bucket.tokens > 100000 - 10
+
+
+def test_timeout_bounds_the_whole_call():
+    class TricklingBackend:
+        def chat(self, request, timeout, cancel_event=None, stop_when=None):
+            # Every read arrives well within the per-read timeout, but the stream never ends
+            while not cancel_event.wait(0.02):
+                pass
+            raise CallCancelled("closed")
+
+    client = LLMClient(TricklingBackend(), max_retries=0, timeout=0.2)
+    start = time.monotonic()
+    with pytest.raises(CallTimeout):
+        client.complete(MESSAGES, "model")
+    assert time.monotonic() - start < 2.0
+
+
+def test_waiting_for_budget_stops_on_cancel():
+    bucket = TokenBucket(60)
+    bucket.acquire(60)
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    start = time.monotonic()
+    with pytest.raises(CallCancelled):
+        bucket.acquire(60, cancel)
+    assert time.monotonic() - start < 1.0
+
+
+def test_cancel_closes_a_stream_blocked_on_a_read():
+    class StalledStream:
+        def __init__(self):
+            self.closed = threading.Event()
+
+        def __iter__(self):
+            self.closed.wait(5.0)
+            raise RuntimeError("read on closed connection")
+
+        def close(self):
+            self.closed.set()
+
+    stream = StalledStream()
+    sdk = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: stream)))
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    start = time.monotonic()
+    with pytest.raises(CallCancelled):
+        SDKBackend(sdk).chat({"model": "model", "messages": MESSAGES}, 60.0, cancel)
+    assert time.monotonic() - start < 2.0
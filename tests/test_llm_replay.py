@@ -0,0 +1,83 @@
+import json
+
+from bot_core import generation
+from bot_core.llm_backends import ChatBackend, Completion
+from bot_core.llm_client import LLMClient
+from bot_core.llm_replay import RecordingBackend, verify
+
+RESPONSE = """Here is a journal that creates a block:
+
+```python
+import NXOpen
+import NXOpen.Features
+
+def main():
+    theSession = NXOpen.Session.GetSession()
+    workPart = theSession.Parts.Work
+    builder = workPart.Features.CreateBlockFeatureBuilder(NXOpen.Features.Feature.Null)
+    try:
+        builder.Commit()
+    finally:
+        builder.Destroy()
+
+if __name__ == "__main__":
+    main()
+```
+
+Run it from NX with Tools > Journal > Play.
+"""
+MESSAGES = [{"role": "user", "content": "Create a block"}]
+
+
+class CannedBackend(ChatBackend):
+    name = "canned"
+
+    def chat(self, request, timeout, cancel_event=None, stop_when=None):
+        return Completion(RESPONSE, request["model"], prompt_tokens=10, completion_tokens=120, finish_reason="stop")
+
+
+def _client(backend):
+    return LLMClient(backend, requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9, max_retries=0)
+
+
+def _record(path):
+    code, _ = generation.generate_code(_client(RecordingBackend(CannedBackend(), str(path))), MESSAGES,
+                                       "llama-3.3-70b-versatile", 3000)
+    return code
+
+
+def test_recording_holds_the_generation_result(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    code = _record(path)
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [r.get("kind", "call") for r in records] == ["call", "result"]
+    assert records[1]["key"] == records[0]["key"]
+    assert records[1]["result"]["code"] == code
+    assert records[1]["result"]["quality_score"] > 0
+
+
+def test_verify_replays_the_generate_flow(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    _record(path)
+    report = verify(str(path), honor_latency=False)
+    assert report["generations"] == 1
+    assert report["mismatches"] == []
+
+
+def test_verify_reports_a_change_in_extraction(tmp_path, monkeypatch):
+    path = tmp_path / "traffic.jsonl"
+    _record(path)
+    monkeypatch.setattr(generation, "extract_python_code", lambda text: text.split("```python\n")[-1])
+    report = verify(str(path), honor_latency=False)
+    assert [m["fields"][0] for m in report["mismatches"]] == ["code"]
+
+
+def test_verify_reports_a_changed_recorded_result(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    _record(path)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    result = json.loads(lines[1])
+    result["result"]["quality_score"] -= 10
+    path.write_text("\n".join([lines[0], json.dumps(result)]) + "\n", encoding="utf-8")
+    report = verify(str(path), honor_latency=False)
+    assert report["mismatches"][0]["fields"] == ["quality_score"]
@@ -0,0 +1,45 @@
+import pytest
+
+from bot_core.param_template import ParamTemplate, convert_value, fill_params, format_report
+
+
+def test_unit_conversion_and_defaults():
+    template = ParamTemplate('builder.Radius.RightHandSide = "{radius:mm=25}"')
+    assert template.render({"radius": "1in"})[0] == 'builder.Radius.RightHandSide = "25.4"'
+    text, report = template.render({})
+    assert text == 'builder.Radius.RightHandSide = "25"' and report["defaulted"] == ["radius"]
+    assert convert_value("90deg", "rad") == "1.570796327"
+    assert convert_value("2cm", "mm") == "20"
+
+
+def test_fstring_fields_stay_literal():
+    source = 'for i in range({count:int=3}):\n    print(f"{i}: {x:.2f} {value!r} {width}")\nh = "{param1}"'
+    text, report = ParamTemplate(source).render(["40"])
+    assert text == 'for i in range(3):\n    print(f"{i}: {x:.2f} {value!r} {width}")\nh = "40"'
+    assert report == {"unfilled": [], "defaulted": ["count"], "invalid": []}
+
+
+def test_sequence_and_dict_values():
+    source = 'length = "{param1}"\nwidth = "{param2}"\nlength_again = "{param1}"'
+    assert fill_params(source, ["50", "80"]) == 'length = "50"\nwidth = "80"\nlength_again = "50"'
+    assert fill_params(source, {"param2": "80"}) == 'length = "0"\nwidth = "80"\nlength_again = "0"'
+    # Without paramN slots, a sequence fills named slots in order of first appearance
+    named = 'h = "{height:mm}"\nr = "{radius:mm}"\nh2 = "{height}"'
+    assert fill_params(named, ["80", "2cm"]) == 'h = "80"\nr = "20"\nh2 = "80"'
+    assert fill_params(named, {"radius": "5"}) == 'h = "0"\nr = "5"\nh2 = "0"'
+
+
+def test_unfilled_and_invalid_are_reported():
+    template = ParamTemplate('n = {count:int}\nr = "{radius:mm=abc}"\nw = "{param1}"\na = "{angle:deg}"')
+    text, report = template.render({"count": "2.5", "angle": "3mm"})
+    assert text == 'n = 0\nr = "0"\nw = "0"\na = "0"'
+    assert report["unfilled"] == ["count", "radius", "param1", "angle"]
+    assert [item["name"] for item in report["invalid"]] == ["count", "radius", "angle"]
+    assert "count='2.5' rejected (" in format_report(report)
+    assert format_report(template.render({"count": "2", "radius": "1", "param1": "3", "angle": "90"})[1]) == ""
+
+
+@pytest.mark.parametrize("value, kind", [("abc", "mm"), ("5kg", "mm"), ("5mm", "int"), ("5deg", "mm")])
+def test_convert_value_rejects(value, kind):
+    with pytest.raises(ValueError):
+        convert_value(value, kind)
@@ -0,0 +1,56 @@
+import os
+
+from bot_core.code_analysis import read_source
+from bot_core.perf_lint import RULES, lint_performance
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nx_examples")
+
+
+def rules(code):
+    return [(finding["rule"], finding["line"], finding["cost"]) for finding in lint_performance(code)["findings"]]
+
+
+def test_commit_and_update_in_loop():
+    code = '''def main(workPart, theSession, lengths):
+    for length in lengths:
+        builder = workPart.Features.CreateBlockFeatureBuilder(None)
+        builder.Commit()
+        theSession.UpdateManager.DoUpdate(mark)
+'''
+    assert rules(code) == [("commit", 4, "high"), ("update", 5, "high"), ("builder", 3, "medium")]
+
+
+def test_nested_loops_raise_the_cost():
+    code = '''for part in parts:
+    for body in part.Bodies:
+        session = NXOpen.Session.GetSession()
+'''
+    assert rules(code) == [("session", 3, "medium")]
+
+
+def test_loop_iterable_and_setup_outside_are_not_flagged():
+    code = '''theSession = NXOpen.Session.GetSession()
+for body in theSession.Parts.Work.Bodies:
+    print(body)
+'''
+    assert rules(code) == []
+
+
+def test_call_through_a_function_is_reported_at_the_call():
+    code = '''def log(session, text):
+    session.ListingWindow.Open()
+    session.ListingWindow.WriteLine(text)
+
+def main(session, items):
+    for item in items:
+        log(session, item)
+'''
+    finding = lint_performance(code)["findings"][0]
+    assert (finding["rule"], finding["line"], finding["via"]) == ("listing_open", 7, "log")
+
+
+def test_suggested_examples_batch_their_work():
+    cited = {name for _, _, suggestion in RULES.values() for name in suggestion.split() if name.endswith(".py")}
+    assert cited
+    for name in cited:
+        assert lint_performance(read_source(os.path.join(CORPUS, name)))["findings"] == [], name
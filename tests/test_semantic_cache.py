@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("scipy")
+pytest.importorskip("sklearn")
+
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: E402
+
+from bot_core.semantic_cache import SemanticCache, substitute_parameters  # noqa: E402
+
+CYLINDER = '''import NXOpen
+def main():
+    session = NXOpen.Session.GetSession()
+    part = session.Parts.ToArray()[0]
+    # cylinder radius 20, height 80
+    builder = part.Features.CreateCylinderBuilder(None)
+    builder.Radius.RightHandSide = "20"
+    builder.Height.RightHandSide = "80"
+'''
+
+
+def test_numbers_replaced_at_parameter_sites_and_comments():
+    code = substitute_parameters(CYLINDER, {"20": "25", "80": "90"})
+    assert 'RightHandSide = "25"' in code and 'RightHandSide = "90"' in code
+    assert "radius 25, height 90" in code
+    assert "ToArray()[0]" in code
+
+
+def test_number_used_as_index_is_a_miss():
+    code = CYLINDER.replace("ToArray()[0]", "ToArray()[1]").replace('"80"', '"1"').replace("height 80", "height 1")
+    assert substitute_parameters(code, {"20": "25", "1": "3"}) is None
+
+
+def test_derived_value_is_a_miss():
+    code = CYLINDER.replace("Radius", "Diameter").replace('RightHandSide = "20"', 'RightHandSide = "40"')
+    assert substitute_parameters(code, {"20": "25", "80": "90"}) is None
+
+
+def _cache():
+    # Fit on code like the app's vectorizer: shape words such as "cube" and "wedge" are not in it
+    vectorizer = TfidfVectorizer(stop_words="english", ngram_range=(1, 3), sublinear_tf=True)
+    vectorizer.fit([CYLINDER, CYLINDER.replace("Cylinder", "Block").replace("Radius", "Length")])
+    return SemanticCache(vectorizer)
+
+
+def test_prompt_with_new_numbers_is_a_hit():
+    cache = _cache()
+    cache.store("Create a cylinder radius 20 height 80", {"code": CYLINDER}, 12.0)
+    hit = cache.lookup("create a cylinder, radius 25 height 90")
+    assert 'RightHandSide = "25"' in hit["result"]["code"]
+
+
+def test_shapes_outside_the_vocabulary_do_not_collide():
+    cache = _cache()
+    cache.store("cube radius 20 height 80", {"code": CYLINDER}, 12.0)
+    assert cache.lookup("wedge radius 20 height 80") is None
+    # Same words in another order: the numbers would be swapped
+    assert cache.lookup("cube height 80 radius 20") is None
+    assert cache.lookup("cube radius 25 height 90") is not None